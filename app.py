@@ -1,51 +1,440 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from pydantic import BaseModel
-from fastapi import Query
-import pickle
-import docx
-import PyPDF2
-import re
-import io
 import time
-import uvicorn
+STARTUP_T0 = time.perf_counter()
+
+import sys
+import asyncio
+import importlib
+import atexit
+import threading
+from functools import partial
+import os
+import json
 import logging
 
+# Startup timeline: one entry per import and initialization step, served by GET /startup
+startup_timeline = []
+
+def record_startup_step(step, start):
+    startup_timeline.append({
+        "step": step,
+        "started_at_ms": round((start - STARTUP_T0) * 1000, 2),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "thread": threading.current_thread().name,
+    })
+
+def timed_import(module_name):
+    """Import a module on first use, recording how long the first import took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record_startup_step(f"import {module_name}", start)
+    return module
+
+_import_start = time.perf_counter()
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import List
+from fastapi import Query
+from starlette.formparsers import MultiPartParser
+record_startup_step("import fastapi", _import_start)
+
+from batching import MicroBatcher
+from cache import SingleFlightCache, content_key, files_version
+from executors import BoundedExecutor, PoolSaturatedError
+from diagnostics import DiagnosticsMiddleware, SlowRequestLog, collapsed, sample_stacks, trace_file, trace_stage
+from metrics import MetricsMiddleware, MetricsRegistry
+from pdf_extract import PdfLimitError
+from ranking import TopK, aiter_ndjson, corpus_path, iter_corpus
+from uploads import UnsupportedFileType, UploadLimitMiddleware, as_stream, sniff_format, upload_digest
+
 app = FastAPI(title="Resume Screening API", version="1.0")
 
+# "eager" imports every parser and loads the models before the module finishes
+# importing; "lazy" imports PDF / DOCX parsers on the first upload of that type
+# and loads the models on a background thread, so /ping answers right away and
+# /health reports "loading" (503) until the models are ready. The thread starts
+# at import time because Mangum runs with lifespan="off" on Lambda.
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'eager').lower()
+# Longest time a prediction request waits for a background model load
+MODEL_LOAD_WAIT_S = float(os.environ.get('MODEL_LOAD_WAIT_S', '60'))
+
+# "compiled" merges all support vectors into one kernel evaluation, "sparse" scores
+# each SVC on CSR rows, "dense" is the original toarray() path
+INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'compiled').lower()
+ENGINES = {'compiled': 'CompiledOvRSVC', 'sparse': 'SparseOvRSVC'}
+
+# Support vector storage of the compiled engine: "float64" (as fitted), "float32" or
+# "int8" (one scale per support vector). A reduced precision is only served if it
+# predicts the float64 engine's label for at least PRECISION_MIN_AGREEMENT of the
+# resumes in PRECISION_GUARD_DATASET (empty skips the check). arrays / bundle exports
+# carry the precision they were written with (python model_store.py export ... int8).
+ENGINE_PRECISION = os.environ.get('ENGINE_PRECISION', 'float64').lower()
+PRECISION_GUARD_DATASET = os.environ.get('PRECISION_GUARD_DATASET', 'UpdatedResumeDataSet.csv')
+PRECISION_MIN_AGREEMENT = float(os.environ.get('PRECISION_MIN_AGREEMENT', '0.999'))
+
+# Build TF-IDF rows straight from raw text (clean, lowercase, tokenize and look up
+# in one pass, see model_store.FusedTfidfVectorizer) instead of cleanResume + tfidf.transform
+FUSED_VECTORIZER = os.environ.get('FUSED_VECTORIZER', '1') == '1'
+
+# "pickle" unpickles clf.pkl / tfidf.pkl / encoder.pkl into every worker; "arrays"
+# memory-maps the flat arrays written by `python model_store.py export`, so all
+# workers on a host share one read-only copy of the model; "bundle" maps the single
+# checksummed file written by `python model_store.py bundle`. Neither of the last
+# two imports scikit-learn.
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'pickle').lower()
+MODEL_ARRAYS_DIR = os.environ.get('MODEL_ARRAYS_DIR', 'model_arrays')
+MODEL_BUNDLE_PATH = os.environ.get('MODEL_BUNDLE_PATH', 'model.rsb')
+
+# Upper bound on the number of items accepted by /predict/batch, and the number of
+# rows vectorized and scored together (bounds the kernel matrix size)
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '500'))
+BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', '256'))
+
+# Coalesce concurrent /predict and /predict/text calls into one vectorized prediction
+MICROBATCH_ENABLED = os.environ.get('MICROBATCH_ENABLED', '1') == '1'
+MICROBATCH_WINDOW_MS = float(os.environ.get('MICROBATCH_WINDOW_MS', '5'))
+MICROBATCH_MAX_SIZE = int(os.environ.get('MICROBATCH_MAX_SIZE', '32'))
+
+# Extraction and inference run on bounded pools ("thread" or "process") so the
+# event loop keeps answering /health and /ping while large uploads are parsed
+EXTRACTION_POOL = os.environ.get('EXTRACTION_POOL', 'thread')
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', '2'))
+EXTRACTION_QUEUE = int(os.environ.get('EXTRACTION_QUEUE', '32'))
+INFERENCE_POOL = os.environ.get('INFERENCE_POOL', 'thread')
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '1'))
+INFERENCE_QUEUE = int(os.environ.get('INFERENCE_QUEUE', '64'))
+
+# Request bodies above MAX_UPLOAD_BYTES (/predict, /predict/text) or MAX_BATCH_UPLOAD_BYTES
+# (/predict/batch) get a 413 before they are parsed; uploaded files larger than
+# UPLOAD_SPOOL_BYTES are spooled to a temporary file instead of memory
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+MAX_BATCH_UPLOAD_BYTES = int(os.environ.get('MAX_BATCH_UPLOAD_BYTES', str(100 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_BYTES', str(1024 * 1024)))
+
+# /rank streams its pool through RANK_CHUNK_SIZE-resume batches keeping only the k best
+# (at most RANK_MAX_K). NDJSON bodies up to MAX_RANK_UPLOAD_BYTES are read as they arrive;
+# JSON bodies are parsed whole, so they get the batch limit. RANK_CORPUS_DIR holds
+# server-side corpora (CSV with a Resume column, or NDJSON) that /rank?corpus= can name.
+RANK_MAX_K = int(os.environ.get('RANK_MAX_K', '1000'))
+RANK_CHUNK_SIZE = int(os.environ.get('RANK_CHUNK_SIZE', '256'))
+RANK_CORPUS_DIR = os.environ.get('RANK_CORPUS_DIR', '')
+MAX_RANK_UPLOAD_BYTES = int(os.environ.get('MAX_RANK_UPLOAD_BYTES', str(1024 * 1024 * 1024)))
+
+# Starlette (0.27, pinned in requirements.txt) reads the spool threshold from this class
+# attribute on every multipart parse and has no per-request setting, and FastAPI parses
+# File() parameters itself. Setting it process-wide is acceptable because this process only
+# serves this app; every multipart parse in it spools above UPLOAD_SPOOL_BYTES.
+MultiPartParser.max_file_size = UPLOAD_SPOOL_BYTES
+app.add_middleware(UploadLimitMiddleware, limits={
+    '/predict': MAX_UPLOAD_BYTES, '/predict/text': MAX_UPLOAD_BYTES, '/predict/batch': MAX_BATCH_UPLOAD_BYTES,
+    '/rank': MAX_RANK_UPLOAD_BYTES,
+})
+
+# /metrics serves Prometheus histograms of request latency per endpoint and of each
+# stage (extraction per file type, cleanResume, vectorization, SVC), requests in flight
+# and error counts. With several worker processes (uvicorn --workers, EXTRACTION_POOL=process)
+# point METRICS_DIR at a directory they share, emptied when the server starts: every
+# process writes its samples there each METRICS_FLUSH_S seconds and /metrics sums them.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_S = float(os.environ.get('METRICS_FLUSH_S', '1'))
+
+# Diagnostics for requests that are only slow in production (diagnostics.py), served under
+# /debug when DEBUG_ENDPOINTS=1. GET /debug/profile samples the stacks of all threads for a
+# few seconds. The slow request log, switched on at runtime (POST /debug/slow-requests) or at
+# startup (SLOW_REQUEST_LOG=1), keeps the last SLOW_REQUEST_CAPACITY requests slower than
+# SLOW_REQUEST_THRESHOLD_MS with their stage timings and uploaded files. Both act on the
+# worker process that answers the call.
+DEBUG_ENDPOINTS = os.environ.get('DEBUG_ENDPOINTS', '0') == '1'
+SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG', '0') == '1'
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '1000'))
+SLOW_REQUEST_CAPACITY = int(os.environ.get('SLOW_REQUEST_CAPACITY', '100'))
+PROFILE_MAX_S = float(os.environ.get('PROFILE_MAX_S', '60'))
+PROFILE_MAX_RATE_HZ = 1000
+
+metrics_registry = MetricsRegistry(METRICS_ENABLED, METRICS_DIR, METRICS_FLUSH_S)
+slow_request_log = SlowRequestLog(SLOW_REQUEST_THRESHOLD_MS, SLOW_REQUEST_CAPACITY)
+profile_lock = threading.Lock()
+# Without either setting the log can never be enabled, so requests skip the middleware entirely
+if DEBUG_ENDPOINTS or SLOW_REQUEST_LOG:
+    app.add_middleware(DiagnosticsMiddleware, log=slow_request_log)
+# Added last, so it is the outermost middleware and also sees the upload limit's 413s
+app.add_middleware(MetricsMiddleware, registry=metrics_registry, routes=app.router.routes)
+
+# PDFs with more pages than PDF_MAX_PAGES or taking longer than PDF_TIMEOUT_S are
+# rejected. Every PDF is extracted by PDF_PAGE_WORKERS processes; those still working on
+# a PDF at its deadline are killed and replaced, without failing the other PDFs. PDFs with
+# at least PDF_PARALLEL_MIN_PAGES pages are split across them. 1 extracts on the
+# extraction thread, checking the deadline only between pages.
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', '300'))
+PDF_TIMEOUT_S = float(os.environ.get('PDF_TIMEOUT_S', '20'))
+PDF_PAGE_WORKERS = int(os.environ.get('PDF_PAGE_WORKERS', str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '16'))
+
+# PROGRESSIVE_ENABLED classifies /predict uploads from their first pages: the first
+# PROGRESSIVE_INITIAL_WORDS words are scored, and more pages (PROGRESSIVE_GROWTH times
+# as many words) are read only while the top two classes are less than
+# PROGRESSIVE_MARGIN apart (progressive.py). Partial scorings are skipped while they would
+# take more than PROGRESSIVE_MAX_OVERHEAD times the time spent reading the document.
+PROGRESSIVE_ENABLED = os.environ.get('PROGRESSIVE_ENABLED', '0') == '1'
+PROGRESSIVE_INITIAL_WORDS = int(os.environ.get('PROGRESSIVE_INITIAL_WORDS', '200'))
+PROGRESSIVE_MARGIN = float(os.environ.get('PROGRESSIVE_MARGIN', '0.5'))
+PROGRESSIVE_GROWTH = float(os.environ.get('PROGRESSIVE_GROWTH', '2'))
+PROGRESSIVE_MAX_OVERHEAD = float(os.environ.get('PROGRESSIVE_MAX_OVERHEAD', '0.25'))
+
+# Similar-resume search (similarity.py): the index in SIMILARITY_INDEX_DIR (built with
+# `python similarity.py build`) is memory-mapped when the models load, and documents
+# added or removed through the API are saved back to it every SIMILARITY_SAVE_INTERVAL_S
+# seconds (and at exit), merged with what other workers saved; in between, each worker
+# reloads the index when another one saved it. /similar returns at most SIMILARITY_MAX_K
+# resumes; added documents are sealed into segments of SIMILARITY_SEGMENT_DOCS.
+SIMILARITY_INDEX_DIR = os.environ.get('SIMILARITY_INDEX_DIR', 'similarity_index')
+SIMILARITY_MAX_K = int(os.environ.get('SIMILARITY_MAX_K', '100'))
+SIMILARITY_SEGMENT_DOCS = int(os.environ.get('SIMILARITY_SEGMENT_DOCS', '50000'))
+SIMILARITY_SAVE_INTERVAL_S = float(os.environ.get('SIMILARITY_SAVE_INTERVAL_S', '5'))
+
+# Fast tier (fast_tier.py): a linear model distilled from the SVC, loaded from FAST_TIER_PATH
+# (built with `python fast_tier.py build`) when the file exists. /predict, /predict/text and
+# /predict/batch take ?tier=fast|accurate|auto (default DEFAULT_TIER): "auto" answers with the
+# fast tier and rescores with the SVC every resume whose top two fast-tier scores are less
+# than FAST_TIER_MARGIN apart.
+FAST_TIER_PATH = os.environ.get('FAST_TIER_PATH', 'fast_tier.npz')
+DEFAULT_TIER = os.environ.get('DEFAULT_TIER', 'accurate').lower()
+FAST_TIER_MARGIN = float(os.environ.get('FAST_TIER_MARGIN', '0.5'))
+TIERS = ('fast', 'accurate', 'auto')
+
+# Near-duplicate detection in /predict/batch (dedup.py): "flag" marks every resume whose
+# MinHash estimate of shingle Jaccard similarity to an earlier one in the batch is at
+# least DEDUP_THRESHOLD with "duplicate_of"; "collapse" also classifies only the first
+# resume of each group and copies its category to the others. "off" skips detection.
+DEDUP_MODE = os.environ.get('DEDUP_MODE', 'off').lower()
+DEDUP_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', '0.8'))
+DEDUP_SHINGLE_SIZE = int(os.environ.get('DEDUP_SHINGLE_SIZE', '5'))
+DEDUP_NUM_PERM = int(os.environ.get('DEDUP_NUM_PERM', '128'))
+
+# Cache extracted text by upload bytes and predictions by raw resume text; byte-identical
+# concurrent requests share one computation. Predictions are dropped when the model changes.
+# The upload cache holds at most UPLOAD_CACHE_MAX_BYTES of extracted text. Keys of texts
+# longer than INLINE_KEY_CHARS are hashed on a thread instead of the event loop.
+CACHE_ENABLED = os.environ.get('CACHE_ENABLED', '1') == '1'
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+CACHE_TTL_S = float(os.environ.get('CACHE_TTL_S', '3600'))
+UPLOAD_CACHE_MAX_ENTRIES = int(os.environ.get('UPLOAD_CACHE_MAX_ENTRIES', '256'))
+UPLOAD_CACHE_MAX_BYTES = int(os.environ.get('UPLOAD_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+INLINE_KEY_CHARS = 64 * 1024
+
+prediction_cache = SingleFlightCache('predictions', CACHE_MAX_ENTRIES, CACHE_TTL_S) if CACHE_ENABLED else None
+upload_cache = SingleFlightCache('uploads', UPLOAD_CACHE_MAX_ENTRIES, CACHE_TTL_S,
+                                 max_bytes=UPLOAD_CACHE_MAX_BYTES) if CACHE_ENABLED else None
+
 # Load your existing models (same as Streamlit)
 svc_model = None
 tfidf = None
 le = None
+engine = None
+fused_vectorizer = None
+term_counter = None
+similarity_index = None
+fast_tier = None
+fast_tier_counts = {"fast": 0, "escalated": 0}
+precision_check = None
+model_version = None
 model_load_error = None
+model_load_ms = None
+models_ready_at_ms = None
+models_ready = threading.Event()
+
+def load_similarity_index(similarity):
+    """
+    Open the saved similarity index, or start an empty one if there is none (or it is unreadable,
+    or does not fit the vectorizer); then start saving API changes to SIMILARITY_INDEX_DIR
+    """
+    global similarity_index
+    step_start = time.perf_counter()
+    # ArrayTfidfVectorizer / fitted scikit-learn TfidfVectorizer
+    n_features = tfidf.n_features if hasattr(tfidf, 'n_features') else len(tfidf.idf_)
+    index = None
+    if SIMILARITY_INDEX_DIR and os.path.exists(os.path.join(SIMILARITY_INDEX_DIR, 'manifest.json')):
+        try:
+            index = similarity.SimilarityIndex.load(SIMILARITY_INDEX_DIR, SIMILARITY_SEGMENT_DOCS)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load the similarity index in {SIMILARITY_INDEX_DIR} ({e}); starting an empty "
+                  f"index (rebuild with python similarity.py build)")
+    if index is not None and index.n_features != n_features:
+        print(f"Similarity index in {SIMILARITY_INDEX_DIR} has {index.n_features} features, the vectorizer "
+              f"{n_features}; starting an empty index (rebuild with python similarity.py build)")
+        index = None
+    if index is None:
+        index = similarity.SimilarityIndex(n_features, SIMILARITY_SEGMENT_DOCS, model_version)
+    elif index.model_version != model_version:
+        print(f"Similarity index was built with model {index.model_version}, serving {model_version}")
+    similarity_index = index
+    if SIMILARITY_INDEX_DIR:
+        index.attach(SIMILARITY_INDEX_DIR)
+        threading.Thread(target=similarity_sync_loop, name='similarity-sync', daemon=True).start()
+        atexit.register(save_similarity_index)
+    record_startup_step("load similarity index", step_start)
+
+def save_similarity_index():
+    """Save the similarity index's unsaved API changes, if any"""
+    if similarity_index is not None and similarity_index.unsaved:
+        similarity_index.save(SIMILARITY_INDEX_DIR)
+
+def similarity_sync_loop():
+    """Save this worker's index changes, or pick up other workers' saves, every SIMILARITY_SAVE_INTERVAL_S"""
+    while True:
+        time.sleep(SIMILARITY_SAVE_INTERVAL_S)
+        try:
+            if similarity_index.unsaved:
+                similarity_index.save(SIMILARITY_INDEX_DIR)
+            else:
+                similarity_index.refresh()
+        except (OSError, ValueError, KeyError) as e:
+            # Unsaved changes are kept and saved once the index there is readable again
+            print(f"Similarity index sync with {SIMILARITY_INDEX_DIR} failed: {e}")
+
+def load_fast_tier(fast_tier_module):
+    """Load the distilled linear tier if FAST_TIER_PATH exists, is readable and fits the vectorizer and classes"""
+    global fast_tier
+    if not FAST_TIER_PATH or not os.path.exists(FAST_TIER_PATH):
+        return
+    step_start = time.perf_counter()
+    try:
+        tier = fast_tier_module.LinearTier.load(FAST_TIER_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load the fast tier in {FAST_TIER_PATH} ({e}); serving without it "
+              f"(rebuild it with python fast_tier.py build)")
+        return
+    n_features = tfidf.n_features if hasattr(tfidf, 'n_features') else len(tfidf.idf_)
+    classes = engine.classes_ if engine is not None else svc_model.classes_
+    if tier.n_features != n_features or list(tier.classes_) != list(classes):
+        print(f"Fast tier in {FAST_TIER_PATH} does not fit the model ({tier.n_features} features, the vectorizer "
+              f"{n_features}); rebuild it with python fast_tier.py build")
+        return
+    if tier.teacher_version != model_version:
+        print(f"Fast tier was distilled from model {tier.teacher_version}, serving {model_version}")
+    fast_tier = tier
+    record_startup_step("load fast tier", step_start)
 
-try:
-    svc_model = pickle.load(open('clf.pkl', 'rb'))
-    tfidf = pickle.load(open('tfidf.pkl', 'rb'))
-    le = pickle.load(open('encoder.pkl', 'rb'))
-    print("Models loaded successfully")
-except Exception as e:
-    model_load_error = str(e)
-    print(f"CRITICAL ERROR: Failed to load models: {e}")
+def apply_engine_precision(engine_module):
+    """Swap the compiled engine for an ENGINE_PRECISION copy if it passes the agreement check"""
+    global engine, precision_check
+    current = getattr(engine, 'precision', None)
+    if current is None:
+        if ENGINE_PRECISION != 'float64':
+            print(f"ENGINE_PRECISION={ENGINE_PRECISION} needs the compiled engine, serving {INFERENCE_MODE}")
+        return
+    if current != 'float64' or ENGINE_PRECISION == 'float64':
+        # Exports written at a reduced precision are served as written
+        if ENGINE_PRECISION not in ('float64', current):
+            print(f"ENGINE_PRECISION={ENGINE_PRECISION} ignored, the {MODEL_FORMAT} model stores {current}")
+        return
+    step_start = time.perf_counter()
+    try:
+        candidate = engine.with_precision(ENGINE_PRECISION)
+    except ValueError as e:
+        print(f"ENGINE_PRECISION={ENGINE_PRECISION} not applied: {e}")
+        return
+    if PRECISION_GUARD_DATASET and os.path.exists(PRECISION_GUARD_DATASET):
+        texts = [text for _, text in iter_corpus(PRECISION_GUARD_DATASET)]
+        # Runs during the module-level load, before vectorize() is defined
+        if fused_vectorizer is not None:
+            X = fused_vectorizer.transform(texts)
+        else:
+            X = tfidf.transform([timed_import('textnorm').clean_resume(text) for text in texts])
+        agreement = engine_module.label_agreement(engine, candidate, X)
+        precision_check = {"precision": ENGINE_PRECISION, "agreement": round(agreement, 4), "resumes": len(texts),
+                           "min_agreement": PRECISION_MIN_AGREEMENT, "applied": agreement >= PRECISION_MIN_AGREEMENT}
+        if agreement < PRECISION_MIN_AGREEMENT:
+            print(f"{ENGINE_PRECISION} engine agrees with {engine.precision} on {agreement:.2%} of "
+                  f"{len(texts)} resumes (below {PRECISION_MIN_AGREEMENT:.2%}); serving {engine.precision}")
+            return
+    else:
+        print(f"No {PRECISION_GUARD_DATASET or 'guard dataset'}; serving {ENGINE_PRECISION} without an agreement check")
+    engine = candidate
+    record_startup_step(f"convert engine to {ENGINE_PRECISION}", step_start)
 
-# YOUR EXISTING FUNCTIONS (unchanged)
+def load_models():
+    """Import the numeric stack and load the models, recording each step in the startup timeline"""
+    global svc_model, tfidf, le, engine, fused_vectorizer, similarity_index, fast_tier, model_version, model_load_error, model_load_ms, models_ready_at_ms, INFERENCE_MODE
+    load_start = time.perf_counter()
+    try:
+        timed_import('numpy')
+        timed_import('scipy.sparse')
+        engine_module = timed_import('engine')
+        model_store = timed_import('model_store')
+        timed_import('textnorm')
+        if MODEL_FORMAT in ('arrays', 'bundle'):
+            step_start = time.perf_counter()
+            if MODEL_FORMAT == 'arrays':
+                array_model = model_store.load_model_arrays(MODEL_ARRAYS_DIR)
+            else:
+                array_model = model_store.load_bundle(MODEL_BUNDLE_PATH)
+            record_startup_step(f"load {MODEL_FORMAT}", step_start)
+            tfidf, engine, le = array_model.vectorizer, array_model.engine, array_model.label_encoder
+            if MODEL_FORMAT == 'bundle':
+                model_version = array_model.checksum[:16]
+            else:
+                model_version = files_version(os.path.join(MODEL_ARRAYS_DIR, name) for name in os.listdir(MODEL_ARRAYS_DIR))
+            INFERENCE_MODE = 'compiled'
+        else:
+            pickle = timed_import('pickle')
+            # Import the classes referenced by the pickles up front so unpickling is timed on its own
+            for module_name in ('sklearn.multiclass', 'sklearn.svm', 'sklearn.feature_extraction.text', 'sklearn.preprocessing'):
+                timed_import(module_name)
+            step_start = time.perf_counter()
+            svc_model = pickle.load(open('clf.pkl', 'rb'))
+            tfidf = pickle.load(open('tfidf.pkl', 'rb'))
+            le = pickle.load(open('encoder.pkl', 'rb'))
+            record_startup_step("unpickle models", step_start)
+            model_version = files_version(['clf.pkl', 'tfidf.pkl', 'encoder.pkl'])
+            if INFERENCE_MODE in ENGINES:
+                step_start = time.perf_counter()
+                engine = getattr(engine_module, ENGINES[INFERENCE_MODE])(svc_model)
+                record_startup_step(f"build {INFERENCE_MODE} engine", step_start)
+        if FUSED_VECTORIZER:
+            step_start = time.perf_counter()
+            try:
+                fused_vectorizer = model_store.FusedTfidfVectorizer.from_vectorizer(tfidf)
+                record_startup_step("build fused vectorizer", step_start)
+            except ValueError as e:
+                print(f"Fused vectorizer unavailable, using cleanResume + tfidf.transform: {e}")
+        apply_engine_precision(engine_module)
+        load_similarity_index(timed_import('similarity'))
+        load_fast_tier(timed_import('fast_tier'))
+        if prediction_cache is not None:
+            prediction_cache.set_version(model_version)
+        model_load_ms = round((time.perf_counter() - load_start) * 1000, 2)
+        print(f"Models loaded successfully in {model_load_ms}ms (format: {MODEL_FORMAT}, inference mode: {INFERENCE_MODE})")
+    except Exception as e:
+        model_load_error = str(e)
+        print(f"CRITICAL ERROR: Failed to load models: {e}")
+    finally:
+        models_ready_at_ms = round((time.perf_counter() - STARTUP_T0) * 1000, 2)
+        models_ready.set()
+
+if STARTUP_MODE == 'lazy':
+    threading.Thread(target=load_models, name='model-loader', daemon=True).start()
+else:
+    timed_import('PyPDF2')
+    timed_import('docx')
+    load_models()
+
+# YOUR EXISTING FUNCTIONS (cleanResume now runs the single-pass normalizer in textnorm.py)
 def cleanResume(txt):
-    cleanText = re.sub('http\S+\s', ' ', txt)
-    cleanText = re.sub('RT|cc', ' ', cleanText)
-    cleanText = re.sub('#\S+\s', ' ', cleanText)
-    cleanText = re.sub('@\S+', '  ', cleanText)
-    cleanText = re.sub('[%s]' % re.escape("""!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~"""), ' ', cleanText)
-    cleanText = re.sub(r'[^\x00-\x7f]', ' ', cleanText)
-    cleanText = re.sub('\s+', ' ', cleanText)
-    return cleanText
-
-def extract_text_from_pdf(file):
-    pdf_reader = PyPDF2.PdfReader(file)
-    text = ''
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    return text
+    with metrics_registry.stage('clean'):
+        return timed_import('textnorm').clean_resume(txt)
+
+def extract_text_from_pdf(file, info=None):
+    timed_import('PyPDF2')
+    return timed_import('pdf_extract').extract_pdf_text(
+        file, PDF_MAX_PAGES, PDF_TIMEOUT_S, PDF_PAGE_WORKERS, PDF_PARALLEL_MIN_PAGES, info)
 
 def extract_text_from_docx(file):
+    docx = timed_import('docx')
     doc = docx.Document(file)
     text = ''
     for paragraph in doc.paragraphs:
@@ -53,56 +442,349 @@ def extract_text_from_docx(file):
     return text
 
 def extract_text_from_txt(file):
+    data = file.read()
     try:
-        text = file.read().decode('utf-8')
+        text = data.decode('utf-8')
     except UnicodeDecodeError:
-        text = file.read().decode('latin-1')
+        text = data.decode('latin-1')
     return text
 
+def extraction_error_status(error):
+    """HTTP status of an upload whose text could not be extracted"""
+    if isinstance(error, UnsupportedFileType):
+        return 415
+    if isinstance(error, PdfLimitError):
+        return 413
+    return 500
+
 def handle_file_upload(uploaded_file):
-    file_extension = uploaded_file.filename.split('.')[-1].lower()
-    file_content = uploaded_file.file.read()
-    
-    if file_extension == 'pdf':
-        return extract_text_from_pdf(io.BytesIO(file_content))
-    elif file_extension == 'docx':
-        return extract_text_from_docx(io.BytesIO(file_content))
-    elif file_extension == 'txt':
-        return extract_text_from_txt(io.BytesIO(file_content))
+    return extract_text(uploaded_file.file)
+
+def extract_text(source):
+    """
+    Extract text from upload bytes or a seekable binary file (such as Starlette's
+    spooled upload file), choosing the parser from the content's magic bytes
+    """
+    stream = as_stream(source)
+    file_format = sniff_format(stream)
+    upload = None
+    if slow_request_log.enabled:
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        upload = trace_file(sha256=upload_digest(stream), size_bytes=size, file_type=file_format or 'unsupported')
+
+    with metrics_registry.stage('extract', file_format or 'unsupported'):
+        if file_format == 'pdf':
+            return extract_text_from_pdf(stream, upload)
+        elif file_format == 'docx':
+            return extract_text_from_docx(stream)
+        elif file_format == 'txt':
+            return extract_text_from_txt(stream)
+        else:
+            raise UnsupportedFileType("Unsupported file type. Please upload PDF, DOCX, or TXT")
+
+def iter_text_chunks(source):
+    """
+    Text of an upload in document order as PDF pages, DOCX paragraphs or TXT lines,
+    each extracted only when consumed; the chunks join to the extract_text() text
+    """
+    stream = as_stream(source)
+    file_format = sniff_format(stream)
+
+    if file_format == 'pdf':
+        timed_import('PyPDF2')
+        return timed_import('pdf_extract').iter_pdf_pages(stream, PDF_MAX_PAGES, PDF_TIMEOUT_S, PDF_PAGE_WORKERS)
+    elif file_format == 'docx':
+        doc = timed_import('docx').Document(stream)
+        return (paragraph.text + '\n' for paragraph in doc.paragraphs)
+    elif file_format == 'txt':
+        return iter(extract_text_from_txt(stream).splitlines(keepends=True))
     else:
-        raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT")
+        raise UnsupportedFileType("Unsupported file type. Please upload PDF, DOCX, or TXT")
+
+def predict_vectors(vectorized_text):
+    """Predict label indices for a CSR matrix of TF-IDF rows"""
+    with metrics_registry.stage('svc'):
+        if engine is not None:
+            return engine.predict(vectorized_text)
+        return svc_model.predict(vectorized_text.toarray())
 
-# YOUR EXISTING PREDICTION FUNCTION (unchanged)
+def decision_scores(vectorized_text):
+    """Per-class decision scores for a CSR matrix of TF-IDF rows"""
+    with metrics_registry.stage('svc'):
+        if engine is not None:
+            return engine.decision_function(vectorized_text)
+        return svc_model.decision_function(vectorized_text.toarray())
+
+def vectorize(input_resumes):
+    """TF-IDF rows (CSR) for a list of raw resume texts"""
+    if fused_vectorizer is not None:
+        # Cleaning, tokenization and lookup in one pass
+        with metrics_registry.stage('vectorize'):
+            return fused_vectorizer.transform(input_resumes)
+    cleaned = [cleanResume(text) for text in input_resumes]
+    with metrics_registry.stage('tfidf_transform'):
+        return tfidf.transform(cleaned)
+
+# YOUR EXISTING PREDICTION FUNCTION (sparse end to end unless INFERENCE_MODE=dense)
 def pred(input_resume):
-    cleaned_text = cleanResume(input_resume)
-    vectorized_text = tfidf.transform([cleaned_text])
-    vectorized_text = vectorized_text.toarray()
-    predicted_category = svc_model.predict(vectorized_text)
+    vectorized_text = vectorize([input_resume])
+    predicted_category = predict_vectors(vectorized_text)
     predicted_category_name = le.inverse_transform(predicted_category)
     return predicted_category_name[0]
 
+def pred_batch(input_resumes):
+    """Predict categories for a list of resumes with one transform and one predict per chunk"""
+    categories = []
+    for start in range(0, len(input_resumes), BATCH_CHUNK_SIZE):
+        vectorized_texts = vectorize(input_resumes[start:start + BATCH_CHUNK_SIZE])
+        predicted_categories = predict_vectors(vectorized_texts)
+        categories.extend(le.inverse_transform(predicted_categories))
+    return categories
+
+def pred_batch_fast(input_resumes, tier):
+    """
+    Predict categories with the fast tier; with tier "auto", resumes whose fast-tier
+    margin is below FAST_TIER_MARGIN are rescored by the SVC
+    """
+    top_two_margin = timed_import('progressive').top_two_margin
+    last_argmax = timed_import('engine').last_argmax
+    categories = []
+    for start in range(0, len(input_resumes), BATCH_CHUNK_SIZE):
+        vectorized_texts = vectorize(input_resumes[start:start + BATCH_CHUNK_SIZE])
+        with metrics_registry.stage('fast_tier'):
+            scores = fast_tier.decision_function(vectorized_texts)
+        predicted_categories = fast_tier.classes_[last_argmax(scores)]
+        escalated = []
+        if tier == 'auto':
+            escalated = (top_two_margin(scores) < FAST_TIER_MARGIN).nonzero()[0]
+            if len(escalated):
+                predicted_categories[escalated] = predict_vectors(vectorized_texts[escalated])
+        fast_tier_counts["fast"] += len(predicted_categories) - len(escalated)
+        fast_tier_counts["escalated"] += len(escalated)
+        categories.extend(le.inverse_transform(predicted_categories))
+    return categories
+
+def predict_tier(input_resumes, tier):
+    if tier == 'accurate':
+        return pred_batch(input_resumes)
+    return pred_batch_fast(input_resumes, tier)
+
+def class_scores(input_resumes, class_column):
+    """Decision score for one class column and the predicted label index of each resume"""
+    scores = decision_scores(vectorize(input_resumes))
+    classes = engine.classes_ if engine is not None else svc_model.classes_
+    return scores[:, class_column], classes[timed_import('engine').last_argmax(scores)]
+
+def near_duplicates(input_resumes):
+    """Position of each resume's representative: the earlier resume it near-duplicates, or itself"""
+    dedup = timed_import('dedup')
+    hasher = dedup.MinHasher(DEDUP_NUM_PERM, DEDUP_SHINGLE_SIZE)
+    with metrics_registry.stage('dedup'):
+        return dedup.collapse_duplicates(input_resumes, hasher, DEDUP_THRESHOLD)
+
+def search_similar(resume_text, k):
+    return similarity_index.search(vectorize([resume_text]), k)
+
+def index_documents(doc_ids, texts):
+    """Add (or replace) documents in the similarity index; returns how many were replaced (saved by similarity_sync_loop)"""
+    return similarity_index.add(doc_ids, vectorize(texts))
+
+def unindex_documents(doc_ids):
+    return similarity_index.remove(doc_ids)
+
+def counting_vectorizer():
+    """
+    Vectorizer mapping text to vocabulary indices and term counts to TF-IDF rows, for progressive
+    scoring: the fused vectorizer (raw text), or an array vectorizer (cleaned text)
+    """
+    global term_counter
+    if term_counter is None:
+        if fused_vectorizer is not None or hasattr(tfidf, 'transform_counts'):
+            term_counter = fused_vectorizer or tfidf
+        else:
+            term_counter = timed_import('model_store').ArrayTfidfVectorizer.from_vectorizer(tfidf)
+    return term_counter
+
+def classify_chunks(chunks, initial_words=PROGRESSIVE_INITIAL_WORDS, min_margin=PROGRESSIVE_MARGIN):
+    """Progressive classification of text chunks; returns the label index and how much was read"""
+    vectorizer = counting_vectorizer()
+    if vectorizer is fused_vectorizer:
+        term_ids = vectorizer.feature_ids
+    else:
+        term_ids = lambda text: vectorizer.feature_ids(cleanResume(text))
+    classes = engine.classes_ if engine is not None else svc_model.classes_
+    return timed_import('progressive').classify_progressive(
+        chunks, term_ids, lambda counts: decision_scores(vectorizer.transform_counts(counts)),
+        vectorizer.n_features, classes, initial_words, min_margin, PROGRESSIVE_GROWTH, PROGRESSIVE_MAX_OVERHEAD)
+
+def pred_progressive(source):
+    """
+    Classify an upload from as few of its pages as needed (see progressive.py).
+    Returns the category and how much of the document was read.
+    """
+    # Extraction is interleaved with scoring, so the whole loop is one stage
+    with metrics_registry.stage('progressive'):
+        result = classify_chunks(iter_text_chunks(source))
+    category = le.inverse_transform([result.pop("label")])[0]
+    result["margin"] = round(result["margin"], 4)
+    return category, result
+
+extraction_pool = BoundedExecutor('extraction', EXTRACTION_POOL, EXTRACTION_WORKERS, EXTRACTION_QUEUE)
+inference_pool = BoundedExecutor('inference', INFERENCE_POOL, INFERENCE_WORKERS, INFERENCE_QUEUE)
+
+batcher = MicroBatcher(pred_batch, MICROBATCH_WINDOW_MS, MICROBATCH_MAX_SIZE, runner=inference_pool.run) if MICROBATCH_ENABLED else None
+
+def set_request_tracing(enabled):
+    """Turn the slow request log on or off, with the stage hook and context copying it needs"""
+    slow_request_log.configure(enabled=enabled)
+    metrics_registry.stage_listener = trace_stage if enabled else None
+    extraction_pool.copy_context = inference_pool.copy_context = enabled
+
+if SLOW_REQUEST_LOG:
+    set_request_tracing(True)
+
+async def upload_source(uploaded_file):
+    """The spooled file of an upload, or its bytes when extraction runs on a process pool"""
+    if extraction_pool.kind == 'process':
+        # Open files cannot be sent to a worker process, so process pools get the bytes
+        return await uploaded_file.read()
+    return uploaded_file.file
+
+async def extract_upload(uploaded_file):
+    """Extract an upload's text on the extraction pool straight from its spooled file (cached by content)"""
+    source = await upload_source(uploaded_file)
+    extract = partial(extraction_pool.run, extract_text, source)
+    if upload_cache is None:
+        return await extract()
+    # Hash off the event loop: the file may be large and spooled to disk
+    key = await extraction_pool.run(upload_digest, source)
+    return await upload_cache.get_or_compute(key, extract)
+
+async def classify_upload_progressive(uploaded_file):
+    """Progressive extraction + classification of an upload on the extraction pool (cached by content)"""
+    source = await upload_source(uploaded_file)
+    classify_progressive = partial(extraction_pool.run, pred_progressive, source)
+    if prediction_cache is None:
+        return await classify_progressive()
+    # The prediction comes from a prefix of the text, so it is keyed by the upload, not its full text
+    key = content_key('progressive', await extraction_pool.run(upload_digest, source))
+    return await prediction_cache.get_or_compute(key, classify_progressive)
+
+async def predict_uncached(resume_text, tier='accurate'):
+    """Predict one resume off the event loop, sharing a vectorized batch with concurrent callers when enabled"""
+    if tier != 'accurate':
+        return (await inference_pool.run(pred_batch_fast, [resume_text], tier))[0]
+    if batcher is not None:
+        return await batcher.submit(resume_text)
+    return await inference_pool.run(pred, resume_text)
+
+def prediction_keys(resume_texts, tier):
+    """
+    Prediction cache keys of resume texts (and the tier, unless it is the SVC). The raw
+    text is hashed: cleaning it here as well would normalize every cache miss twice.
+    """
+    if tier == 'accurate':
+        return [content_key(text) for text in resume_texts]
+    return [content_key(tier, text) for text in resume_texts]
+
+async def prediction_keys_off_loop(resume_texts, tier):
+    """prediction_keys(), on a thread when the texts are long enough to hold up the event loop"""
+    if sum(map(len, resume_texts)) <= INLINE_KEY_CHARS:
+        return prediction_keys(resume_texts, tier)
+    return await asyncio.get_running_loop().run_in_executor(None, prediction_keys, resume_texts, tier)
+
+async def classify(resume_text, tier='accurate'):
+    """Predict one resume, reusing the cached or in-flight prediction for the same text"""
+    if prediction_cache is None:
+        return await predict_uncached(resume_text, tier)
+    key, = await prediction_keys_off_loop([resume_text], tier)
+    return await prediction_cache.get_or_compute(key, partial(predict_uncached, resume_text, tier))
+
+async def classify_batch(resume_texts, tier='accurate'):
+    """Predict many resumes: cached predictions are reused and the rest are scored with one batch call"""
+    if prediction_cache is None:
+        return await inference_pool.run(predict_tier, resume_texts, tier)
+    version = prediction_cache.version
+    keys = await prediction_keys_off_loop(resume_texts, tier)
+    categories = [None] * len(resume_texts)
+    missing = []
+    for i, key in enumerate(keys):
+        found, category = prediction_cache.get(key)
+        if found:
+            categories[i] = category
+        else:
+            missing.append(i)
+    if missing:
+        predicted = await inference_pool.run(predict_tier, [resume_texts[i] for i in missing], tier)
+        for i, category in zip(missing, predicted):
+            categories[i] = category
+            if prediction_cache.version == version:
+                prediction_cache.put(keys[i], category)
+    return categories
+
+async def require_models():
+    """Wait for a background model load to finish, then fail the request if the models did not load"""
+    deadline = time.perf_counter() + MODEL_LOAD_WAIT_S
+    while not models_ready.is_set():
+        if time.perf_counter() >= deadline:
+            raise HTTPException(status_code=503, detail="Models are still loading", headers={"Retry-After": "5"})
+        await asyncio.sleep(0.05)
+    if model_load_error:
+        raise HTTPException(status_code=500, detail=f"Model not loaded: {model_load_error}")
+
+def resolve_tier(tier):
+    """The requested model tier (DEFAULT_TIER if none), checked against the loaded models"""
+    tier = (tier or DEFAULT_TIER).lower()
+    if tier not in TIERS:
+        raise HTTPException(status_code=422, detail=f"Unknown tier {tier!r} (expected one of {', '.join(TIERS)})")
+    if tier != 'accurate' and fast_tier is None:
+        raise HTTPException(status_code=503, detail="Fast tier not loaded (build it with python fast_tier.py build)")
+    return tier
+
+def pool_saturated(e):
+    return HTTPException(status_code=503, detail=f"Server busy: {str(e)}", headers={"Retry-After": "1"})
+
 # API Endpoints
 @app.post("/predict")
-async def predict_resume(file: UploadFile = File(...)):
+async def predict_resume(file: UploadFile = File(...), tier: str = Query(None)):
     """Upload resume file and get predicted category"""
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
-        # Extract text from uploaded file
-        resume_text = handle_file_upload(file)
-        
-        if model_load_error:
-            raise HTTPException(status_code=500, detail=f"Model not loaded: {model_load_error}")
-        
-        # Predict category (your exact logic)
-        category = pred(resume_text)
-        processing_time = (time.time() - start_time) * 1000
+        progress = None
+        if PROGRESSIVE_ENABLED and (tier or DEFAULT_TIER).lower() == 'accurate':
+            await require_models()
+            tier = resolve_tier(tier)
+            category, progress = await classify_upload_progressive(file)
+        else:
+            # Extract text from uploaded file
+            resume_text = await extract_upload(file)
+
+            await require_models()
+            tier = resolve_tier(tier)
+
+            # Predict category (your exact logic)
+            category = await classify(resume_text, tier)
+        processing_time = (time.perf_counter() - start_time) * 1000
         
-        return {
+        response = {
             "category": category,
+            "tier": tier,
             "processing_time_ms": round(processing_time, 2),
             "message": "Resume analyzed successfully"
         }
+        if progress is not None:
+            response["progressive"] = progress
+        return response
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    except PdfLimitError as e:
+        raise HTTPException(status_code=413, detail=f"Document too large: {str(e)}")
+    except UnsupportedFileType as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
@@ -110,32 +792,368 @@ class TextRequest(BaseModel):
     resume_text: str
 
 @app.post("/predict/text")
-async def predict_resume_text(request: TextRequest):
-    start_time = time.time()
+async def predict_resume_text(request: TextRequest, tier: str = Query(None)):
+    start_time = time.perf_counter()
     try:
-        if model_load_error:
-            raise HTTPException(status_code=500, detail=f"Model not loaded: {model_load_error}")
+        await require_models()
+        tier = resolve_tier(tier)
 
-        category = pred(request.resume_text)
-        processing_time = (time.time() - start_time) * 1000
+        category = await classify(request.resume_text, tier)
+        processing_time = (time.perf_counter() - start_time) * 1000
         
         return {
             "category": category,
+            "tier": tier,
             "processing_time_ms": round(processing_time, 2),
             "message": "Text analyzed successfully"
         }
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+class BatchTextRequest(BaseModel):
+    resume_texts: List[str]
+
+async def read_batch_items(request: Request):
+    """Read batch items in input order from a JSON body or a multipart form"""
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        items = []
+        for key, value in form.multi_items():
+            if key == 'files' and hasattr(value, 'filename'):
+                items.append(value)
+            elif key == 'resume_texts' and isinstance(value, str):
+                items.append(value)
+        return items
+
+    try:
+        body = BatchTextRequest(**await request.json())
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch request: {str(e)}")
+    return list(body.resume_texts)
+
+@app.post("/predict/batch")
+async def predict_resume_batch(request: Request, tier: str = Query(None)):
+    """Classify many resumes at once: JSON {"resume_texts": [...]} or multipart resume_texts/files fields"""
+    start_time = time.perf_counter()
+    items = await read_batch_items(request)
+
+    if not items:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(items)} items (max {MAX_BATCH_SIZE})")
+    await require_models()
+    tier = resolve_tier(tier)
+
+    # At most one file per extraction worker in flight: more would only wait in the pool's
+    # queue, and a batch larger than the pool's capacity would be rejected by its own files
+    extracting = asyncio.Semaphore(extraction_pool.max_workers)
+
+    async def extract_item(item):
+        if isinstance(item, str):
+            return item
+        async with extracting:
+            return await extract_upload(item)
+
+    extracted = await asyncio.gather(*(extract_item(item) for item in items), return_exceptions=True)
+
+    results = []
+    texts, text_positions = [], []
+    for index, (item, resume_text) in enumerate(zip(items, extracted)):
+        if isinstance(item, str):
+            result = {"index": index, "source": "text"}
+        else:
+            result = {"index": index, "source": "file", "filename": item.filename}
+        results.append(result)
+        if isinstance(resume_text, PoolSaturatedError):
+            raise pool_saturated(resume_text)
+        if isinstance(resume_text, Exception):
+            result["error"] = f"Extraction failed: {str(resume_text)}"
+            # What /predict would have answered for this file alone
+            result["status"] = extraction_error_status(resume_text)
+            continue
+        texts.append(resume_text)
+        text_positions.append(index)
+
+    try:
+        if texts:
+            representatives = list(range(len(texts)))
+            if DEDUP_MODE in ('flag', 'collapse'):
+                representatives = await inference_pool.run(near_duplicates, texts)
+                for i, representative in enumerate(representatives):
+                    if representative != i:
+                        results[text_positions[i]]["duplicate_of"] = text_positions[representative]
+            if DEDUP_MODE == 'collapse':
+                unique = sorted(set(representatives))
+                unique_categories = dict(zip(unique, await classify_batch([texts[i] for i in unique], tier)))
+                categories = [unique_categories[representative] for representative in representatives]
+            else:
+                categories = await classify_batch(texts, tier)
+            for index, category in zip(text_positions, categories):
+                results[index]["category"] = category
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+    processing_time = (time.perf_counter() - start_time) * 1000
+    return {
+        "results": results,
+        "count": len(items),
+        "succeeded": len(texts),
+        "failed": len(items) - len(texts),
+        "tier": tier,
+        **({"duplicates": sum(1 for result in results if "duplicate_of" in result)} if DEDUP_MODE in ('flag', 'collapse') else {}),
+        "processing_time_ms": round(processing_time, 2),
+        "throughput_docs_per_sec": round(len(items) / max(processing_time / 1000, 1e-9), 2),
+        "message": "Batch analyzed successfully"
+    }
+
+async def read_json_pool(request: Request):
+    """(id, text) pairs of a JSON {"resume_texts": [...]} body no larger than MAX_BATCH_UPLOAD_BYTES"""
+    body = bytearray()
+    async for data in request.stream():
+        body += data
+        if len(body) > MAX_BATCH_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"JSON pool too large (max {MAX_BATCH_UPLOAD_BYTES} bytes); send it as NDJSON")
+    try:
+        pool = BatchTextRequest(**json.loads(body))
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid rank request: {str(e)}")
+    for text in pool.resume_texts:
+        yield None, text
+
+async def aiter_sync(items):
+    for item in items:
+        yield item
+
+async def rank_pool(items, class_column, k):
+    """Score an async iterator of (id, text) in RANK_CHUNK_SIZE batches on the inference pool, keeping the k best"""
+    top = TopK(k)
+    ids, texts = [], []
+    async for item_id, text in items:
+        ids.append(item_id)
+        texts.append(text)
+        if len(texts) == RANK_CHUNK_SIZE:
+            scores, predicted = await inference_pool.run(class_scores, texts, class_column)
+            top.push_many(scores, ids, predicted)
+            ids, texts = [], []
+    if texts:
+        scores, predicted = await inference_pool.run(class_scores, texts, class_column)
+        top.push_many(scores, ids, predicted)
+    return top
+
+@app.post("/rank")
+async def rank_resumes(request: Request, category: str = Query(...), k: int = Query(10, ge=1), corpus: str = Query(None)):
+    """
+    The k resumes of a pool with the highest decision score for one category. The pool is a
+    JSON {"resume_texts": [...]} body, an NDJSON body (one JSON string or {"id": ..., "text": ...}
+    per line) or ?corpus=<file in RANK_CORPUS_DIR>
+    """
+    start_time = time.perf_counter()
+    if k > RANK_MAX_K:
+        raise HTTPException(status_code=422, detail=f"k too large: {k} (max {RANK_MAX_K})")
+    await require_models()
+    if category not in le.classes_:
+        raise HTTPException(status_code=422, detail=f"Unknown category: {category!r}")
+    classes = engine.classes_ if engine is not None else svc_model.classes_
+    # Label index from classes_ (model_store.ArrayLabelEncoder has no transform())
+    class_column = list(classes).index(list(le.classes_).index(category))
+
+    if corpus is not None:
+        path = corpus_path(RANK_CORPUS_DIR, corpus)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Unknown corpus: {corpus!r}")
+        items = aiter_sync(iter_corpus(path))
+    elif request.headers.get('content-type', '').startswith(('application/x-ndjson', 'application/jsonl')):
+        items = aiter_ndjson(request.stream())
+    else:
+        items = read_json_pool(request)
+
+    try:
+        top = await rank_pool(items, class_column, k)
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid pool item: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ranking failed: {str(e)}")
+
+    ranked = top.results()
+    predicted = le.inverse_transform([label for _, _, _, label in ranked]) if ranked else []
+    processing_time = (time.perf_counter() - start_time) * 1000
+    return {
+        "category": category,
+        "k": k,
+        "pool_size": top.seen,
+        "results": [
+            {"rank": rank, "index": index, "id": item_id, "score": round(score, 4), "predicted_category": predicted_category}
+            for rank, ((index, item_id, score, _), predicted_category) in enumerate(zip(ranked, predicted), start=1)
+        ],
+        "processing_time_ms": round(processing_time, 2),
+        "throughput_docs_per_sec": round(top.seen / max(processing_time / 1000, 1e-9), 2),
+        "message": "Pool ranked successfully"
+    }
+
+async def run_on_index(fn, *args):
+    """Similarity index work runs in this process: forked inference workers would not see index updates"""
+    if inference_pool.kind == 'process':
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    return await inference_pool.run(fn, *args)
+
+@app.post("/similar")
+async def similar_resumes(request: TextRequest, k: int = Query(10, ge=1)):
+    """The k indexed resumes most similar (cosine over TF-IDF) to a resume text"""
+    start_time = time.perf_counter()
+    if k > SIMILARITY_MAX_K:
+        raise HTTPException(status_code=422, detail=f"k too large: {k} (max {SIMILARITY_MAX_K})")
+    await require_models()
+    try:
+        found = await run_on_index(search_similar, request.resume_text, k)
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    processing_time = (time.perf_counter() - start_time) * 1000
+    return {
+        "results": [{"rank": rank, "id": doc_id, "score": round(score, 4)} for rank, (doc_id, score) in enumerate(found, start=1)],
+        "index_size": len(similarity_index),
+        "processing_time_ms": round(processing_time, 2),
+        "message": "Similar resumes found"
+    }
+
+class IndexDocument(BaseModel):
+    id: str
+    text: str
+
+class IndexRequest(BaseModel):
+    documents: List[IndexDocument]
+
+@app.post("/similar/documents")
+async def add_similar_documents(request: IndexRequest):
+    """Add resumes to the similarity index; an existing id is replaced"""
+    if not request.documents:
+        raise HTTPException(status_code=422, detail="No documents")
+    await require_models()
+    try:
+        replaced = await run_on_index(index_documents, [doc.id for doc in request.documents], [doc.text for doc in request.documents])
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid documents: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
+    return {"added": len(request.documents), "replaced": replaced, "index_size": len(similarity_index)}
+
+@app.delete("/similar/documents/{doc_id}")
+async def remove_similar_document(doc_id: str):
+    """Remove a resume from the similarity index"""
+    await require_models()
+    try:
+        removed = await run_on_index(unindex_documents, [doc_id])
+    except PoolSaturatedError as e:
+        raise pool_saturated(e)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Document not indexed: {doc_id!r}")
+    return {"removed": doc_id, "index_size": len(similarity_index)}
+
 @app.get("/health")
 async def health_check():
+    if not models_ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "loading", "startup_mode": STARTUP_MODE})
     if model_load_error:
         return {"status": "unhealthy", "error": model_load_error}
     return {"status": "healthy", "model": "loaded"}
 
+@app.get("/stats")
+async def stats():
+    """Runtime counters of the serving subsystems"""
+    return {
+        "batching": batcher.stats() if batcher is not None else {"enabled": False},
+        "executors": {
+            "extraction": extraction_pool.stats(),
+            "inference": inference_pool.stats(),
+        },
+        "cache": {
+            "predictions": prediction_cache.stats() if prediction_cache is not None else {"enabled": False},
+            "uploads": upload_cache.stats() if upload_cache is not None else {"enabled": False},
+        },
+        "similarity_index": similarity_index.stats() if similarity_index is not None else {"loaded": False},
+        "fast_tier": dict(fast_tier_counts, loaded=True, default_tier=DEFAULT_TIER, margin=FAST_TIER_MARGIN)
+                     if fast_tier is not None else {"loaded": False, "default_tier": DEFAULT_TIER},
+        "engine": {"inference_mode": INFERENCE_MODE, "precision": getattr(engine, 'precision', None),
+                   "precision_check": precision_check},
+        "worker": dict(timed_import('model_store').worker_memory(), model_format=MODEL_FORMAT, model_version=model_version),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of every worker process (see metrics.py)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+def require_debug_endpoints():
+    if not DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Debug endpoints are disabled (DEBUG_ENDPOINTS=0)")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(seconds: float = Query(10, gt=0), rate_hz: float = Query(100, gt=0)):
+    """Stacks of every thread sampled for `seconds`, in the collapsed format of flamegraph.pl / speedscope"""
+    require_debug_endpoints()
+    if seconds > PROFILE_MAX_S or rate_hz > PROFILE_MAX_RATE_HZ:
+        raise HTTPException(status_code=422, detail=f"At most {PROFILE_MAX_S} seconds at {PROFILE_MAX_RATE_HZ} Hz")
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        stacks, rounds = await asyncio.get_running_loop().run_in_executor(None, sample_stacks, seconds, rate_hz)
+    finally:
+        profile_lock.release()
+    return PlainTextResponse(collapsed(stacks), headers={"X-Profile-Rounds": str(rounds), "X-Profile-Pid": str(os.getpid())})
+
+@app.post("/debug/slow-requests")
+async def configure_slow_requests(enabled: bool = Query(None), threshold_ms: float = Query(None, ge=0),
+                                  capacity: int = Query(None, ge=1), clear: bool = Query(False)):
+    """Switch the slow request log on or off, change its threshold / capacity or clear it"""
+    require_debug_endpoints()
+    slow_request_log.configure(threshold_ms=threshold_ms, capacity=capacity)
+    if enabled is not None:
+        set_request_tracing(enabled)
+    if clear:
+        slow_request_log.clear()
+    return slow_request_log.stats()
+
+@app.get("/debug/slow-requests")
+async def slow_requests():
+    """Requests slower than the threshold since the log was enabled, oldest first"""
+    require_debug_endpoints()
+    return dict(slow_request_log.stats(), requests=slow_request_log.entries())
+
+@app.get("/startup")
+async def startup():
+    """Startup timeline: time spent importing each module and loading the models"""
+    return {
+        "startup_mode": STARTUP_MODE,
+        "model_format": MODEL_FORMAT,
+        "model_version": model_version,
+        "ready": models_ready.is_set(),
+        "ready_at_ms": models_ready_at_ms,
+        "model_load_ms": model_load_ms,
+        "error": model_load_error,
+        "timeline": list(startup_timeline),
+    }
+
 @app.get("/ping")
 async def ping():
     return {"status": "pong", "runtime": "aws-lambda"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,144 @@
+"""
+Adaptive micro-batching of concurrent single-item predictions.
+
+Requests that arrive while a batch is being scored are queued and scored
+together as soon as that batch finishes, the batching window elapses or the
+queue reaches the maximum batch size. A request that arrives while the batcher
+is idle is dispatched on the next event-loop tick, so a lightly loaded server
+pays no extra latency.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _predict_outcomes(predict_batch, items):
+    """(result, error) per item; a failing batch is rescored item by item so one bad input cannot fail its neighbours"""
+    try:
+        return [(result, None) for result in predict_batch(items)]
+    except Exception:
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((predict_batch([item])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls to a batch prediction function.
+
+    Args:
+        predict_batch: Callable taking a list of items and returning a list of
+            results in the same order. It runs off the event loop.
+        window_ms: Longest time a queued request waits for a busy batcher
+        max_batch_size: Most items scored in one call to predict_batch
+        runner: Coroutine function runner(fn, *args) that executes fn off the
+            event loop, e.g. BoundedExecutor.run (defaults to one dedicated thread)
+    """
+
+    def __init__(self, predict_batch, window_ms=5.0, max_batch_size=32, runner=None):
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.runner = runner or self._thread_runner()
+
+        self._pending = []
+        self._scheduled = None
+        self._in_flight = 0
+
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+        self._flush_reasons = {'idle': 0, 'size': 0, 'window': 0, 'drain': 0}
+        self._size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def submit(self, item):
+        """Queue one item and wait for its own result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop, 'size')
+        elif self._scheduled is None:
+            if self._in_flight == 0:
+                self._scheduled = loop.call_soon(self._flush, loop, 'idle')
+            else:
+                self._scheduled = loop.call_later(self.window, self._flush, loop, 'window')
+        return await future
+
+    def _flush(self, loop, reason):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            self._record(len(batch), reason)
+            self._in_flight += 1
+            loop.create_task(self._run(loop, batch))
+
+    async def _run(self, loop, batch):
+        items = [item for item, _ in batch]
+        try:
+            outcomes = await self.runner(partial(_predict_outcomes, self.predict_batch), items)
+        except Exception as e:
+            # The runner itself failed (e.g. its pool is saturated): every caller gets the error
+            outcomes = [(None, e)] * len(batch)
+        finally:
+            self._in_flight -= 1
+            if self._pending and self._scheduled is None:
+                self._flush(loop, 'drain')
+
+        for (_, future), (result, error) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _thread_runner():
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='microbatch')
+
+        async def run(fn, *args):
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        return run
+
+    def _record(self, size, reason):
+        self._batches += 1
+        self._items += size
+        self._max_seen = max(self._max_seen, size)
+        self._flush_reasons[reason] += 1
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self._size_histogram[i] += 1
+                break
+        else:
+            self._size_histogram[-1] += 1
+
+    def stats(self):
+        """Batch size metrics since startup"""
+        histogram = {f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self._size_histogram)}
+        histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self._size_histogram[-1]
+        return {
+            "enabled": True,
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "max_batch_size_seen": self._max_seen,
+            "pending": len(self._pending),
+            "in_flight": self._in_flight,
+            "flush_reasons": dict(self._flush_reasons),
+            "batch_size_histogram": histogram,
+        }
@@ -0,0 +1,242 @@
+"""
+Offline bulk classification of a resume archive.
+
+Reclassifying the whole archive after a model refresh does not need the HTTP
+API: this tool reads a directory of PDF / DOCX / TXT files (the format is
+sniffed from the content, as for uploads) or a corpus file (CSV with a Resume
+column, or NDJSON, as read by /rank), and sends the inputs in chunks to a pool
+of worker processes. Workers are forked after app.py has loaded the models, so
+they share them, and each chunk is extracted file by file (extract_text, which
+handle_file_upload wraps) and classified with one pred_batch() call.
+
+Results are written in input order to JSONL or CSV. After every chunk the
+output is flushed and a checkpoint (OUTPUT.checkpoint) records how many inputs
+are done and the output size at that point, so a killed run started again with
+the same arguments truncates the partial chunk and resumes after the last
+completed one. A progress line shows docs/s; the slowest files are listed at
+the end.
+
+Usage:
+    python bulk.py INPUT OUTPUT [--workers N] [--chunk-size N] [--format jsonl|csv] [--dedup] [--restart]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import heapq
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Parallelism comes from the worker processes; don't fork page workers inside them
+os.environ.setdefault('PDF_PAGE_WORKERS', '1')
+# Load the models on import: forking while the lazy loader thread runs leaves the workers without them
+os.environ['STARTUP_MODE'] = 'eager'
+
+FILE_EXTENSIONS = ('.pdf', '.docx', '.txt')
+CSV_FIELDS = ['id', 'category', 'duplicate_of', 'error', 'extract_ms']
+SLOWEST = 10
+
+
+def iter_inputs(input_path):
+    """(id, path, text) per input: files of a directory by relative path, or the rows of a corpus file"""
+    from ranking import iter_corpus
+
+    if os.path.isdir(input_path):
+        for directory, subdirectories, filenames in os.walk(input_path):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(FILE_EXTENSIONS):
+                    path = os.path.join(directory, filename)
+                    yield os.path.relpath(path, input_path), path, None
+    else:
+        for row_number, (item_id, text) in enumerate(iter_corpus(input_path)):
+            yield str(item_id) if item_id is not None else str(row_number), None, text
+
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def classify_chunk(chunk, dedup):
+    """One result dict per (id, path, text) input, in order; runs in a worker process"""
+    import app
+
+    results, texts, positions = [], [], []
+    for item_id, path, text in chunk:
+        result = {"id": item_id}
+        results.append(result)
+        start_time = time.perf_counter()
+        try:
+            if path is not None:
+                with open(path, 'rb') as f:
+                    text = app.extract_text(f)
+            texts.append(text)
+            positions.append(len(results) - 1)
+        except Exception as e:
+            result["error"] = f"Extraction failed: {str(e)}"
+        result["extract_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+
+    if texts:
+        representatives = app.near_duplicates(texts) if dedup else list(range(len(texts)))
+        unique = sorted(set(representatives))
+        try:
+            unique_categories = dict(zip(unique, app.pred_batch([texts[i] for i in unique])))
+        except Exception as e:
+            for position in positions:
+                results[position]["error"] = f"Prediction failed: {str(e)}"
+            return results
+        for i, representative in enumerate(representatives):
+            result = results[positions[i]]
+            result["category"] = unique_categories[representative]
+            if representative != i:
+                result["duplicate_of"] = results[positions[representative]]["id"]
+    return results
+
+
+class ResultWriter:
+    """JSONL or CSV results file that can be truncated back to a checkpointed size"""
+
+    def __init__(self, path, output_format, offset):
+        mode = 'r+' if offset else 'w'
+        self._file = open(path, mode, newline='', encoding='utf-8')
+        self._file.seek(offset)
+        self._file.truncate()
+        self.output_format = output_format
+        if output_format == 'csv':
+            self._csv = csv.DictWriter(self._file, CSV_FIELDS, extrasaction='ignore')
+            if not offset:
+                self._csv.writeheader()
+
+    def write(self, results):
+        for result in results:
+            if self.output_format == 'csv':
+                self._csv.writerow(result)
+            else:
+                self._file.write(json.dumps(result) + '\n')
+
+    def commit(self):
+        """Flush to disk; returns the output size"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+def read_checkpoint(checkpoint_path):
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(checkpoint_path, checkpoint):
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def run(input_path, output_path, workers, chunk_size, output_format, dedup, restart):
+    import app
+
+    app.models_ready.wait()
+    if app.model_load_error:
+        sys.exit(f"Models failed to load: {app.model_load_error}")
+    checkpoint_path = output_path + '.checkpoint'
+    checkpoint = None if restart else read_checkpoint(checkpoint_path)
+    run_settings = {"input": os.path.abspath(input_path), "format": output_format, "dedup": dedup,
+                    "chunk_size": chunk_size, "model_version": app.model_version}
+    if checkpoint is not None:
+        changed = [key for key, value in run_settings.items() if checkpoint.get(key) != value]
+        if changed:
+            sys.exit(f"{checkpoint_path} was written with different {', '.join(changed)}; use --restart to start over")
+        if checkpoint.get('complete'):
+            print(f"{output_path} is complete ({checkpoint['done']} inputs); use --restart to start over")
+            return
+        print(f"Resuming after {checkpoint['done']} inputs")
+    done = checkpoint['done'] if checkpoint else 0
+    offset = checkpoint['offset'] if checkpoint else 0
+    errors = checkpoint.get('errors', 0) if checkpoint else 0
+
+    items = iter_inputs(input_path)
+    for _ in range(done):
+        next(items, None)
+    writer = ResultWriter(output_path, output_format, offset)
+    slowest = []
+    start_time, started_at = time.perf_counter(), done
+    # fork so workers inherit the models loaded by the parent
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+        pending = []
+        chunks = iter_chunks(items, chunk_size)
+        try:
+            while True:
+                # Bounded window of chunks in flight, collected in input order
+                while len(pending) < 2 * workers:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(pool.submit(classify_chunk, chunk, dedup))
+                if not pending:
+                    break
+                results = pending.pop(0).result()
+                writer.write(results)
+                done += len(results)
+                errors += sum(1 for result in results if 'error' in result)
+                for result in results:
+                    heapq.heappush(slowest, (result['extract_ms'], result['id']))
+                    if len(slowest) > SLOWEST:
+                        heapq.heappop(slowest)
+                write_checkpoint(checkpoint_path, {**run_settings, "done": done, "offset": writer.commit(), "errors": errors})
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{done} done  {(done - started_at) / max(elapsed, 1e-9):8.1f} docs/s  {errors} errors",
+                      end='', file=sys.stderr, flush=True)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            print(f"\nInterrupted after {done} inputs; run the same command again to resume", file=sys.stderr)
+            writer.close()
+            sys.exit(130)
+    writer.close()
+    write_checkpoint(checkpoint_path, {**run_settings, "done": done, "offset": os.path.getsize(output_path),
+                                       "errors": errors, "complete": True})
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nClassified {done - started_at} inputs in {elapsed:.2f}s "
+          f"({(done - started_at) / max(elapsed, 1e-9):.1f} docs/s, {errors} errors in total) -> {output_path}")
+    if slowest and os.path.isdir(input_path):
+        print("Slowest files (extraction):")
+        for extract_ms, item_id in sorted(slowest, reverse=True):
+            print(f"  {extract_ms:10.1f} ms  {item_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a directory of resume files or a resume corpus file")
+    parser.add_argument('input', help="Directory of PDF / DOCX / TXT files, or a CSV (Resume column) / NDJSON corpus")
+    parser.add_argument('output', help="Results file (.jsonl or .csv); OUTPUT.checkpoint tracks progress")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Inputs per chunk sent to a worker (default: 64)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="Output format (default: from the output extension)")
+    parser.add_argument('--dedup', action='store_true', help="Classify one representative per group of near duplicates in each chunk")
+    parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        sys.exit(f"No such input: {args.input}")
+    output_format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    run(args.input, args.output, max(1, args.workers), max(1, args.chunk_size), output_format, args.dedup, args.restart)
+
+
+if __name__ == "__main__":
+    main()
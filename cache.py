@@ -0,0 +1,169 @@
+"""
+Content-addressed caches with single-flight deduplication.
+
+Recruiters re-upload the same resume and load tests replay the same texts, so
+the API caches extracted text by a hash of the upload bytes and predictions by
+a hash of the raw resume text (not the cleaned text, so texts that differ only
+in whitespace, URLs or punctuation are separate entries). A request for a key
+that is already being computed awaits the same task instead of computing it
+again. Entries expire after a TTL, the least recently used entry is evicted
+when a cache holds too many entries (or, with max_bytes, too many bytes of
+values), and entries are dropped when the version of the cached values (the
+model) changes.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from functools import partial
+
+
+def content_key(*parts):
+    """SHA-256 hex digest of bytes / str parts (length-prefixed, so parts cannot run together)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8', 'surrogatepass')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def files_version(paths):
+    """Version tag of a set of files from their names, sizes and modification times"""
+    parts = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return content_key(*parts)[:16]
+
+
+class SingleFlightCache:
+    """
+    Bounded LRU + TTL cache whose misses are computed once per key.
+
+    Used from the event loop only, so no locking is needed.
+
+    Args:
+        name: Cache name used in stats
+        max_entries: Most entries kept; the least recently used is evicted first
+        ttl_s: Seconds an entry stays valid (0 disables expiry)
+        version: Version of the cached values; set_version() with a new one drops every entry
+        max_bytes: Most bytes of values kept (sys.getsizeof; 0 for no limit); larger values are not cached
+    """
+
+    def __init__(self, name, max_entries=10000, ttl_s=3600.0, version=None, max_bytes=0):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_s)
+        self.version = version
+        self.max_bytes = max(0, int(max_bytes))
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def set_version(self, version):
+        """Drop every entry if the version of the cached values changed"""
+        if version == self.version:
+            return
+        self._invalidations += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+        self.version = version
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value, size = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[key]
+            self._bytes -= size
+            self._expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return True, value
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss"""
+        found, value = self._lookup(key)
+        if not found:
+            self._misses += 1
+        return found, value
+
+    def put(self, key, value):
+        size = sys.getsizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[key] = (expires_at, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+    async def get_or_compute(self, key, compute):
+        """
+        Cached value for key, or the result of awaiting compute().
+
+        Concurrent callers with the same key share one computation. It runs as
+        its own task, so a cancelled caller does not cancel it for the others.
+        Failures are raised to every waiting caller and are not cached.
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            self._misses += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._finish, key, self.version))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, version, task):
+        self._in_flight.pop(key, None)
+        # Retrieving the exception here also keeps an unawaited failure from being logged
+        if task.cancelled() or task.exception() is not None:
+            return
+        if version == self.version:
+            self.put(key, task.result())
+
+    def stats(self):
+        """Hit / miss / eviction counters since startup"""
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "enabled": True,
+            "version": self.version,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            **({"bytes": self._bytes, "max_bytes": self.max_bytes} if self.max_bytes else {}),
+            "ttl_s": self.ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations,
+            "in_flight": len(self._in_flight),
+        }
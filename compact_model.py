@@ -0,0 +1,190 @@
+"""
+Vocabulary pruning for a smaller, faster serving model.
+
+tfidf.pkl is fitted with no min_df / max_df / max_features, so its
+vocabulary keeps every phone number, name and typo seen once. Each term costs
+a vocabulary_ entry in the pickle and in every worker, and a column of the
+support vectors. This tool keeps the n_features most useful terms, ranked by
+one of:
+
+- "df": document frequency over the distinct training resumes (one-off tokens
+  go first);
+- "chi2": chi-squared relevance of the term's TF-IDF weight to the category.
+
+It then refits the vectorizer on the kept vocabulary (stop_words='english', so
+IDF and L2 norms are recomputed over the kept terms) and retrains the SVC on it
+with the train.py pipeline. Remapping the existing SVC's support vectors onto
+the kept columns was not kept as an option: the rows it was trained on are
+normalized over the full vocabulary, so its decision values shift anyway.
+
+`report` compares several vocabulary sizes: pickle size, unpickling time,
+single-resume latency (fused vectorizer + compiled engine, as served),
+support vectors, accuracy on held-out distinct resumes and agreement with the
+full-vocabulary model. Resumes are split by distinct text, because the
+dataset's copies would otherwise sit on both sides of the split.
+
+Usage:
+    python compact_model.py report [sizes, e.g. 4000,2000,1000,500] [method]
+    python compact_model.py build n_features [method] [output_dir]
+"""
+
+import os
+import sys
+import time
+import pickle
+
+import numpy as np
+
+import train
+
+METHODS = ('df', 'chi2')
+REPORT_SIZES = [4000, 2000, 1000, 500, 250]
+LATENCY_RESUMES = 200
+
+
+def select_terms(cleaned_texts, labels, n_features, method='df'):
+    """
+    The n_features terms of a full TfidfVectorizer fit of cleaned_texts ranked first
+    by method (ties broken alphabetically)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    tfidf = TfidfVectorizer(**train.TFIDF_PARAMS)
+    X = tfidf.fit_transform(cleaned_texts)
+    terms = tfidf.get_feature_names_out()
+    if method == 'df':
+        # Oversampled copies of a resume count once
+        _, first_rows = np.unique(np.asarray(cleaned_texts, dtype=object), return_index=True)
+        scores = np.bincount(X[np.sort(first_rows)].indices, minlength=len(terms)).astype(np.float64)
+    elif method == 'chi2':
+        from sklearn.feature_selection import chi2
+        scores = np.nan_to_num(chi2(X, labels)[0])
+    else:
+        raise ValueError(f"Unknown method {method!r} (expected one of {', '.join(METHODS)})")
+    # terms are sorted, so a stable sort on -score keeps ties alphabetical
+    keep = np.argsort(-scores, kind='stable')[:n_features]
+    return sorted(terms[keep].tolist())
+
+
+def fit_pruned(cleaned_texts, labels, terms, seed=0):
+    """(vectorizer, OneVsRest SVC) fitted on cleaned_texts with the vocabulary restricted to terms"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    tfidf = TfidfVectorizer(vocabulary=terms, **train.TFIDF_PARAMS)
+    X = tfidf.fit_transform(cleaned_texts)
+    model = train.make_model('svc', seed)
+    model.fit(X, labels)
+    return tfidf, model
+
+
+def training_rows(categories, cleaned, subset, seed):
+    """Oversampled (cleaned texts, categories) of the rows in subset"""
+    rows = np.asarray(subset)[train.oversample([categories[i] for i in subset], seed)]
+    return [cleaned[i] for i in rows], [categories[i] for i in rows]
+
+
+def serving_profile(tfidf, model, le, texts):
+    """Pickle size, unpickling time and mean single-resume latency of a model set"""
+    from engine import CompiledOvRSVC
+    from model_store import FusedTfidfVectorizer
+
+    blobs = [pickle.dumps(obj) for obj in (model, tfidf, le)]
+    start_time = time.perf_counter()
+    for blob in blobs:
+        pickle.loads(blob)
+    load_ms = (time.perf_counter() - start_time) * 1000
+
+    vectorizer, engine = FusedTfidfVectorizer.from_vectorizer(tfidf), CompiledOvRSVC(model)
+    engine.predict(vectorizer.transform(texts[:1]))
+    start_time = time.perf_counter()
+    for text in texts:
+        engine.predict(vectorizer.transform([text]))
+    latency_ms = (time.perf_counter() - start_time) / len(texts) * 1000
+    return {
+        "features": len(tfidf.vocabulary_),
+        "pickle_mib": sum(map(len, blobs)) / 1024 / 1024,
+        "load_ms": load_ms,
+        "latency_ms": latency_ms,
+        "support_vectors": engine.n_support,
+        "predict": lambda raw_texts: engine.predict(vectorizer.transform(raw_texts)),
+    }
+
+
+def report(sizes, method, dataset_path, seed=0):
+    from sklearn.preprocessing import LabelEncoder
+
+    categories, texts = train.load_dataset(dataset_path)
+    cleaned = train.clean_corpus(texts)
+    distinct = sorted(set(texts))
+    rng = np.random.default_rng(seed)
+    held_out = set(rng.choice(distinct, len(distinct) // 5, replace=False).tolist())
+    train_subset = [i for i, text in enumerate(texts) if text not in held_out]
+    test_rows = [texts.index(text) for text in sorted(held_out)]
+    train_texts, train_labels = training_rows(categories, cleaned, train_subset, seed)
+    le = LabelEncoder().fit(categories)
+    y_train = le.transform(train_labels)
+    test_texts = [texts[i] for i in test_rows]
+    y_test = le.transform([categories[i] for i in test_rows])
+    latency_texts = [texts[i] for i in rng.choice(len(texts), LATENCY_RESUMES)]
+    print(f"{len(train_subset)} training resumes ({len(distinct) - len(held_out)} distinct, oversampled to "
+          f"{len(train_texts)}), {len(test_rows)} held-out distinct resumes; ranking by {method}")
+
+    full = None
+    print(f"\n{'features':>9} {'pickles':>9} {'unpickle':>9} {'latency':>9} {'SVs':>6} {'accuracy':>9} {'agreement':>9}")
+    for n_features in [None] + sorted(sizes, reverse=True):
+        start_time = time.perf_counter()
+        if n_features is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            tfidf = TfidfVectorizer(**train.TFIDF_PARAMS)
+            model = train.make_model('svc', seed).fit(tfidf.fit_transform(train_texts), y_train)
+        else:
+            terms = select_terms(train_texts, y_train, n_features, method)
+            tfidf, model = fit_pruned(train_texts, y_train, terms, seed)
+        fit_s = time.perf_counter() - start_time
+        profile = serving_profile(tfidf, model, le, latency_texts)
+        predicted = profile['predict'](test_texts)
+        if full is None:
+            full = predicted
+        print(f"{profile['features']:>9} {profile['pickle_mib']:>7.2f}MB {profile['load_ms']:>7.1f}ms "
+              f"{profile['latency_ms']:>7.3f}ms {profile['support_vectors']:>6} {np.mean(predicted == y_test):>9.4f} "
+              f"{np.mean(predicted == full):>9.4f}   (fit {fit_s:.1f}s)")
+
+
+def build(n_features, method, output_dir, dataset_path, seed=0):
+    """Prune the vocabulary to n_features terms, retrain on the whole dataset and write the serving pickles"""
+    from sklearn.preprocessing import LabelEncoder
+
+    categories, texts = train.load_dataset(dataset_path)
+    cleaned = train.clean_corpus(texts)
+    train_texts, train_labels = training_rows(categories, cleaned, range(len(texts)), seed)
+    le = LabelEncoder().fit(categories)
+    y = le.transform(train_labels)
+    terms = select_terms(train_texts, y, n_features, method)
+    tfidf, model = fit_pruned(train_texts, y, terms, seed)
+    train.write_artifacts(output_dir, {'clf.pkl': model, 'tfidf.pkl': tfidf, 'encoder.pkl': le})
+    profile = serving_profile(tfidf, model, le, texts[:LATENCY_RESUMES])
+    print(f"Wrote {profile['features']} features, {profile['support_vectors']} support vectors to {output_dir} "
+          f"({profile['pickle_mib']:.2f} MiB of pickles, {profile['latency_ms']:.3f} ms per resume)")
+
+
+def main():
+    dataset = os.path.join(train.ROOT_DIR, 'UpdatedResumeDataSet.csv')
+    if len(sys.argv) >= 2 and sys.argv[1] == 'report':
+        sizes = [int(size) for size in sys.argv[2].split(',')] if len(sys.argv) > 2 else REPORT_SIZES
+        method = sys.argv[3] if len(sys.argv) > 3 else 'df'
+        report(sizes, method, dataset)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'build':
+        method = sys.argv[3] if len(sys.argv) > 3 else 'df'
+        output_dir = sys.argv[4] if len(sys.argv) > 4 else 'compact_model'
+        build(int(sys.argv[2]), method, output_dir, dataset)
+    else:
+        print("Usage: python compact_model.py report [sizes] [method]")
+        print("       python compact_model.py build n_features [method] [output_dir]")
+        print("  sizes: Comma-separated vocabulary sizes to compare (default: 4000,2000,1000,500,250)")
+        print("  method: df (document frequency) or chi2 (chi-squared relevance to the category) (default: df)")
+        print("  output_dir: Directory for clf.pkl, tfidf.pkl and encoder.pkl (default: compact_model)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Near-duplicate resume detection with MinHash signatures and LSH.
+
+Bulk imports repeat the same CV with a changed phone number or as a template
+variant, and every copy used to be classified on its own. A resume's shingles
+are the runs of shingle_size consecutive words of its cleanResume output
+(textnorm.resume_tokens, lowercased); MinHasher reduces them to num_perm
+minimum hash values (one-permutation MinHash, so each shingle is hashed once),
+whose agreement rate between two resumes estimates the Jaccard similarity of
+their shingle sets. LSHIndex splits signatures into bands
+and only compares resumes that share a whole band, so finding the duplicates of
+a resume does not scan every other resume.
+
+collapse_duplicates() maps every resume of a batch to the first earlier resume
+it near-duplicates, so a batch only needs its representatives classified.
+"""
+
+import numpy as np
+
+from textnorm import resume_tokens
+
+_UINT64 = np.uint64
+# Odd base of the polynomial span hash (mod 2**64) and its inverse, so a span's
+# hash is a difference of prefix sums
+_SPAN_BASE = _UINT64(0x100000001b3)
+_SPAN_BASE_INV = _UINT64(pow(0x100000001b3, -1, 1 << 64))
+_SPACE = _UINT64(ord(' ') + 1)
+_EMPTY = _UINT64(1 << 32)
+_LOW_BITS = _UINT64((1 << 32) - 1)
+
+
+_power_tables = {}
+
+
+def _powers(base, n):
+    """base**0 .. base**(n-1) modulo 2**64, from a table that grows to the longest resume seen"""
+    table = _power_tables.get(int(base))
+    if table is None or len(table) < n:
+        size = max(n, 2 * len(table) if table is not None else 16384)
+        table = np.full(size, base, dtype=np.uint64)
+        table[0] = 1
+        table = np.cumprod(table)
+        _power_tables[int(base)] = table
+    return table[:n]
+
+
+def _mix(x):
+    """splitmix64 finalizer: spreads the span hashes over all 64 bits"""
+    x = x ^ (x >> _UINT64(30))
+    x = x * _UINT64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> _UINT64(27))
+    x = x * _UINT64(0x94d049bb133111eb)
+    return x ^ (x >> _UINT64(31))
+
+
+def shingle_hashes(text, shingle_size=5):
+    """
+    64-bit hashes of the word shingles of a resume (one shingle if it is shorter).
+
+    Every shingle is a span of the words joined by single spaces, hashed with a
+    polynomial hash computed for all spans at once from prefix sums.
+    """
+    data = b' '.join(resume_tokens(text))
+    if not data:
+        return np.zeros(0, dtype=np.uint64)
+    chars = np.frombuffer(data, dtype=np.uint8).astype(np.uint64) + _UINT64(1)
+    spaces = np.flatnonzero(chars == _SPACE)
+    starts = np.concatenate([[0], spaces + 1])
+    ends = np.concatenate([spaces, [len(chars)]])
+    width = min(shingle_size, len(starts))
+    span_starts, span_ends = starts[:len(starts) - width + 1], ends[width - 1:]
+
+    # prefix[i] = sum(chars[j] * INV**j for j < i), so a span's hash normalized to its
+    # start is (prefix[end] - prefix[start]) * BASE**start (all modulo 2**64)
+    prefix = np.zeros(len(chars) + 1, dtype=np.uint64)
+    np.cumsum(chars * _powers(_SPAN_BASE_INV, len(chars)), out=prefix[1:])
+    spans = (prefix[span_ends] - prefix[span_starts]) * _powers(_SPAN_BASE, len(chars))[span_starts]
+    return _mix(spans ^ _UINT64(width))
+
+
+class MinHasher:
+    """
+    One-permutation MinHash signatures of resumes.
+
+    Each shingle hash is used once: its low bits pick one of num_perm bins and
+    its high 32 bits compete for that bin's minimum. Empty bins borrow the value
+    of the next non-empty bin, offset by the distance (densification by rotation),
+    so the fraction of equal bins still estimates the Jaccard similarity.
+
+    Args:
+        num_perm: Signature length
+        shingle_size: Words per shingle
+        seed: Hash seed; signatures are only comparable with the same seed
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = int(num_perm)
+        self.shingle_size = int(shingle_size)
+        self._seed = _mix(np.array([seed], dtype=np.uint64))[0]
+        self._bins = np.arange(self.num_perm)
+
+    def signature(self, text):
+        """num_perm bin minimums (all equal for every empty resume)"""
+        hashes = shingle_hashes(text, self.shingle_size) ^ self._seed
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        if not len(hashes):
+            return signature
+        bins = ((hashes & _LOW_BITS) * _UINT64(self.num_perm)) >> _UINT64(32)
+        np.minimum.at(signature, bins.astype(np.intp), hashes >> _UINT64(32))
+
+        # Every bin takes the value of the first non-empty bin at or after it (circularly)
+        filled = np.flatnonzero(signature != _EMPTY)
+        nearest = filled[np.searchsorted(filled, self._bins) % len(filled)]
+        distance = ((nearest - self._bins) % self.num_perm).astype(np.uint64)
+        return signature[nearest] + distance * _EMPTY
+
+
+def lsh_params(threshold, num_perm):
+    """
+    (bands, rows) with bands * rows <= num_perm whose candidate probability curve
+    1 - (1 - s**rows)**bands best separates similarities below and above threshold
+    """
+    similarities = np.linspace(0, 1, 201)
+    below, above = similarities <= threshold, similarities >= threshold
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        candidate = 1 - (1 - similarities ** rows) ** bands
+        error = np.trapz(candidate[below], similarities[below]) + np.trapz(1 - candidate[above], similarities[above])
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def estimated_similarity(signature, other):
+    """Estimated Jaccard similarity of two resumes from their signatures"""
+    return float(np.mean(signature == other))
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures.
+
+    Args:
+        threshold: Estimated Jaccard similarity at which two resumes are near duplicates
+        num_perm: Signature length of the MinHasher the signatures come from
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128):
+        self.threshold = float(threshold)
+        self.bands, self.rows = lsh_params(self.threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature):
+        """[(key, estimated similarity)] of indexed resumes at or above the threshold, most similar first"""
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = estimated_similarity(signature, self._signatures[key])
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+
+def collapse_duplicates(texts, hasher, threshold=0.8):
+    """
+    Index of each text's representative: the most similar earlier representative
+    it near-duplicates, or the text itself. Only representatives are indexed, so
+    every group is represented by its first member.
+    """
+    index = LSHIndex(threshold, hasher.num_perm)
+    representatives = []
+    for i, text in enumerate(texts):
+        signature = hasher.signature(text)
+        matches = index.query(signature)
+        if matches:
+            representatives.append(matches[0][0])
+        else:
+            index.add(i, signature)
+            representatives.append(i)
+    return representatives
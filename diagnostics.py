@@ -0,0 +1,196 @@
+"""
+On-demand diagnostics for requests that are slow in production only.
+
+Two tools, both off until an operator turns them on at runtime:
+
+- sample_stacks() samples the Python stack of every thread (sys._current_frames)
+  at a fixed rate for a few seconds and aggregates the samples in the collapsed
+  format read by flamegraph.pl, speedscope and inferno ("thread;frame;frame N").
+  Nothing runs between profiles.
+- SlowRequestLog keeps the last requests slower than a threshold in a bounded
+  ring buffer: endpoint, status, duration, the time spent in each stage and the
+  SHA-256, size, type and page count of every uploaded file. While it is
+  enabled, DiagnosticsMiddleware opens a RequestTrace for every request (in a
+  context variable, copied into the thread pools); when it is disabled the
+  middleware only checks one attribute.
+"""
+
+import os
+import sys
+import time
+import threading
+import contextvars
+from collections import Counter, deque
+
+current_trace = contextvars.ContextVar('request_trace', default=None)
+
+
+class RequestTrace:
+    """Stage timings and uploaded files of one request"""
+
+    __slots__ = ('stages', 'files')
+
+    def __init__(self):
+        self.stages = {}
+        self.files = []
+
+    def add_stage(self, labels, seconds):
+        """Stage listener for MetricsRegistry: labels are (stage, file_type)"""
+        name = f"{labels[0]}:{labels[1]}" if labels[1] else labels[0]
+        total, count = self.stages.get(name, (0.0, 0))
+        self.stages[name] = (total + seconds, count + 1)
+
+
+def trace_stage(labels, seconds):
+    """Add a stage timing to the current request's trace, if there is one"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_stage(labels, seconds)
+
+
+def trace_file(**fields):
+    """Record an uploaded file in the current request's trace; returns the file dict (None if not tracing)"""
+    trace = current_trace.get()
+    if trace is None:
+        return None
+    trace.files.append(fields)
+    return fields
+
+
+class SlowRequestLog:
+    """
+    Bounded log of the requests slower than threshold_ms, newest last.
+
+    Args:
+        threshold_ms: Requests taking at least this long are kept
+        capacity: Most requests kept; the oldest is dropped first
+        enabled: Start enabled
+    """
+
+    def __init__(self, threshold_ms=1000.0, capacity=100, enabled=False):
+        self.threshold_ms = float(threshold_ms)
+        self._entries = deque(maxlen=max(1, int(capacity)))
+        self.enabled = enabled
+        self.traced = 0
+        self.recorded = 0
+
+    def configure(self, enabled=None, threshold_ms=None, capacity=None):
+        if threshold_ms is not None:
+            self.threshold_ms = float(threshold_ms)
+        if capacity is not None and int(capacity) != self._entries.maxlen:
+            self._entries = deque(self._entries, maxlen=max(1, int(capacity)))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def record(self, entry):
+        self.recorded += 1
+        self._entries.append(entry)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "capacity": self._entries.maxlen,
+            "traced": self.traced,
+            "recorded": self.recorded,
+            "pid": os.getpid(),
+        }
+
+    def entries(self):
+        return list(self._entries)
+
+
+class DiagnosticsMiddleware:
+    """
+    ASGI middleware tracing every HTTP request while the slow request log is enabled.
+
+    Args:
+        app: ASGI application
+        log: SlowRequestLog
+    """
+
+    def __init__(self, app, log):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if not self.log.enabled or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        trace = RequestTrace()
+        token = current_trace.set(trace)
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            current_trace.reset(token)
+            self.log.traced += 1
+            if duration_ms >= self.log.threshold_ms:
+                self.log.record({
+                    "started_at": round(started_at, 3),
+                    "method": scope['method'],
+                    "path": scope['path'],
+                    "status": status,
+                    "duration_ms": round(duration_ms, 2),
+                    "stages": {name: {"ms": round(total * 1000, 2), "calls": count}
+                               for name, (total, count) in trace.stages.items()},
+                    "files": trace.files,
+                })
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds, rate_hz, skip_thread_ids=()):
+    """
+    Sample the stack of every thread rate_hz times a second for seconds.
+
+    Returns:
+        (Counter of collapsed stacks "thread;outermost;...;innermost" -> samples, number of sampling rounds)
+    """
+    interval = 1.0 / rate_hz
+    skip = set(skip_thread_ids) | {threading.get_ident()}
+    stacks = Counter()
+    rounds = 0
+    next_tick = time.perf_counter()
+    deadline = next_tick + seconds
+    while next_tick < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in skip:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[';'.join(reversed(labels))] += 1
+        rounds += 1
+        next_tick += interval
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Sampling is slower than the rate; skip the missed ticks
+            next_tick = time.perf_counter()
+    return stacks, rounds
+
+
+def collapsed(stacks):
+    """Collapsed-stack text (one "stack count" line per distinct stack), heaviest first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,260 @@
+"""
+Sparse-native scoring engines for the pickled OneVsRestClassifier(SVC()) model.
+
+The SVCs in clf.pkl were fitted on dense arrays, so scikit-learn rejects sparse
+input at predict time and pred() used to densify every TF-IDF row to the full
+vocabulary width. The engines below evaluate the same RBF decision functions
+directly on the CSR rows produced by tfidf.transform.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+# Support vector storage of CompiledOvRSVC: as fitted, float32, or int8 with one float32 scale per support vector
+PRECISIONS = ('float64', 'float32', 'int8')
+
+
+def _row_sq_norms(X):
+    """Squared L2 norm of every row of a CSR matrix"""
+    return np.asarray(X.multiply(X).sum(axis=1)).ravel()
+
+
+def _rbf_kernel(X, X_sq_norms, support_t, support_sq_norms, gamma, support_scales=None):
+    """
+    RBF kernel between CSR rows X and support vectors stored transposed (CSR, d x m),
+    optionally quantized with one scale per support vector
+    """
+    # ||x - s||^2 = ||x||^2 + ||s||^2 - 2 x.s, only the dot product touches the data
+    dist = (X @ support_t).toarray()
+    if support_scales is not None:
+        dist *= support_scales
+    dist *= -2.0
+    dist += X_sq_norms[:, None]
+    dist += support_sq_norms[None, :]
+    np.maximum(dist, 0.0, out=dist)
+    dist *= -gamma
+    return np.exp(dist, out=dist)
+
+
+def _check_ovr(ovr_model):
+    binarizer = getattr(ovr_model, 'label_binarizer_', None)
+    if binarizer is None or binarizer.y_type_ != 'multiclass':
+        raise ValueError("Expected a fitted multiclass OneVsRestClassifier")
+    for estimator in ovr_model.estimators_:
+        if hasattr(estimator, 'support_vectors_') and estimator.kernel != 'rbf':
+            raise ValueError(f"Unsupported SVC kernel: {estimator.kernel!r} (only 'rbf' is supported)")
+
+
+def _constant_score(estimator):
+    # OneVsRestClassifier stores a _ConstantPredictor for classes that were
+    # always (or never) present; its decision_function is the constant label
+    return float(np.ravel(estimator.y_)[0])
+
+
+def _dual_coef(estimator):
+    """Dual coefficients of a binary SVC as a 1-D float64 array (SVCs fitted on sparse input store them as CSR)"""
+    dual_coef = estimator.dual_coef_
+    if sp.issparse(dual_coef):
+        dual_coef = dual_coef.toarray()
+    return np.ascontiguousarray(dual_coef[0], dtype=np.float64)
+
+
+def _quantize_columns(support_t):
+    """
+    int8 copy of a (d x m) CSR matrix with one scale per column (support vector),
+    and the squared norms of the dequantized columns
+    """
+    n_support = support_t.shape[1]
+    magnitude = np.abs(support_t.data)
+    column_max = np.zeros(n_support)
+    np.maximum.at(column_max, support_t.indices, magnitude)
+    scales = np.where(column_max > 0, column_max / 127.0, 1.0)
+    quantized = np.rint(support_t.data / scales[support_t.indices]).astype(np.int8)
+    dequantized = quantized * scales[support_t.indices]
+    sq_norms = np.bincount(support_t.indices, weights=dequantized * dequantized, minlength=n_support)
+    support_q = sp.csr_matrix((quantized, support_t.indices, support_t.indptr), shape=support_t.shape)
+    return support_q, scales.astype(np.float32), sq_norms.astype(np.float32)
+
+
+def label_agreement(reference, candidate, X, chunk_size=256):
+    """Fraction of the rows of X for which two engines predict the same label"""
+    same = 0
+    for start in range(0, X.shape[0], chunk_size):
+        chunk = X[start:start + chunk_size]
+        same += int(np.sum(reference.predict(chunk) == candidate.predict(chunk)))
+    return same / max(X.shape[0], 1)
+
+
+def last_argmax(scores):
+    """Row-wise argmax that keeps the last maximum, like OneVsRestClassifier.predict"""
+    n_classes = scores.shape[1]
+    return n_classes - 1 - np.argmax(scores[:, ::-1], axis=1)
+
+
+class SparseOvRSVC:
+    """
+    One-vs-rest RBF SVC evaluated on sparse input, one estimator at a time.
+
+    Each binary SVC keeps its own support vectors, converted once to CSR so a
+    request only touches the vocabulary entries it actually contains.
+    """
+
+    def __init__(self, ovr_model):
+        _check_ovr(ovr_model)
+        self.classes_ = ovr_model.classes_
+        self._estimators = []
+        for estimator in ovr_model.estimators_:
+            if not hasattr(estimator, 'support_vectors_'):
+                self._estimators.append((None, None, None, None, _constant_score(estimator)))
+                continue
+            support = sp.csr_matrix(estimator.support_vectors_, dtype=np.float64)
+            self._estimators.append((
+                support.T.tocsr(),
+                _row_sq_norms(support),
+                _dual_coef(estimator),
+                float(estimator._gamma),
+                float(estimator.intercept_[0]),
+            ))
+
+    def decision_function(self, X):
+        """Per-class decision scores, shape (n_samples, n_classes)"""
+        X = sp.csr_matrix(X, dtype=np.float64)
+        X_sq_norms = _row_sq_norms(X)
+        scores = np.empty((X.shape[0], len(self._estimators)))
+        for i, (support_t, sq_norms, dual_coef, gamma, intercept) in enumerate(self._estimators):
+            if support_t is None:
+                scores[:, i] = intercept
+                continue
+            kernel = _rbf_kernel(X, X_sq_norms, support_t, sq_norms, gamma)
+            scores[:, i] = kernel @ dual_coef + intercept
+        return scores
+
+    def predict(self, X):
+        return self.classes_[last_argmax(self.decision_function(X))]
+
+
+class CompiledOvRSVC:
+    """
+    One-vs-rest RBF SVC compiled into a single shared kernel evaluation.
+
+    Every training row that is a support vector of several binary SVCs is
+    stored once: support vectors from all estimators are merged into one
+    deduplicated CSR matrix with precomputed squared norms, and the dual
+    coefficients become a (n_support, n_classes) weight matrix. A request then
+    costs one sparse product, one exp and one small dense product per gamma
+    (the estimators of a OneVsRestClassifier normally share a single gamma).
+
+    with_precision() stores the support vectors, norms and weights in float32, or
+    the support vectors in int8 with a float32 scale per vector, to halve or
+    further cut the memory a request streams through; scores are still summed in
+    float64.
+    """
+
+    precision = 'float64'
+    support_scales = None
+
+    def __init__(self, ovr_model):
+        _check_ovr(ovr_model)
+        self.classes_ = ovr_model.classes_
+        n_classes = len(ovr_model.estimators_)
+        self.intercepts = np.zeros(n_classes)
+
+        # gamma -> (row key -> merged row index, rows, weight rows)
+        groups = {}
+        for class_index, estimator in enumerate(ovr_model.estimators_):
+            if not hasattr(estimator, 'support_vectors_'):
+                self.intercepts[class_index] = _constant_score(estimator)
+                continue
+            self.intercepts[class_index] = estimator.intercept_[0]
+            row_index, rows, weights = groups.setdefault(float(estimator._gamma), ({}, [], []))
+            support = sp.csr_matrix(estimator.support_vectors_, dtype=np.float64)
+            support.sort_indices()
+            for i, coef in enumerate(_dual_coef(estimator)):
+                start, end = support.indptr[i], support.indptr[i + 1]
+                key = (support.indices[start:end].tobytes(), support.data[start:end].tobytes())
+                merged = row_index.get(key)
+                if merged is None:
+                    merged = row_index[key] = len(rows)
+                    rows.append(support[i])
+                    weights.append(np.zeros(n_classes))
+                weights[merged][class_index] += coef
+
+        self.groups = []
+        for gamma, (_, rows, weights) in groups.items():
+            support = sp.vstack(rows, format='csr')
+            self.groups.append((
+                gamma,
+                support.T.tocsr(),
+                _row_sq_norms(support),
+                np.vstack(weights),
+            ))
+
+    @classmethod
+    def from_arrays(cls, classes, intercepts, groups, precision='float64', support_scales=None):
+        """
+        Rebuild an engine from exported arrays (see model_store.py).
+
+        Args:
+            classes: Label indices, one per class column
+            intercepts: Per-class intercepts
+            groups: (gamma, support_t, sq_norms, weights) per distinct gamma,
+                with support_t a (n_features, n_support) CSR matrix
+            precision: One of PRECISIONS, the storage type of the groups
+            support_scales: For int8, the per-support-vector scales of each group
+        """
+        compiled = cls.__new__(cls)
+        compiled.classes_ = classes
+        compiled.intercepts = intercepts
+        compiled.groups = list(groups)
+        compiled.precision = precision
+        compiled.support_scales = list(support_scales) if support_scales is not None else None
+        return compiled
+
+    def with_precision(self, precision):
+        """Copy of this (float64) engine with its support vectors stored in another precision"""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r} (expected one of {', '.join(PRECISIONS)})")
+        if precision == self.precision:
+            return self
+        if self.precision != 'float64':
+            raise ValueError(f"Can only convert a float64 engine, this one is {self.precision}")
+        groups, support_scales = [], []
+        for gamma, support_t, sq_norms, weights in self.groups:
+            if precision == 'int8':
+                support_t, scales, sq_norms = _quantize_columns(support_t)
+                support_scales.append(scales)
+            else:
+                support_t = support_t.astype(np.float32)
+                sq_norms = np.asarray(sq_norms, dtype=np.float32)
+            groups.append((gamma, support_t, sq_norms, np.asarray(weights, dtype=np.float32)))
+        return self.from_arrays(self.classes_, self.intercepts, groups, precision,
+                                support_scales if precision == 'int8' else None)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the support vectors, norms, weights and scales"""
+        total = 0
+        for i, (_, support_t, sq_norms, weights) in enumerate(self.groups):
+            total += support_t.data.nbytes + support_t.indices.nbytes + support_t.indptr.nbytes
+            total += np.asarray(sq_norms).nbytes + np.asarray(weights).nbytes
+            if self.support_scales is not None:
+                total += np.asarray(self.support_scales[i]).nbytes
+        return total
+
+    @property
+    def n_support(self):
+        """Number of distinct support vectors after merging"""
+        return sum(group[1].shape[1] for group in self.groups)
+
+    def decision_function(self, X):
+        """Per-class decision scores, shape (n_samples, n_classes)"""
+        X = sp.csr_matrix(X, dtype=np.float64 if self.precision == 'float64' else np.float32)
+        X_sq_norms = _row_sq_norms(X)
+        scores = np.tile(self.intercepts, (X.shape[0], 1))
+        for i, (gamma, support_t, sq_norms, weights) in enumerate(self.groups):
+            scales = self.support_scales[i] if self.support_scales is not None else None
+            scores += _rbf_kernel(X, X_sq_norms, support_t, sq_norms, gamma, scales) @ weights
+        return scores
+
+    def predict(self, X):
+        return self.classes_[last_argmax(self.decision_function(X))]
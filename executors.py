@@ -0,0 +1,99 @@
+"""
+Bounded thread / process pools for CPU-bound work called from async endpoints.
+
+Text extraction (PyPDF2, python-docx) and inference are dispatched here so the
+event loop stays free to answer /health and /ping. Each pool accepts at most
+max_workers running tasks plus max_queue waiting tasks; anything beyond that is
+rejected immediately with PoolSaturatedError instead of piling up latency.
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool already has max_workers + max_queue outstanding tasks"""
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded number of outstanding tasks.
+
+    Args:
+        name: Pool name used in thread names and stats
+        kind: "thread" or "process"
+        max_workers: Number of worker threads / processes
+        max_queue: Tasks allowed to wait for a free worker
+    """
+
+    def __init__(self, name, kind='thread', max_workers=2, max_queue=32):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool kind: {kind!r} (expected 'thread' or 'process')")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        if kind == 'process':
+            # fork so workers inherit the models already loaded by the parent
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('fork'))
+        else:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=name)
+
+        # Run thread tasks in a copy of the caller's context (context variables such as the request trace)
+        self.copy_context = False
+
+        self._outstanding = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._peak_outstanding = 0
+        self._task_seconds = 0.0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool, or raise PoolSaturatedError if it is full"""
+        if self._outstanding >= self.capacity:
+            self._rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is saturated ({self._outstanding} tasks outstanding)")
+
+        self._outstanding += 1
+        self._peak_outstanding = max(self._peak_outstanding, self._outstanding)
+        start_time = time.perf_counter()
+        if self.copy_context and self.kind == 'thread':
+            fn, args = contextvars.copy_context().run, (fn, *args)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._outstanding -= 1
+            self._task_seconds += time.perf_counter() - start_time
+
+    def stats(self):
+        """Saturation metrics since startup"""
+        running = min(self._outstanding, self.max_workers)
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": self._outstanding - running,
+            "saturation": round(self._outstanding / self.capacity, 3),
+            "peak_outstanding": self._peak_outstanding,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "task_seconds": round(self._task_seconds, 3),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
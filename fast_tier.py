@@ -0,0 +1,145 @@
+"""
+Fast linear tier distilled from the RBF SVC.
+
+Scoring the One-vs-Rest RBF SVC costs a kernel evaluation against every
+support vector. LinearTier scores a TF-IDF row with one sparse x dense product
+instead: its weights are fitted (ridge regression) to reproduce the SVC's
+per-class decision scores, not only its labels, on the training resumes plus
+augmented variants of them (words dropped, a contiguous excerpt, lines
+shuffled, another resume's text appended), so it also learns how the SVC
+behaves on partial and noisy resumes.
+
+Because its scores approximate the SVC's, the gap between its top two classes
+says how safe its answer is: the API's "auto" tier keeps the fast answer when
+that margin is large and rescores the resume with the SVC otherwise.
+
+Usage:
+    python fast_tier.py build [dataset_csv] [output] [model_dir]
+"""
+
+import os
+import sys
+import json
+import random
+
+import numpy as np
+
+FORMAT_NAME = 'resume-fast-tier'
+FORMAT_VERSION = 1
+
+
+class LinearTier:
+    """
+    Linear per-class scores X @ weights + intercept approximating a OneVsRestClassifier's decision_function.
+
+    Args:
+        weights: (n_features, n_classes) array
+        intercept: (n_classes,) array
+        classes: Label index of every class column
+        teacher_version: Version of the model the tier was distilled from
+    """
+
+    def __init__(self, weights, intercept, classes, teacher_version=None):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.teacher_version = teacher_version
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    def decision_function(self, X):
+        """Per-class scores, shape (n_samples, n_classes)"""
+        return np.asarray(X @ self.weights) + self.intercept
+
+    def predict(self, X):
+        from engine import last_argmax
+        return self.classes_[last_argmax(self.decision_function(X))]
+
+    def save(self, path):
+        manifest = {"format": FORMAT_NAME, "format_version": FORMAT_VERSION, "teacher_version": self.teacher_version}
+        with open(path, 'wb') as f:
+            np.savez(f, weights=self.weights, intercept=self.intercept, classes=self.classes_,
+                     manifest=np.array(json.dumps(manifest)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            manifest = json.loads(str(arrays['manifest']))
+            if manifest.get('format') != FORMAT_NAME or manifest.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported fast tier format in {path}")
+            return cls(arrays['weights'], arrays['intercept'], arrays['classes'], manifest.get('teacher_version'))
+
+
+def augment(texts, rounds=5, seed=0):
+    """rounds x 4 variants of every text: word dropout, an excerpt, shuffled lines and another resume appended"""
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(rounds):
+        for text in texts:
+            words = text.split()
+            variants.append(' '.join(word for word in words if rng.random() > 0.3))
+            length = max(1, int(len(words) * rng.uniform(0.1, 0.6)))
+            start = rng.randrange(max(1, len(words) - length))
+            variants.append(' '.join(words[start:start + length]))
+            lines = text.splitlines()
+            rng.shuffle(lines)
+            variants.append('\n'.join(lines))
+            other = rng.choice(texts).split()
+            variants.append(' '.join(words + other[:len(other) // 4]))
+    return variants
+
+
+def distill(X, teacher_scores, classes, alpha=0.01, teacher_version=None):
+    """LinearTier fitted by ridge regression of the teacher's decision scores on TF-IDF rows X"""
+    from sklearn.linear_model import Ridge
+
+    ridge = Ridge(alpha=alpha).fit(X, teacher_scores)
+    return LinearTier(ridge.coef_.T, ridge.intercept_, classes, teacher_version)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        print("Usage: python fast_tier.py build [dataset_csv] [output] [model_dir]")
+        print("  dataset_csv: CSV with a Resume column (default: UpdatedResumeDataSet.csv)")
+        print("  output: Output file (default: fast_tier.npz)")
+        print("  model_dir: Directory holding clf.pkl and tfidf.pkl (default: .)")
+        sys.exit(1)
+
+    import csv
+    import time
+    import pickle
+
+    from cache import files_version
+    from engine import CompiledOvRSVC
+    from model_store import FusedTfidfVectorizer
+    from textnorm import clean_resume
+
+    dataset = sys.argv[2] if len(sys.argv) > 2 else 'UpdatedResumeDataSet.csv'
+    output = sys.argv[3] if len(sys.argv) > 3 else 'fast_tier.npz'
+    model_dir = sys.argv[4] if len(sys.argv) > 4 else '.'
+    with open(os.path.join(model_dir, 'clf.pkl'), 'rb') as f:
+        teacher = CompiledOvRSVC(pickle.load(f))
+    with open(os.path.join(model_dir, 'tfidf.pkl'), 'rb') as f:
+        tfidf = pickle.load(f)
+    try:
+        transform = FusedTfidfVectorizer.from_vectorizer(tfidf).transform
+    except ValueError:
+        transform = lambda texts: tfidf.transform([clean_resume(text) for text in texts])
+
+    start_time = time.perf_counter()
+    with open(dataset, newline='', encoding='utf-8') as f:
+        texts = sorted({row['Resume'] for row in csv.DictReader(f)})
+    corpus = texts + augment(texts)
+    X = transform(corpus)
+    tier = distill(X, teacher.decision_function(X), teacher.classes_, teacher_version=files_version(
+        [os.path.join(model_dir, name) for name in ('clf.pkl', 'tfidf.pkl', 'encoder.pkl')]))
+    tier.save(output)
+    agreement = float(np.mean(tier.predict(X) == teacher.predict(X)))
+    print(f"Distilled {len(corpus)} resumes ({len(texts)} distinct + augmented) into {output} "
+          f"in {time.perf_counter() - start_time:.2f}s; training agreement {agreement:.4f}")
+
+
+if __name__ == "__main__":
+    main()
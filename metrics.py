@@ -0,0 +1,326 @@
+"""
+In-process request and stage metrics in the Prometheus text format.
+
+The API used to report one processing_time_ms per request, which cannot say
+whether a slow request spent its time extracting the PDF, cleaning the text,
+vectorizing it or in the SVC. MetricsRegistry keeps fixed-bucket histograms of
+monotonic-clock (time.perf_counter) durations per endpoint and per stage
+(extraction labelled with the file type), gauges of requests in flight and
+error counters. Recording a sample is a bisect and a few list updates under a
+lock; nothing is formatted until /metrics is scraped.
+
+A registry only sees its own process. With several worker processes (uvicorn
+--workers, or a process extraction pool), give every process the same
+directory: each writes a snapshot of its samples there every flush_s seconds
+(and at exit) and render() sums the snapshots of all processes. Counters and
+histograms of processes that have exited are kept; their gauges are dropped.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the duration histogram buckets, from a cached prediction to a stuck PDF
+DURATION_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUEST_SECONDS = 'resume_api_request_duration_seconds'
+REQUESTS_IN_FLIGHT = 'resume_api_requests_in_flight'
+REQUEST_ERRORS = 'resume_api_request_errors_total'
+STAGE_SECONDS = 'resume_api_stage_duration_seconds'
+STAGE_ERRORS = 'resume_api_stage_errors_total'
+
+# name: (type, label names, help)
+METRICS = {
+    REQUEST_SECONDS: ('histogram', ('endpoint', 'method', 'status'), "Request latency by endpoint"),
+    REQUESTS_IN_FLIGHT: ('gauge', ('endpoint',), "Requests being handled"),
+    REQUEST_ERRORS: ('counter', ('endpoint', 'status'), "Responses with a 4xx or 5xx status"),
+    STAGE_SECONDS: ('histogram', ('stage', 'file_type'), "Time spent in each processing stage (file_type for extraction)"),
+    STAGE_ERRORS: ('counter', ('stage', 'file_type'), "Processing stages that raised"),
+}
+
+
+class _NullStage:
+    """Context manager that records nothing (metrics disabled)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('registry', 'labels', 'start')
+
+    def __init__(self, registry, labels):
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.registry.observe(STAGE_SECONDS, self.labels, seconds)
+        if exc_type is not None:
+            self.registry.inc(STAGE_ERRORS, self.labels)
+        if self.registry.stage_listener is not None:
+            self.registry.stage_listener(self.labels, seconds)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Histograms, counters and gauges of one process, keyed by (metric name, label values).
+
+    Args:
+        enabled: When False, the recording methods do nothing, and so does stage()
+            unless a stage_listener is set
+        directory: Directory shared by the worker processes ('' for this process only)
+        flush_s: Seconds between snapshots written to directory
+    """
+
+    def __init__(self, enabled=True, directory='', flush_s=1.0):
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_s = max(0.05, float(flush_s))
+        # Called with (labels, seconds) after every stage, e.g. to trace a request (diagnostics.py)
+        self.stage_listener = None
+        self._lock = threading.Lock()
+        self._reset()
+        # Set when samples must be flushed to directory by a thread that is not running yet
+        self._flusher_pending = bool(enabled and directory)
+        if enabled and directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+            # A forked child (process pool worker) starts with the parent's samples; drop them
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._flusher_pending = True
+
+    def _start_flusher(self):
+        self._flusher_pending = False
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_s)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def observe(self, name, labels, seconds):
+        """Add a duration sample to a histogram series"""
+        if not self.enabled:
+            return
+        if self._flusher_pending:
+            self._start_flusher()
+        bucket = bisect_left(DURATION_BUCKETS, seconds)
+        with self._lock:
+            self._observe(name, labels, bucket, seconds)
+
+    def _observe(self, name, labels, bucket, seconds):
+        series = self._histograms.get((name, labels))
+        if series is None:
+            # Per-bucket counts (last one is +Inf), then the sum
+            series = self._histograms[(name, labels)] = [0] * (len(DURATION_BUCKETS) + 1) + [0.0]
+        series[bucket] += 1
+        series[-1] += seconds
+
+    def inc(self, name, labels, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+
+    def gauge_add(self, name, labels, amount):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, labels)] = self._gauges.get((name, labels), 0) + amount
+
+    def request_started(self, endpoint):
+        with self._lock:
+            key = (REQUESTS_IN_FLIGHT, (endpoint,))
+            self._gauges[key] = self._gauges.get(key, 0) + 1
+
+    def request_finished(self, endpoint, method, status, seconds):
+        """Record a finished request under one lock: in-flight gauge, latency and error count"""
+        if self._flusher_pending:
+            self._start_flusher()
+        bucket = bisect_left(DURATION_BUCKETS, seconds)
+        failed, status = status >= 400, str(status)
+        with self._lock:
+            key = (REQUESTS_IN_FLIGHT, (endpoint,))
+            self._gauges[key] -= 1
+            self._observe(REQUEST_SECONDS, (endpoint, method, status), bucket, seconds)
+            if failed:
+                key = (REQUEST_ERRORS, (endpoint, status))
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    def stage(self, stage, file_type=''):
+        """Context manager timing a processing stage (and counting it as failed if it raises)"""
+        if not self.enabled and self.stage_listener is None:
+            return _NULL_STAGE
+        return _Stage(self, (stage, file_type))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "histograms": [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()],
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+            }
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory"""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Removed or being replaced between listdir and open
+                continue
+        return snapshots
+
+    def collect(self):
+        """(histograms, counters, gauges) summed over every process, keyed by (name, label values)"""
+        histograms, counters, gauges = {}, {}, {}
+        for snapshot in self._snapshots():
+            for name, labels, series in snapshot['histograms']:
+                total = histograms.setdefault((name, tuple(labels)), [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+            for name, labels, value in snapshot['counters']:
+                counters[(name, tuple(labels))] = counters.get((name, tuple(labels)), 0) + value
+            if _process_alive(snapshot['pid']):
+                for name, labels, value in snapshot['gauges']:
+                    gauges[(name, tuple(labels))] = gauges.get((name, tuple(labels)), 0) + value
+        return histograms, counters, gauges
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        histograms, counters, gauges = self.collect()
+        lines = []
+        for name, (kind, label_names, help_text) in METRICS.items():
+            samples = {'histogram': histograms, 'counter': counters, 'gauge': gauges}[kind]
+            series = sorted((labels, value) for (metric, labels), value in samples.items() if metric == name)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in zip(label_names, labels))
+                if kind != 'histogram':
+                    lines.append(f"{name}{{{label_text}}} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{label_text}}} {_number(value[-1])}")
+                lines.append(f"{name}_count{{{label_text}}} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(round(value, 9)) if isinstance(value, float) else str(value)
+
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status and in-flight count of every HTTP request.
+
+    Args:
+        app: ASGI application
+        registry: MetricsRegistry
+        routes: The application's routes (app.router.routes), used to label requests
+            by route template so path parameters do not create new series
+    """
+
+    def __init__(self, app, registry, routes):
+        self.app = app
+        self.registry = registry
+        self.routes = routes
+        self._endpoints = {}
+
+    def endpoint(self, path):
+        endpoint = self._endpoints.get(path)
+        if endpoint is None:
+            endpoint = 'other'
+            for route in self.routes:
+                if getattr(route, 'path_regex', None) is not None and route.path_regex.match(path):
+                    endpoint = route.path
+                    break
+            # Only remember fixed paths; parametrized ones would grow the dict without bound
+            if endpoint == path:
+                self._endpoints[path] = endpoint
+        return endpoint
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self.endpoint(scope['path'])
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        self.registry.request_started(endpoint)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.request_finished(endpoint, scope['method'], status, time.perf_counter() - start)
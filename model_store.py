@@ -0,0 +1,465 @@
+"""
+Flat-array model storage that worker processes can share through mmap.
+
+clf.pkl, tfidf.pkl and encoder.pkl are unpickled separately by every worker, so
+memory grows linearly with the worker count. export_model_arrays() writes the
+numeric state needed for serving (merged support vectors, dual coefficients,
+intercepts, IDF weights, sorted vocabulary and label names) as .npy files plus
+a manifest. load_model_arrays() maps them read-only, so all workers on a host
+share one physical copy through the page cache.
+
+write_bundle() packs the same arrays into a single versioned, checksummed file
+that load_bundle() maps in place. Neither loader imports scikit-learn, which is
+what dominates cold starts when unpickling.
+
+FusedTfidfVectorizer builds the same TF-IDF rows as
+tfidf.transform([cleanResume(doc)]) straight from raw resume text.
+
+Both can store the support vectors in float32 or int8 (engine.PRECISIONS), so
+the shared copy itself is smaller; the CLI then checks, when the training CSV
+is next to the pickles, that the reduced engine predicts the float64 engine's
+label for at least MIN_PRECISION_AGREEMENT of its resumes before writing.
+
+Usage:
+    python model_store.py export [model_dir] [out_dir] [precision]
+    python model_store.py bundle [model_dir] [bundle_path] [precision]
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+from engine import PRECISIONS, CompiledOvRSVC, label_agreement
+from textnorm import resume_tokens
+
+FORMAT_NAME = 'resume-screening-arrays'
+FORMAT_VERSION = 1
+
+BUNDLE_MAGIC = b'RSBUNDLE'
+BUNDLE_VERSION = 1
+BUNDLE_ALIGNMENT = 64
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+MIN_PRECISION_AGREEMENT = 0.999
+
+
+class ArrayTfidfVectorizer:
+    """
+    TfidfVectorizer.transform reimplemented over flat arrays.
+
+    Only the configuration used by tfidf.pkl is supported: word unigrams,
+    lowercase, raw term counts, IDF weighting and L2 row normalization. Stop
+    words never reach the vocabulary at fit time, so a vocabulary lookup
+    already drops them.
+    """
+
+    def __init__(self, terms, term_index, idf, token_pattern=DEFAULT_TOKEN_PATTERN, lowercase=True):
+        self.terms = terms
+        self.term_index = term_index
+        self.idf_ = idf
+        self.token_pattern = token_pattern
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Build from a fitted scikit-learn TfidfVectorizer"""
+        _check_vectorizer(vectorizer)
+        terms = sorted(vectorizer.vocabulary_)
+        return cls(np.array(terms), np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int64),
+                   np.asarray(vectorizer.idf_, dtype=np.float64), vectorizer.token_pattern, vectorizer.lowercase)
+
+    @property
+    def n_features(self):
+        return len(self.idf_)
+
+    def feature_ids(self, doc):
+        """Vocabulary index of every in-vocabulary token of a document"""
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = self._token_re.findall(doc)
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+        tokens = np.array(tokens)
+        positions = np.searchsorted(self.terms, tokens)
+        positions[positions == len(self.terms)] = 0
+        found = self.terms[positions] == tokens
+        return self.term_index[positions[found]]
+
+    def transform_ids(self, id_lists):
+        """CSR TF-IDF rows from per-document sequences of vocabulary indices"""
+        id_lists = [np.asarray(ids, dtype=np.int64) for ids in id_lists]
+        n_docs, n_features = len(id_lists), self.n_features
+        lengths = np.fromiter(map(len, id_lists), dtype=np.int64, count=n_docs)
+        rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        ids = np.concatenate(id_lists) if n_docs else np.empty(0, dtype=np.int64)
+
+        # Term counts for every (document, feature) pair, sorted by document then feature
+        keys, counts = np.unique(rows * n_features + ids, return_counts=True)
+        doc_of, features = np.divmod(keys, n_features)
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_of, minlength=n_docs), out=indptr[1:])
+        return self._tfidf_rows(features, counts, indptr)
+
+    def transform_counts(self, counts):
+        """CSR TF-IDF row of one document from its term count for every feature"""
+        features = np.flatnonzero(counts)
+        return self._tfidf_rows(features, counts[features], np.array([0, len(features)], dtype=np.int64))
+
+    def _tfidf_rows(self, features, counts, indptr):
+        """CSR rows from the (feature, count) pairs of each row, features ascending within a row"""
+        values = counts * self.idf_[features]
+        squares = values * values
+        for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+            if end > start:
+                # Sequential sum of squares, the same order as scikit-learn's row normalizer
+                sq_norm = np.cumsum(squares[start:end])[-1]
+                if sq_norm != 0.0:
+                    values[start:end] /= np.sqrt(sq_norm)
+
+        return sp.csr_matrix((values, features, indptr), shape=(len(indptr) - 1, self.n_features))
+
+    def transform(self, raw_documents):
+        return self.transform_ids([self.feature_ids(doc) for doc in raw_documents])
+
+
+class FusedTfidfVectorizer(ArrayTfidfVectorizer):
+    """
+    tfidf.transform([cleanResume(doc) for doc in docs]) computed from raw text.
+
+    textnorm.resume_tokens cleans, lowercases and splits each document in one
+    pass, and the words are looked up in a dict of the fitted vocabulary, which
+    also drops stop words and single characters. transform() takes raw resumes,
+    not cleaned ones, and returns the same rows as the unfused pipeline.
+    """
+
+    def __init__(self, terms, term_index, idf, lowercase=True):
+        super().__init__(terms, term_index, idf, DEFAULT_TOKEN_PATTERN, lowercase)
+        # Cleaned text is ASCII, so a non-ASCII term can never match
+        self._vocabulary = {str(term).encode('ascii'): int(index)
+                            for term, index in zip(terms, term_index) if str(term).isascii()}
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Build from a fitted TfidfVectorizer or an ArrayTfidfVectorizer"""
+        if isinstance(vectorizer, ArrayTfidfVectorizer):
+            token_pattern, terms, term_index = vectorizer.token_pattern, vectorizer.terms, vectorizer.term_index
+        else:
+            _check_vectorizer(vectorizer)
+            token_pattern = vectorizer.token_pattern
+            terms = list(vectorizer.vocabulary_)
+            term_index = [vectorizer.vocabulary_[term] for term in terms]
+        if token_pattern != DEFAULT_TOKEN_PATTERN:
+            raise ValueError(f"Fused vectorizer needs the default token pattern, got {token_pattern!r}")
+        return cls(terms, term_index, np.asarray(vectorizer.idf_, dtype=np.float64), vectorizer.lowercase)
+
+    def feature_ids(self, doc):
+        """Vocabulary index of every in-vocabulary word of a raw (uncleaned) document"""
+        get = self._vocabulary.get
+        return [index for index in map(get, resume_tokens(doc, self.lowercase)) if index is not None]
+
+
+class ArrayLabelEncoder:
+    """The inverse_transform half of LabelEncoder over a label array"""
+
+    def __init__(self, classes):
+        self.classes_ = classes
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y)]
+
+
+class ArrayModel:
+    """Vectorizer, compiled engine and label encoder loaded from flat arrays"""
+
+    def __init__(self, vectorizer, engine, label_encoder, manifest):
+        self.vectorizer = vectorizer
+        self.engine = engine
+        self.label_encoder = label_encoder
+        self.manifest = manifest
+        self.checksum = None
+
+
+def _check_vectorizer(tfidf):
+    params = tfidf.get_params()
+    expected = {
+        'analyzer': 'word', 'ngram_range': (1, 1), 'binary': False, 'norm': 'l2',
+        'use_idf': True, 'sublinear_tf': False, 'strip_accents': None,
+        'preprocessor': None, 'tokenizer': None,
+    }
+    unsupported = {key: params[key] for key, value in expected.items() if params.get(key) != value}
+    if unsupported:
+        raise ValueError(f"Unsupported TfidfVectorizer settings for array export: {unsupported}")
+
+
+def serving_arrays(svc_model, tfidf, le, precision='float64'):
+    """
+    Flatten a pickled model set into the arrays needed for serving.
+
+    Args:
+        svc_model: Fitted OneVsRestClassifier(SVC())
+        tfidf: Fitted TfidfVectorizer
+        le: Fitted LabelEncoder
+        precision: Support vector storage, one of engine.PRECISIONS
+
+    Returns:
+        (manifest dict, {array name: ndarray})
+    """
+    _check_vectorizer(tfidf)
+    compiled = CompiledOvRSVC(svc_model).with_precision(precision)
+
+    terms = sorted(tfidf.vocabulary_)
+    arrays = {
+        'vocabulary_terms': np.array(terms),
+        'vocabulary_index': np.array([tfidf.vocabulary_[term] for term in terms], dtype=np.int64),
+        'idf': np.asarray(tfidf.idf_, dtype=np.float64),
+        'labels': np.array([str(label) for label in le.classes_]),
+        'classes': np.asarray(compiled.classes_),
+        'intercepts': compiled.intercepts,
+    }
+
+    groups = []
+    for i, (gamma, support_t, sq_norms, weights) in enumerate(compiled.groups):
+        arrays[f"group{i}_support_data"] = support_t.data
+        arrays[f"group{i}_support_indices"] = support_t.indices
+        arrays[f"group{i}_support_indptr"] = support_t.indptr
+        arrays[f"group{i}_sq_norms"] = sq_norms
+        arrays[f"group{i}_weights"] = weights
+        if compiled.support_scales is not None:
+            arrays[f"group{i}_support_scales"] = compiled.support_scales[i]
+        groups.append({'gamma': gamma, 'n_support': int(support_t.shape[1])})
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'vectorizer': {
+            'token_pattern': tfidf.token_pattern,
+            'lowercase': bool(tfidf.lowercase),
+            'n_features': int(len(tfidf.idf_)),
+        },
+        'engine': {'n_classes': int(len(compiled.intercepts)), 'precision': precision, 'groups': groups},
+    }
+    return manifest, {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+
+def _build_model(manifest, load):
+    if manifest.get('format') != FORMAT_NAME or manifest.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model arrays: {manifest.get('format')} v{manifest.get('version')}")
+
+    vectorizer_info = manifest['vectorizer']
+    vectorizer = ArrayTfidfVectorizer(
+        load('vocabulary_terms'), load('vocabulary_index'), load('idf'),
+        vectorizer_info['token_pattern'], vectorizer_info['lowercase'],
+    )
+
+    n_features = vectorizer_info['n_features']
+    # Exports written before reduced-precision storage are float64
+    precision = manifest['engine'].get('precision', 'float64')
+    groups, support_scales = [], []
+    for i, group in enumerate(manifest['engine']['groups']):
+        support_t = sp.csr_matrix(
+            (load(f"group{i}_support_data"), load(f"group{i}_support_indices"), load(f"group{i}_support_indptr")),
+            shape=(n_features, group['n_support']), copy=False,
+        )
+        groups.append((group['gamma'], support_t, load(f"group{i}_sq_norms"), load(f"group{i}_weights")))
+        if precision == 'int8':
+            support_scales.append(load(f"group{i}_support_scales"))
+    engine = CompiledOvRSVC.from_arrays(load('classes'), load('intercepts'), groups, precision,
+                                        support_scales if precision == 'int8' else None)
+
+    return ArrayModel(vectorizer, engine, ArrayLabelEncoder(load('labels')), manifest)
+
+
+def export_model_arrays(svc_model, tfidf, le, out_dir, precision='float64'):
+    """
+    Write the serving arrays of a pickled model set to out_dir as .npy files.
+
+    Returns:
+        The manifest dict written to manifest.json
+    """
+    manifest, arrays = serving_arrays(svc_model, tfidf, le, precision)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_model_arrays(model_dir, mmap=True):
+    """
+    Load an exported model directory.
+
+    Args:
+        model_dir: Directory written by export_model_arrays
+        mmap: Map the arrays read-only instead of reading them into private memory
+
+    Returns:
+        ArrayModel
+    """
+    with open(os.path.join(model_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    mmap_mode = 'r' if mmap else None
+
+    def load(name):
+        return np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    return _build_model(manifest, load)
+
+
+def write_bundle(svc_model, tfidf, le, path, precision='float64'):
+    """
+    Write the serving arrays of a pickled model set as one bundle file.
+
+    Layout: 8-byte magic, uint32 bundle version, uint32 header length, a JSON
+    header (manifest, array table, SHA-256 of the data section), then the raw
+    arrays, each aligned to BUNDLE_ALIGNMENT bytes so they can be mapped in place.
+
+    Returns:
+        The bundle header dict
+    """
+    manifest, arrays = serving_arrays(svc_model, tfidf, le, precision)
+
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset, 'nbytes': array.nbytes}
+        offset += array.nbytes
+
+    data = bytearray(offset)
+    for name, array in arrays.items():
+        entry = table[name]
+        data[entry['offset']:entry['offset'] + entry['nbytes']] = array.tobytes()
+
+    header = {'manifest': manifest, 'arrays': table, 'data_sha256': hashlib.sha256(data).hexdigest()}
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_offset = -(-(len(BUNDLE_MAGIC) + 8 + len(header_bytes)) // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+    with open(path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack('<II', BUNDLE_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_offset - f.tell()))
+        f.write(data)
+    return header
+
+
+def load_bundle(path, verify=True):
+    """
+    Map a bundle file read-only and build the model from views into it.
+
+    Args:
+        path: File written by write_bundle
+        verify: Check the SHA-256 of the data section before serving from it
+
+    Returns:
+        ArrayModel
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    prefix_size = len(BUNDLE_MAGIC) + 8
+    if buffer[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise ValueError(f"{path} is not a model bundle")
+    version, header_size = struct.unpack('<II', buffer[len(BUNDLE_MAGIC):prefix_size])
+    if version != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {version} in {path} (expected {BUNDLE_VERSION})")
+    header = json.loads(buffer[prefix_size:prefix_size + header_size])
+    data_offset = -(-(prefix_size + header_size) // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+    if verify:
+        digest = hashlib.sha256(memoryview(buffer)[data_offset:]).hexdigest()
+        if digest != header['data_sha256']:
+            raise ValueError(f"Checksum mismatch in {path}: bundle is corrupt or truncated")
+
+    def load(name):
+        entry = header['arrays'][name]
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_offset + entry['offset'])
+        return array.reshape(entry['shape'])
+
+    model = _build_model(header['manifest'], load)
+    model.checksum = header['data_sha256']
+    return model
+
+
+def worker_memory():
+    """RSS / PSS of the current process in MiB (Linux /proc/self/smaps_rollup)"""
+    fields = {'Rss': 'rss_mib', 'Pss': 'pss_mib', 'Shared_Clean': 'shared_clean_mib',
+              'Private_Clean': 'private_clean_mib', 'Private_Dirty': 'private_dirty_mib'}
+    memory = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    memory[fields[key]] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def precision_agreement(svc_model, tfidf, precision, dataset_path):
+    """Label agreement of the precision engine with the float64 engine on the Resume column of dataset_path"""
+    import csv
+
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+    reference = CompiledOvRSVC(svc_model)
+    X = FusedTfidfVectorizer.from_vectorizer(tfidf).transform(texts)
+    return label_agreement(reference, reference.with_precision(precision), X), len(texts)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('export', 'bundle') or (len(sys.argv) > 4 and sys.argv[4] not in PRECISIONS):
+        print("Usage: python model_store.py export|bundle [model_dir] [output] [precision]")
+        print("  export: Write flat .npy arrays to output (default: model_arrays)")
+        print("  bundle: Write a single bundle file to output (default: model.rsb)")
+        print("  model_dir: Directory holding clf.pkl, tfidf.pkl and encoder.pkl (default: .)")
+        print(f"  precision: Support vector storage, {' / '.join(PRECISIONS)} (default: float64)")
+        sys.exit(1)
+
+    import pickle
+
+    command = sys.argv[1]
+    model_dir = sys.argv[2] if len(sys.argv) > 2 else '.'
+    output = sys.argv[3] if len(sys.argv) > 3 else ('model_arrays' if command == 'export' else 'model.rsb')
+    precision = sys.argv[4] if len(sys.argv) > 4 else 'float64'
+    with open(os.path.join(model_dir, 'clf.pkl'), 'rb') as f:
+        svc_model = pickle.load(f)
+    with open(os.path.join(model_dir, 'tfidf.pkl'), 'rb') as f:
+        tfidf = pickle.load(f)
+    with open(os.path.join(model_dir, 'encoder.pkl'), 'rb') as f:
+        le = pickle.load(f)
+
+    dataset_path = os.path.join(model_dir, 'UpdatedResumeDataSet.csv')
+    if precision != 'float64' and os.path.exists(dataset_path):
+        agreement, n_resumes = precision_agreement(svc_model, tfidf, precision, dataset_path)
+        print(f"{precision} engine agrees with float64 on {agreement:.2%} of {n_resumes} resumes")
+        if agreement < MIN_PRECISION_AGREEMENT:
+            sys.exit(f"Refusing to export: agreement below {MIN_PRECISION_AGREEMENT:.1%}")
+
+    if command == 'export':
+        manifest = export_model_arrays(svc_model, tfidf, le, output, precision)
+        size = sum(os.path.getsize(os.path.join(output, name)) for name in os.listdir(output))
+    else:
+        manifest = write_bundle(svc_model, tfidf, le, output, precision)['manifest']
+        size = os.path.getsize(output)
+    pickle_size = sum(os.path.getsize(os.path.join(model_dir, name)) for name in ('clf.pkl', 'tfidf.pkl', 'encoder.pkl'))
+    print(f"Exported {manifest['vectorizer']['n_features']} features, "
+          f"{sum(g['n_support'] for g in manifest['engine']['groups'])} {precision} support vectors "
+          f"to {output} ({size / 1024 / 1024:.2f} MiB, pickles: {pickle_size / 1024 / 1024:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Page-parallel PDF text extraction with page and time limits.
+
+extract_text_from_pdf() used to append page after page to one string on the
+request thread. extract_pdf_text() collects the page texts in a list and joins
+them once, and documents with at least parallel_min_pages pages are split into
+contiguous page ranges that worker processes extract concurrently (each worker
+parses the PDF bytes itself).
+
+Every document gets a page limit and a wall-clock deadline. With worker
+processes, every document is parsed and extracted by them, however few pages it
+has. A document holds the workers it runs on until it is done, so a worker stuck
+anywhere past the deadline (in one page, or in building the PdfReader) is killed
+and replaced without failing the other documents being extracted. The workers
+are started with subprocess rather than forked: the server has threads by the
+time the first PDF arrives, and a fresh interpreter does not re-import the
+application's __main__ either. With workers=1 the calling thread extracts the
+document and can only check the deadline between pages.
+"""
+
+import io
+import os
+import sys
+import time
+import atexit
+import pickle
+import threading
+import subprocess
+import multiprocessing
+from multiprocessing.connection import wait
+
+# Extra time a worker gets to reach the next page boundary before it is killed
+TERMINATE_GRACE_S = 1.0
+
+_WORKER_COMMAND = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+                   f"import pdf_extract; pdf_extract._serve()")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PdfLimitError(ValueError):
+    """Raised when a PDF has too many pages or takes too long to extract"""
+
+
+def _reader(source):
+    import PyPDF2
+    if isinstance(source, (bytes, bytearray)):
+        return PyPDF2.PdfReader(io.BytesIO(source))
+    source.seek(0)
+    return PyPDF2.PdfReader(source)
+
+
+def _checked_reader(source, max_pages):
+    reader = _reader(source)
+    n_pages = len(reader.pages)
+    if max_pages and n_pages > max_pages:
+        raise PdfLimitError(f"PDF has {n_pages} pages (max {max_pages})")
+    return reader
+
+
+def _extract_pages(reader, start, stop, deadline):
+    texts = []
+    for page_number in range(start, stop):
+        if time.time() > deadline:
+            raise PdfLimitError(f"PDF extraction timed out after {page_number} pages")
+        texts.append(reader.pages[page_number].extract_text())
+    return texts
+
+
+def _extract_document(args):
+    """Worker process entry point: (page count, page texts), or no texts if the document is to be split"""
+    data, max_pages, parallel_min_pages, deadline = args
+    reader = _checked_reader(data, max_pages)
+    n_pages = len(reader.pages)
+    if n_pages >= parallel_min_pages:
+        return n_pages, None
+    return n_pages, _extract_pages(reader, 0, n_pages, deadline)
+
+
+def _extract_range(args):
+    """Worker process entry point: (page count, text of pages [start, stop)) of a PDF"""
+    data, max_pages, start, stop, deadline = args
+    reader = _checked_reader(data, max_pages)
+    n_pages = len(reader.pages)
+    return n_pages, _extract_pages(reader, start, min(stop, n_pages), deadline)
+
+
+def _serve():
+    """Worker process main loop: run the pickled (fn, args) calls read from stdin, answer on stdout"""
+    requests = sys.stdin.buffer
+    # Keep the real stdout for the answers; anything a parser prints goes to stderr
+    answers = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    while True:
+        try:
+            fn, args = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            answer = (True, fn(args))
+        except Exception as e:
+            answer = (False, e)
+        try:
+            data = pickle.dumps(answer)
+        except Exception:
+            data = pickle.dumps((False, RuntimeError(repr(answer[1]))))
+        answers.write(data)
+        answers.flush()
+
+
+class _Worker:
+    """One extraction process, fed one call at a time over its stdin / stdout pipes"""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, '-c', _WORKER_COMMAND],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def send(self, fn, args):
+        pickle.dump((fn, args), self.process.stdin)
+        self.process.stdin.flush()
+
+    def receive(self):
+        """The result of the call sent last, or the exception it raised"""
+        ok, value = pickle.load(self.process.stdout)
+        if not ok:
+            raise value
+        return value
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class _WorkerPool:
+    """
+    Extraction processes lent to one document at a time.
+
+    A document borrows one worker (waiting for one until its deadline) plus any
+    others that are idle, and gives them back when it is done; a worker that
+    overran the deadline or died is killed and replaced instead.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._idle = [_Worker() for _ in range(workers)]
+        self._available = threading.Condition()
+
+    def acquire(self, n, deadline):
+        """Between 1 and n workers: waits until the deadline for the first, takes the others only if idle"""
+        with self._available:
+            while not self._idle:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._available.wait(remaining):
+                    raise PdfLimitError("PDF extraction timed out waiting for a worker")
+            borrowed, self._idle = self._idle[:n], self._idle[n:]
+        return borrowed
+
+    def release(self, workers):
+        with self._available:
+            self._idle.extend(workers)
+            self._available.notify(len(workers))
+
+    def discard(self, workers):
+        """Kill workers that are stuck or dead, and start their replacements"""
+        for worker in workers:
+            worker.kill()
+        self.release([_Worker() for _ in workers])
+
+    def shutdown(self):
+        with self._available:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.workers != workers:
+            if _pool is None:
+                atexit.register(shutdown)
+            else:
+                _pool.shutdown()
+            _pool = _WorkerPool(workers)
+        return _pool
+
+
+def _source_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    # Worker processes parse the document themselves, so they need its bytes
+    source.seek(0)
+    return source.read()
+
+
+def _run_in_pool(fn, tasks, deadline, workers):
+    """fn over tasks on the worker processes, killing those that are not done by the deadline"""
+    pool = _get_pool(workers)
+    idle = pool.acquire(len(tasks), deadline)
+    queued = list(enumerate(tasks))
+    running = {}
+    results = [None] * len(tasks)
+    try:
+        while queued or running:
+            while queued and idle:
+                worker = idle.pop()
+                i, task = queued.pop(0)
+                try:
+                    worker.send(fn, task)
+                except OSError:
+                    pool.discard([worker])
+                    raise RuntimeError("PDF extraction worker exited") from None
+                running[worker.process.stdout] = (worker, i)
+            ready = wait(list(running), timeout=max(0.0, deadline - time.time()) + TERMINATE_GRACE_S)
+            if not ready:
+                raise PdfLimitError("PDF extraction timed out")
+            for stdout in ready:
+                worker, i = running.pop(stdout)
+                try:
+                    results[i] = worker.receive()
+                except (EOFError, pickle.UnpicklingError):
+                    pool.discard([worker])
+                    raise RuntimeError("PDF extraction worker exited") from None
+                finally:
+                    # Also when the extraction raised (page limit, deadline): the worker itself is fine
+                    if worker.process.returncode is None:
+                        idle.append(worker)
+        return results
+    finally:
+        # Workers still extracting this document (stuck, or their result is no longer needed)
+        if running:
+            pool.discard([worker for worker, _ in running.values()])
+        pool.release(idle)
+
+
+def _use_pool(workers):
+    # Already in a worker process (e.g. EXTRACTION_POOL=process): extract inline instead of forking again
+    return workers > 1 and multiprocessing.parent_process() is None
+
+
+def extract_pdf_text(source, max_pages=300, timeout_s=20.0, workers=1, parallel_min_pages=16, info=None):
+    """
+    Extract the text of a PDF, page texts concatenated in order.
+
+    Args:
+        source: PDF file bytes, or a seekable binary file that is read in place
+        max_pages: Reject documents with more pages (0 disables the limit)
+        timeout_s: Wall-clock budget for the whole document
+        workers: Worker processes shared by all documents (1 extracts in the calling thread)
+        parallel_min_pages: Smallest page count split across the worker processes
+        info: Optional dict that receives the page count ("pages")
+
+    Raises:
+        PdfLimitError: The page limit or the deadline was exceeded
+    """
+    deadline = time.time() + timeout_s
+    if not _use_pool(workers):
+        reader = _checked_reader(source, max_pages)
+        n_pages = len(reader.pages)
+        if info is not None:
+            info["pages"] = n_pages
+        return ''.join(_extract_pages(reader, 0, n_pages, deadline))
+
+    data = _source_bytes(source)
+    [(n_pages, texts)] = _run_in_pool(_extract_document, [(data, max_pages, parallel_min_pages, deadline)],
+                                      deadline, workers)
+    if info is not None:
+        info["pages"] = n_pages
+    if texts is None:
+        n_ranges = min(workers, n_pages)
+        ranges = [(data, max_pages, i * n_pages // n_ranges, (i + 1) * n_pages // n_ranges, deadline)
+                  for i in range(n_ranges)]
+        texts = [text for _, chunk in _run_in_pool(_extract_range, ranges, deadline, workers) for text in chunk]
+    return ''.join(texts)
+
+
+def iter_pdf_pages(source, max_pages=300, timeout_s=20.0, workers=1):
+    """
+    Page texts of a PDF in order, each extracted only when it is consumed.
+
+    Same limits as extract_pdf_text; used by progressive classification, which
+    may stop reading after the first pages. With worker processes the pages are
+    extracted by them in windows of 1, 2, 4, ... pages.
+    """
+    deadline = time.time() + timeout_s
+    if _use_pool(workers):
+        data = _source_bytes(source)
+        start, window, n_pages = 0, 1, None
+        while n_pages is None or start < n_pages:
+            [(n_pages, texts)] = _run_in_pool(_extract_range, [(data, max_pages, start, start + window, deadline)],
+                                              deadline, workers)
+            yield from texts
+            start, window = start + window, window * 2
+        return
+
+    reader = _checked_reader(source, max_pages)
+    for page_number in range(len(reader.pages)):
+        if time.time() > deadline:
+            raise PdfLimitError(f"PDF extraction timed out after {page_number} pages")
+        yield reader.pages[page_number].extract_text()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,132 @@
+"""
+Progressive classification with early exit on long documents.
+
+A long resume usually states its field on the first page, yet the API extracts,
+vectorizes and scores every page before classifying it. classify_progressive()
+consumes a document's pages (or paragraphs / lines) lazily: once an initial word
+budget has been read the partial text is scored, and if the gap between the two
+highest one-vs-rest decision scores is at least min_margin the top class is
+returned without reading the rest. Otherwise the budget grows by `growth` and
+more pages are read.
+
+The text read is tokenized once, into running term counts, so a scoring costs
+one TF-IDF row built from the counts and one decision function call rather than
+re-vectorizing the prefix read so far. Even so, one scoring can cost more than
+reading a whole short document, so a partial scoring is skipped (and tried again
+after the next chunk) while it would bring the time spent on partial scorings
+above max_overhead times the time spent reading. A document that never clears
+the margin therefore takes at most (1 + max_overhead) times as long as a full
+read, plus the per-chunk bookkeeping.
+
+It is then scored on the counts of its full text, which gives exactly the
+full-document prediction: text is only tokenized up to its last whitespace
+character and the partial word after it is carried over to the next scoring, so
+no word or URL is split at a chunk boundary.
+"""
+
+import time
+
+import numpy as np
+
+from engine import last_argmax
+
+# Running estimate of the duration of one scoring, shared by all documents
+_scoring_seconds = 0.0
+
+
+def top_two_margin(scores):
+    """Gap between the highest and second highest decision score of each row"""
+    top_two = np.partition(scores, -2, axis=1)[:, -2:]
+    return top_two[:, 1] - top_two[:, 0]
+
+
+def _split_last_word(text):
+    """(text up to and including its last whitespace character, the partial word after it)"""
+    if not text or text[-1].isspace():
+        return text, ''
+    tail = text.rsplit(None, 1)[-1]
+    return text[:len(text) - len(tail)], tail
+
+
+def _timed(fn, *args):
+    global _scoring_seconds
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _scoring_seconds = elapsed if not _scoring_seconds else 0.8 * _scoring_seconds + 0.2 * elapsed
+    return result, elapsed
+
+
+def classify_progressive(chunks, term_ids, score_counts, n_features, classes, initial_words=300,
+                         min_margin=0.5, growth=2.0, max_overhead=0.25):
+    """
+    Classify a document from as few of its chunks as the margin allows.
+
+    Args:
+        chunks: Text pieces in document order whose concatenation is the full text; consumed lazily
+        term_ids: fn(text) -> vocabulary index of every term of a text
+        score_counts: fn(counts) -> decision scores of shape (1, n_classes) for per-feature term counts
+        n_features: Vocabulary size
+        classes: Label of each score column
+        initial_words: Words read before the first scoring
+        min_margin: Top-two score gap at which the partial text's prediction is returned
+        growth: Factor the word budget grows by after each inconclusive scoring
+        max_overhead: Most time spent on partial scorings, as a fraction of the time spent reading
+
+    Returns:
+        dict with the label, its margin, whether it exited early, and the chunks,
+        words and scorings it took
+    """
+    counts = np.zeros(n_features, dtype=np.int64)
+    # Chunks read since the last scoring, and the partial word carried over from before them
+    pending = []
+    tail = ''
+    chunks_read = 0
+    words = 0
+    budget = initial_words
+    scorings = 0
+    scored_chunks = 0
+    label, margin = None, None
+    start = time.perf_counter()
+    scoring_seconds = 0.0
+
+    def absorb():
+        """Add the pending chunks, up to their last whitespace character, to the term counts"""
+        nonlocal pending, tail
+        text, tail = _split_last_word(tail + ''.join(pending))
+        pending = []
+        if text:
+            counts[:] += np.bincount(np.asarray(term_ids(text), dtype=np.int64), minlength=n_features)
+
+    def score():
+        current = counts
+        if tail:
+            current = counts + np.bincount(np.asarray(term_ids(tail), dtype=np.int64), minlength=n_features)
+        scores = score_counts(current)
+        return classes[last_argmax(scores)[0]], float(top_two_margin(scores)[0])
+
+    for chunk in chunks:
+        chunks_read += 1
+        words += len(chunk.split())
+        pending.append(chunk)
+        if words < budget:
+            continue
+        reading_seconds = time.perf_counter() - start - scoring_seconds
+        if scoring_seconds + _scoring_seconds > max_overhead * reading_seconds:
+            continue
+        absorb()
+        (label, margin), elapsed = _timed(score)
+        scorings += 1
+        scoring_seconds += elapsed
+        scored_chunks = chunks_read
+        if margin >= min_margin:
+            return {"label": label, "margin": margin, "early_exit": True,
+                    "chunks_read": chunks_read, "words_read": words, "scorings": scorings}
+        budget = max(budget * growth, words + 1)
+
+    if scored_chunks != chunks_read or label is None:
+        absorb()
+        (label, margin), _ = _timed(score)
+        scorings += 1
+    return {"label": label, "margin": margin, "early_exit": False,
+            "chunks_read": chunks_read, "words_read": words, "scorings": scorings}
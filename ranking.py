@@ -0,0 +1,95 @@
+"""
+Bounded top-k ranking of a resume pool against one category.
+
+/rank answers "the 50 best DevOps Engineer candidates out of these 20,000
+resumes" in a single call. The pool (a JSON list, a streamed NDJSON body or a
+server-side corpus file) is read one chunk at a time, each chunk is vectorized
+and scored as a batch, and only the k best (score, position) pairs are kept in
+a min-heap, so memory depends on k and the chunk size, not on the pool size.
+"""
+
+import csv
+import heapq
+import json
+import os
+
+CORPUS_EXTENSIONS = ('.csv', '.jsonl', '.ndjson')
+
+
+class TopK:
+    """
+    The k highest-scoring pool items seen so far.
+
+    Ties keep the item that came first in the pool.
+    """
+
+    def __init__(self, k):
+        self.k = max(1, int(k))
+        self.seen = 0
+        self._heap = []
+
+    def push_many(self, scores, ids, predicted):
+        """Offer one scored chunk: a score, an id and a predicted class per item, in pool order"""
+        heap = self._heap
+        for score, item_id, label in zip(scores, ids, predicted):
+            # -position: of two equal scores the later item is the smaller entry
+            entry = (float(score), -self.seen, item_id, label)
+            self.seen += 1
+            if len(heap) < self.k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    def results(self):
+        """[(position, id, score, predicted class)], best first"""
+        return [(-neg_position, item_id, score, label)
+                for score, neg_position, item_id, label in sorted(self._heap, reverse=True)]
+
+
+def parse_pool_line(line):
+    """(id, text) from an NDJSON line holding a JSON string or an object with "text" and optional "id" """
+    item = json.loads(line)
+    if isinstance(item, str):
+        return None, item
+    if isinstance(item, dict) and isinstance(item.get('text'), str):
+        return item.get('id'), item['text']
+    raise ValueError('Each line must be a JSON string or an object with a "text" string')
+
+
+async def aiter_ndjson(byte_stream):
+    """(id, text) pairs from an async iterator of NDJSON body chunks, one line at a time"""
+    pending = b''
+    async for data in byte_stream:
+        pending += data
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield parse_pool_line(line)
+    if pending.strip():
+        yield parse_pool_line(pending)
+
+
+def corpus_path(corpus_dir, name):
+    """Path of a corpus file directly inside corpus_dir, or None if there is no such corpus"""
+    if not corpus_dir or os.path.basename(name) != name or not name.endswith(CORPUS_EXTENSIONS):
+        return None
+    path = os.path.join(corpus_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def iter_corpus(path):
+    """
+    (id, text) pairs of a corpus file, read lazily.
+
+    CSV files need a "Resume" column (an "ID" column, if present, gives the
+    ids); .jsonl / .ndjson files use the NDJSON body format.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row.get('ID'), row['Resume']
+    else:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield parse_pool_line(line)
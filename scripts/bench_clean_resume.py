@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass normalizer against the original cleanResume.
+
+Cleans every resume in UpdatedResumeDataSet.csv with both implementations,
+repeating the whole dataset a few times, and reports the best time per pass,
+throughput and per-resume latency for short and long resumes.
+"""
+
+import os
+import sys
+import csv
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textnorm import clean_resume, legacy_clean_resume
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def best_time(fn, texts, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main():
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else 'UpdatedResumeDataSet.csv'
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    texts = load_resumes(dataset_path)
+    n_chars = sum(len(text) for text in texts)
+    by_length = sorted(texts, key=len)
+    groups = {'all': texts, 'shortest 10%': by_length[:len(texts) // 10], 'longest 10%': by_length[-(len(texts) // 10):]}
+    print(f"{len(texts)} resumes, {n_chars / 1e6:.2f}M characters, best of {repeats}")
+
+    for group, group_texts in groups.items():
+        legacy = best_time(legacy_clean_resume, group_texts, repeats)
+        single_pass = best_time(clean_resume, group_texts, repeats)
+        print(f"\n{group} ({len(group_texts)} resumes, avg {sum(map(len, group_texts)) / len(group_texts):.0f} chars)")
+        for name, seconds in (('seven re.sub', legacy), ('single pass', single_pass)):
+            print(f"  {name:>12}: {seconds * 1000:8.1f}ms  {seconds / len(group_texts) * 1e6:8.1f}us/resume  "
+                  f"{sum(map(len, group_texts)) / seconds / 1e6:6.1f}M chars/s")
+        print(f"  speedup: {legacy / single_pass:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
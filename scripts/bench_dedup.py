@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Throughput and recall of near-duplicate detection (dedup.py) on UpdatedResumeDataSet.csv.
+
+- throughput: MinHash signatures plus LSH grouping of every resume, next to
+  classifying them with pred_batch();
+- recall / precision: every pair of resumes whose exact shingle Jaccard
+  similarity is at least the threshold is a true duplicate pair; a pair is
+  found when LSHIndex.query returns it. Pairs are counted over all resumes, so
+  the dataset's exact copies weigh in as well;
+- synthetic near duplicates of distinct resumes (changed phone number and
+  e-mail, a few edited words, an added template header and footer), which the
+  dataset does not contain;
+- a whole-dataset batch classified as is and collapsed to one representative
+  per group, and how often the copied categories agree with classifying every
+  resume.
+
+Usage: python scripts/bench_dedup.py [threshold]
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+
+import numpy as np
+import scipy.sparse as sp
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from dedup import LSHIndex, MinHasher, collapse_duplicates, shingle_hashes
+
+SYNTHETIC = 200
+
+
+def shingle_matrix(texts, shingle_size):
+    """Binary CSR rows of each text's distinct shingles"""
+    columns, rows = {}, []
+    for text in texts:
+        rows.append(sorted({columns.setdefault(h, len(columns)) for h in shingle_hashes(text, shingle_size).tolist()}))
+    indptr = np.concatenate([[0], np.cumsum([len(row) for row in rows])])
+    indices = np.fromiter((column for row in rows for column in row), dtype=np.int64, count=indptr[-1])
+    return sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=(len(texts), len(columns)))
+
+
+def true_pairs(texts, shingle_size, threshold):
+    """{(i, j)} with i < j whose exact shingle Jaccard similarity is at least threshold"""
+    X = shingle_matrix(texts, shingle_size)
+    sizes = np.asarray(X.sum(axis=1)).ravel()
+    overlap = sp.triu(X @ X.T, k=1).tocoo()
+    union = sizes[overlap.row] + sizes[overlap.col] - overlap.data
+    keep = overlap.data >= threshold * np.maximum(union, 1)
+    return set(zip(overlap.row[keep].tolist(), overlap.col[keep].tolist()))
+
+
+def found_pairs(texts, hasher, threshold):
+    """{(i, j)} with i < j that an LSHIndex of every text reports as near duplicates"""
+    index = LSHIndex(threshold, hasher.num_perm)
+    signatures = [hasher.signature(text) for text in texts]
+    for i, signature in enumerate(signatures):
+        index.add(i, signature)
+    pairs = set()
+    for i, signature in enumerate(signatures):
+        pairs.update((min(i, j), max(i, j)) for j, _ in index.query(signature) if j != i)
+    return pairs
+
+
+def jaccard(text, other, shingle_size):
+    a = set(shingle_hashes(text, shingle_size).tolist())
+    b = set(shingle_hashes(other, shingle_size).tolist())
+    return len(a & b) / max(len(a | b), 1)
+
+
+def variants(text, rng):
+    """(kind, near duplicate of text) for each kind of edit"""
+    words = text.split()
+    edited = list(words)
+    for _ in range(max(1, len(words) // 100)):
+        position = rng.randrange(len(edited))
+        edited[position] = rng.choice(['experienced', 'skilled', 'proficient', 'team'])
+    return [
+        ('contact details', f"Phone: +91 98{rng.randrange(10 ** 8):08d} Email: candidate{rng.randrange(1000)}@example.com\n" + text),
+        ('1% of words edited', ' '.join(edited)),
+        ('template header/footer', f"CURRICULUM VITAE\n{text}\nDeclaration: I hereby declare that the above information is true."),
+    ]
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.8
+    os.environ.setdefault('INFERENCE_QUEUE', '100000')
+    import app
+
+    with open(os.path.join(ROOT_DIR, 'UpdatedResumeDataSet.csv'), newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+    hasher = MinHasher(app.DEDUP_NUM_PERM, app.DEDUP_SHINGLE_SIZE)
+    index = LSHIndex(threshold, hasher.num_perm)
+    print(f"{len(texts)} resumes, {len(set(texts))} distinct texts; threshold {threshold}, "
+          f"{hasher.num_perm} hashes, {hasher.shingle_size}-word shingles, {index.bands} bands x {index.rows} rows")
+
+    app.pred_batch(texts[:10])
+    start_time = time.perf_counter()
+    representatives = collapse_duplicates(texts, hasher, threshold)
+    dedup_s = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    categories = app.pred_batch(texts)
+    classify_s = time.perf_counter() - start_time
+    print(f"\nThroughput: dedup {len(texts) / dedup_s:8.0f} resumes/s   classification {len(texts) / classify_s:8.0f} resumes/s")
+
+    expected, found = true_pairs(texts, hasher.shingle_size, threshold), found_pairs(texts, hasher, threshold)
+    hits = len(expected & found)
+    print(f"\nPairs at Jaccard >= {threshold}: {len(expected)}   found {len(found)}   "
+          f"recall {hits / max(len(expected), 1):.4f}   precision {hits / max(len(found), 1):.4f}")
+    groups = len(set(representatives))
+    print(f"Groups: {groups} (dataset has {len(set(texts))} distinct texts)")
+
+    rng = random.Random(0)
+    distinct = sorted(set(texts))
+    sample = rng.sample(distinct, min(SYNTHETIC, len(distinct)))
+    print(f"\nSynthetic near duplicates of {len(sample)} distinct resumes")
+    base_index = LSHIndex(threshold, hasher.num_perm)
+    for i, text in enumerate(distinct):
+        base_index.add(i, hasher.signature(text))
+    by_kind = {}
+    for text in sample:
+        original = distinct.index(text)
+        for kind, variant in variants(text, rng):
+            similarity = jaccard(text, variant, hasher.shingle_size)
+            matched = any(key == original for key, _ in base_index.query(hasher.signature(variant)))
+            by_kind.setdefault(kind, []).append((similarity, matched))
+    for kind, outcomes in by_kind.items():
+        similarities = np.array([similarity for similarity, _ in outcomes])
+        eligible = [matched for similarity, matched in outcomes if similarity >= threshold]
+        print(f"  {kind:<24} Jaccard median {np.median(similarities):.3f}   "
+              f"{len(eligible)}/{len(outcomes)} at >= {threshold}, recall {np.mean(eligible) if eligible else float('nan'):.3f}   "
+              f"matched overall {np.mean([matched for _, matched in outcomes]):.3f}")
+
+    start_time = time.perf_counter()
+    representatives = collapse_duplicates(texts, hasher, threshold)
+    unique = sorted(set(representatives))
+    unique_categories = dict(zip(unique, app.pred_batch([texts[i] for i in unique])))
+    collapsed = [unique_categories[representative] for representative in representatives]
+    collapse_s = time.perf_counter() - start_time
+    agreement = np.mean([a == b for a, b in zip(collapsed, categories)])
+    print(f"\nWhole dataset as one batch: classify all {classify_s * 1000:7.1f} ms   "
+          f"collapse + classify {len(unique)} {collapse_s * 1000:7.1f} ms ({classify_s / collapse_s:.1f}x)   "
+          f"same categories {agreement:.4f}")
+
+
+if __name__ == "__main__":
+    main()
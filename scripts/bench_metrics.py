@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Overhead of the /metrics instrumentation (metrics.py).
+
+Times, per call: a histogram sample, a timed stage (the `with
+metrics_registry.stage(...)` blocks in app.py), and MetricsMiddleware around a
+trivial ASGI app against the same app without it (two gauge updates, one
+histogram sample, the route lookup and the wrapped send). Then it renders a
+registry holding every endpoint / stage series.
+
+Usage: python scripts/bench_metrics.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import REQUEST_SECONDS, MetricsMiddleware, MetricsRegistry
+
+RUNS = 200000
+ROUTES = ['/predict', '/predict/text', '/predict/batch', '/rank', '/similar', '/health', '/stats', '/metrics']
+
+
+class Route:
+    """Stand-in for a Starlette route: a fixed path"""
+
+    def __init__(self, path):
+        self.path = path
+        self.path_regex = __import__('re').compile(f"^{path}$")
+
+
+async def trivial_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+def per_call_us(fn, runs=RUNS):
+    fn()
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start_time) / runs * 1e6
+
+
+async def per_request_us(asgi_app, runs):
+    scope = {'type': 'http', 'method': 'POST', 'path': '/predict/text', 'headers': []}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    await asgi_app(scope, receive, send)
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        await asgi_app(scope, receive, send)
+    return (time.perf_counter() - start_time) / runs * 1e6
+
+
+def main():
+    registry = MetricsRegistry()
+    disabled = MetricsRegistry(enabled=False)
+    labels = ('/predict/text', 'POST', '200')
+
+    def timed_stage(target):
+        with target.stage('vectorize'):
+            pass
+
+    print(f"{'':<34} {'per call':>10}")
+    print(f"{'histogram sample':<34} {per_call_us(lambda: registry.observe(REQUEST_SECONDS, labels, 0.0123)):>7.2f} us")
+    print(f"{'timed stage':<34} {per_call_us(lambda: timed_stage(registry)):>7.2f} us")
+    print(f"{'timed stage (METRICS_ENABLED=0)':<34} {per_call_us(lambda: timed_stage(disabled)):>7.2f} us")
+
+    routes = [Route(path) for path in ROUTES]
+    bare = asyncio.run(per_request_us(trivial_app, RUNS // 4))
+    wrapped = asyncio.run(per_request_us(MetricsMiddleware(trivial_app, registry, routes), RUNS // 4))
+    print(f"{'ASGI request, no middleware':<34} {bare:>7.2f} us")
+    print(f"{'ASGI request, MetricsMiddleware':<34} {wrapped:>7.2f} us   (+{wrapped - bare:.2f} us)")
+
+    for path in ROUTES:
+        for status in ('200', '422', '500'):
+            registry.observe(REQUEST_SECONDS, (path, 'POST', status), 0.01)
+    for stage in ('extract', 'clean', 'vectorize', 'tfidf_transform', 'svc', 'fast_tier', 'dedup'):
+        with registry.stage(stage, 'pdf' if stage == 'extract' else ''):
+            pass
+    render_ms = per_call_us(registry.render, 200) / 1000
+    print(f"{'render /metrics':<34} {render_ms:>7.2f} ms  ({len(registry.render().splitlines())} lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare /predict/text throughput with and without micro-batching.
+
+The API runs in-process behind an ASGI transport, and a fixed number of
+concurrent clients replay resumes from UpdatedResumeDataSet.csv. Each mode
+reports requests/sec, latency percentiles and the batch sizes achieved.
+"""
+
+import os
+import sys
+import csv
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Queue every request instead of shedding load with 503s, and send every request to
+# the model: the replayed texts would otherwise be served from the prediction cache
+os.environ.setdefault('INFERENCE_QUEUE', '100000')
+os.environ.setdefault('CACHE_ENABLED', '0')
+
+import httpx
+
+import app
+from batching import MicroBatcher
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_load(texts, concurrency, total_requests):
+    latencies = []
+    counter = iter(range(total_requests))
+    transport = httpx.ASGITransport(app=app.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                start_time = time.perf_counter()
+                response = await client.post("/predict/text", json={"resume_text": texts[i % len(texts)]})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start_time
+
+    return elapsed, latencies
+
+
+def bench_microbatch(dataset_path, concurrency=100, total_requests=2000, window_ms=5.0, max_batch_size=32):
+    """
+    Run the same load with batching disabled and enabled.
+
+    Args:
+        dataset_path: CSV file with a Resume column
+        concurrency: Number of concurrent clients
+        total_requests: Requests sent per mode
+        window_ms: Micro-batching window
+        max_batch_size: Micro-batching maximum batch size
+    """
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+
+    modes = {
+        'unbatched': None,
+        'microbatched': MicroBatcher(app.pred_batch, window_ms, max_batch_size),
+    }
+    for name, batcher in modes.items():
+        app.batcher = batcher
+        elapsed, latencies = asyncio.run(run_load(texts, concurrency, total_requests))
+        print(f"\n{name} ({concurrency} concurrent clients, {total_requests} requests)")
+        print(f"  Throughput: {total_requests / elapsed:.1f} req/s")
+        print(f"  Latency p50: {percentile(latencies, 50) * 1000:.2f}ms  "
+              f"p95: {percentile(latencies, 95) * 1000:.2f}ms  "
+              f"p99: {percentile(latencies, 99) * 1000:.2f}ms")
+        if batcher is not None:
+            stats = batcher.stats()
+            print(f"  Batches: {stats['batches']}  mean size: {stats['mean_batch_size']}  "
+                  f"max size: {stats['max_batch_size_seen']}")
+            print(f"  Flush reasons: {stats['flush_reasons']}")
+
+
+def main():
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else 'UpdatedResumeDataSet.csv'
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    total_requests = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    bench_microbatch(dataset_path, concurrency, total_requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction: the original page-by-page `text +=` loop against
+pdf_extract.extract_pdf_text on the calling thread and across worker processes.
+
+Runs on NetworkSecurityEng_Resume.pdf, health_fitness_resume.pdf and synthetic
+PDFs of 50, 100 and 200 pages built by repeating the pages of those two. Every
+method must return the same text. Page-parallel speedup is bounded by the CPU
+count printed first. The page and time limits are exercised at the end.
+"""
+
+import os
+import io
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2
+
+import pdf_extract
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDFS = ['NetworkSecurityEng_Resume.pdf', 'health_fitness_resume.pdf']
+
+
+def legacy_extract(data):
+    """The original extract_text_from_pdf"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    text = ''
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text
+
+
+def synthetic_pdf(n_pages):
+    """PDF bytes with n_pages pages cycling through the pages of the sample resumes"""
+    pages = [page for name in SAMPLE_PDFS for page in PyPDF2.PdfReader(os.path.join(ROOT_DIR, name)).pages]
+    writer = PyPDF2.PdfWriter()
+    for i in range(n_pages):
+        writer.add_page(pages[i % len(pages)])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def best_time(fn, data, repeats):
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(2, min(4, os.cpu_count() or 1))
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"CPUs available: {len(os.sched_getaffinity(0))}, page workers: {workers}, best of {repeats}")
+
+    documents = {name: open(os.path.join(ROOT_DIR, name), 'rb').read() for name in SAMPLE_PDFS}
+    for n_pages in (50, 100, 200):
+        documents[f"synthetic {n_pages} pages"] = synthetic_pdf(n_pages)
+
+    methods = {
+        'text += (original)': legacy_extract,
+        'join, 1 thread': lambda data: pdf_extract.extract_pdf_text(data, max_pages=0, workers=1),
+        f"join, {workers} processes": lambda data: pdf_extract.extract_pdf_text(
+            data, max_pages=0, workers=workers, parallel_min_pages=1),
+    }
+    # Start the worker processes before timing
+    methods[f"join, {workers} processes"](documents[SAMPLE_PDFS[0]])
+
+    mismatches = 0
+    for name, data in documents.items():
+        n_pages = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+        print(f"\n{name} ({n_pages} pages, {len(data) / 1024:.0f} KiB)")
+        baseline, expected = None, None
+        for method, extract in methods.items():
+            seconds, text = best_time(extract, data, repeats)
+            if baseline is None:
+                baseline, expected = seconds, text
+            elif text != expected:
+                mismatches += 1
+                print(f"  {method}: text differs from the original")
+            print(f"  {method:>20}: {seconds * 1000:8.1f}ms  {n_pages / seconds:6.1f} pages/s  {baseline / seconds:5.2f}x")
+
+    big = documents['synthetic 200 pages']
+    for label, kwargs in (('page limit (max 100)', {'max_pages': 100}),
+                          ('deadline (0.5 s, 1 thread)', {'timeout_s': 0.5, 'workers': 1}),
+                          (f"deadline (0.5 s, {workers} processes)", {'timeout_s': 0.5, 'workers': workers})):
+        start_time = time.perf_counter()
+        try:
+            pdf_extract.extract_pdf_text(big, **kwargs)
+            print(f"\n{label}: not enforced")
+            mismatches += 1
+        except pdf_extract.PdfLimitError as e:
+            print(f"\n{label}: rejected after {(time.perf_counter() - start_time) * 1000:.0f}ms ({e})")
+
+    pdf_extract.shutdown()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark /rank against one /predict/text-style prediction per resume.
+
+A pool of POOL_SIZE resumes is built by cycling through UpdatedResumeDataSet.csv.
+The per-resume baseline calls pred() in-process (no HTTP), so it is a lower
+bound for what a client looping over /predict/text pays, and it still returns
+labels only. /rank is called through the ASGI app with a JSON body, a streamed
+NDJSON body and a server-side corpus. Finally the peak Python memory
+(tracemalloc) of ranking a streamed pool is shown for growing pool sizes: it
+depends on k and RANK_CHUNK_SIZE, not on the pool size.
+
+Usage: python scripts/bench_rank.py [pool_size] [k]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+import tempfile
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+CATEGORY = 'DevOps Engineer'
+MEMORY_POOL_SIZES = [2000, 10000, 40000]
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def pool_texts(resumes, pool_size):
+    return (resumes[i % len(resumes)] for i in range(pool_size))
+
+
+def ndjson_chunks(resumes, pool_size, chunk_lines=256):
+    lines = []
+    for i, text in enumerate(pool_texts(resumes, pool_size)):
+        lines.append(json.dumps({"id": f"resume-{i}", "text": text}))
+        if len(lines) == chunk_lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def main():
+    pool_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    corpus_dir = tempfile.mkdtemp()
+    os.environ['RANK_CORPUS_DIR'] = corpus_dir
+    os.environ.setdefault('INFERENCE_QUEUE', '100000')
+    import app
+    from fastapi.testclient import TestClient
+
+    resumes = load_resumes(os.path.join(ROOT_DIR, 'UpdatedResumeDataSet.csv'))
+    with open(os.path.join(corpus_dir, 'pool.jsonl'), 'wb') as f:
+        for chunk in ndjson_chunks(resumes, pool_size):
+            f.write(chunk)
+    client = TestClient(app.app)
+    params = {'category': CATEGORY, 'k': k}
+    print(f"Pool: {pool_size} resumes, top {k} for {CATEGORY!r}, RANK_CHUNK_SIZE={app.RANK_CHUNK_SIZE}")
+
+    start_time = time.perf_counter()
+    for text in pool_texts(resumes, pool_size):
+        app.pred(text)
+    baseline = time.perf_counter() - start_time
+    print(f"{'pred() per resume (labels only)':<36} {baseline:>8.2f} s  {pool_size / baseline:>9.0f} resumes/s")
+
+    runs = [
+        ('/rank JSON body', lambda: client.post('/rank', params=params, json={'resume_texts': list(pool_texts(resumes, pool_size))})),
+        ('/rank NDJSON stream', lambda: client.post('/rank', params=params, content=ndjson_chunks(resumes, pool_size),
+                                                    headers={'content-type': 'application/x-ndjson'})),
+        ('/rank server-side corpus', lambda: client.post('/rank', params={**params, 'corpus': 'pool.jsonl'})),
+    ]
+    top_ids = None
+    for label, run in runs:
+        start_time = time.perf_counter()
+        response = run()
+        elapsed = time.perf_counter() - start_time
+        response.raise_for_status()
+        result = response.json()
+        ids = [item['index'] for item in result['results']]
+        top_ids = top_ids or ids
+        print(f"{label:<36} {elapsed:>8.2f} s  {pool_size / elapsed:>9.0f} resumes/s  "
+              f"{baseline / elapsed:>5.1f}x  same top {k}: {ids == top_ids}")
+
+    print("\nPeak traced memory while ranking a streamed pool")
+    for size in MEMORY_POOL_SIZES:
+        async def items():
+            for i, text in enumerate(pool_texts(resumes, size)):
+                yield i, text
+
+        tracemalloc.start()
+        asyncio.run(app.rank_pool(items(), 0, k))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {size:>6} resumes: {peak / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
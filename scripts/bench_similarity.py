@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Build-time, query-latency and memory benchmark of the similarity index.
+
+Synthetic TF-IDF rows are generated in the fitted vectorizer's space: terms are
+drawn in proportion to their document frequency in UpdatedResumeDataSet.csv,
+the number of distinct terms per document follows UpdatedResumeDataSet.csv, and
+rows are L2-normalized like tfidf.transform output. For each index size the
+script reports:
+
+- build: time to add every document and save the index, postings size on disk
+  and the RSS it added;
+- query: latency of QUERIES real resumes (k=10) against the saved index opened
+  memory-mapped, as the API opens it, and whether the top-k scores match a full
+  sparse product (checked while the in-memory index still exists);
+- updates: adding and removing 1,000 documents;
+- the brute-force Python cosine loop, timed on the smallest index and scaled
+  linearly to the others.
+
+Usage: python scripts/bench_similarity.py [sizes, e.g. 1000,100000,1000000]
+"""
+
+import os
+import sys
+import csv
+import time
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from similarity import SimilarityIndex
+from textnorm import clean_resume
+
+QUERIES = 200
+K = 10
+CHUNK_DOCS = 50000
+UPDATE_DOCS = 1000
+
+
+def rss_mib():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class SyntheticResumes:
+    """TF-IDF rows shaped like the dataset's, in the fitted vectorizer's feature space"""
+
+    def __init__(self, tfidf, dataset_rows, seed=0):
+        self.idf = tfidf.idf_.astype(np.float32)
+        # +1 so terms the dataset never uses can still be drawn
+        df = np.bincount(dataset_rows.indices, minlength=len(self.idf)) + 1.0
+        self.term_p = df / df.sum()
+        self.row_nnz = np.diff(dataset_rows.indptr)
+        self.rng = np.random.default_rng(seed)
+
+    def rows(self, n_docs):
+        nnz = self.rng.choice(self.row_nnz, n_docs)
+        terms = self.rng.choice(len(self.idf), int(nnz.sum()), p=self.term_p)
+        counts = self.rng.geometric(0.5, len(terms)).astype(np.float32)
+        indptr = np.concatenate([[0], np.cumsum(nnz)])
+        X = sp.csr_matrix((counts * self.idf[terms], terms, indptr), shape=(n_docs, len(self.idf)))
+        X.sum_duplicates()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        return sp.csr_matrix(sp.diags(1 / np.maximum(norms, 1e-12)) @ X, dtype=np.float32)
+
+
+def python_cosine_loop(doc_dicts, query):
+    """The brute-force baseline: a dict dot product per document, then a full sort"""
+    query = dict(zip(query.indices.tolist(), query.data.tolist()))
+    scores = []
+    for doc_id, doc in enumerate(doc_dicts):
+        scores.append((sum(weight * doc.get(term, 0.0) for term, weight in query.items()), doc_id))
+    scores.sort(reverse=True)
+    return scores[:K]
+
+
+def bench_size(n_docs, generator, queries, python_loop_ms):
+    index_dir = tempfile.mkdtemp()
+    try:
+        rss_before = rss_mib()
+        index = SimilarityIndex(len(generator.idf))
+        rows_for_check = []
+        generate_s = 0.0
+        start_time = time.perf_counter()
+        for start in range(0, n_docs, CHUNK_DOCS):
+            size = min(CHUNK_DOCS, n_docs - start)
+            generate_start = time.perf_counter()
+            X = generator.rows(size)
+            generate_s += time.perf_counter() - generate_start
+            if n_docs <= 100000:
+                rows_for_check.append(X)
+            index.add([f"doc-{start + i}" for i in range(size)], X)
+        index.save(index_dir)
+        build_s = time.perf_counter() - start_time - generate_s
+        build_rss = rss_mib() - rss_before
+        stats = index.stats()
+        disk_mib = sum(os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir)) / 1024 / 1024
+
+        exact = None
+        if rows_for_check:
+            X = sp.vstack(rows_for_check).tocsr()
+            exact = True
+            for query in queries[:20]:
+                found = index.search(query, K)
+                expected = np.sort((X @ query.T).toarray().ravel())[::-1][:K] / np.sqrt(query.multiply(query).sum())
+                exact &= np.allclose([score for _, score in found], expected, atol=1e-5)
+            del X
+        del index, rows_for_check
+
+        index = SimilarityIndex.load(index_dir)
+        latencies = []
+        for query in queries:
+            start_time = time.perf_counter()
+            index.search(query, K)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+        update_rows = generator.rows(UPDATE_DOCS)
+        start_time = time.perf_counter()
+        index.add([f"new-{i}" for i in range(UPDATE_DOCS)], update_rows)
+        index.search(queries[0], K)
+        add_ms = (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        index.remove([f"doc-{i}" for i in range(0, n_docs, max(1, n_docs // UPDATE_DOCS))][:UPDATE_DOCS])
+        remove_ms = (time.perf_counter() - start_time) * 1000
+
+        print(f"\n{n_docs:,} documents: {stats['postings']:,} postings in {stats['segments']} segment(s)")
+        print(f"  build + save {build_s:8.2f} s   ({n_docs / build_s:,.0f} docs/s, generation excluded)")
+        print(f"  memory       {disk_mib:8.1f} MiB on disk / memory-mapped, build added {build_rss:.0f} MiB RSS")
+        print(f"  query k={K}   p50 {np.percentile(latencies, 50):7.2f} ms   p95 {np.percentile(latencies, 95):7.2f} ms"
+              f"   top-k matches full product: {exact if exact is not None else 'not checked'}")
+        print(f"  Python cosine loop ~{python_loop_ms * n_docs / 1000:,.0f} ms per query (scaled from 1,000 documents)")
+        print(f"  add {UPDATE_DOCS} docs {add_ms:7.1f} ms   remove {UPDATE_DOCS} docs {remove_ms:7.1f} ms")
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1000, 100000, 1000000]
+
+    with open(os.path.join(ROOT_DIR, 'tfidf.pkl'), 'rb') as f:
+        tfidf = pickle.load(f)
+    with open(os.path.join(ROOT_DIR, 'UpdatedResumeDataSet.csv'), newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+    dataset_rows = tfidf.transform([clean_resume(text) for text in texts])
+    queries = [dataset_rows[i] for i in np.random.default_rng(1).choice(len(texts), QUERIES)]
+    generator = SyntheticResumes(tfidf, dataset_rows)
+
+    sample = generator.rows(1000)
+    doc_dicts = [dict(zip(sample[i].indices.tolist(), sample[i].data.tolist())) for i in range(1000)]
+    start_time = time.perf_counter()
+    for query in queries[:20]:
+        python_cosine_loop(doc_dicts, query)
+    python_loop_ms = (time.perf_counter() - start_time) / 20 * 1000
+
+    print(f"Vocabulary: {len(tfidf.idf_)} terms, mean {np.diff(dataset_rows.indptr).mean():.0f} terms per resume")
+    for n_docs in sizes:
+        bench_size(n_docs, generator, queries, python_loop_ms)
+
+
+if __name__ == "__main__":
+    main()
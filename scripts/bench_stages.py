@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of each serving stage on its own, with a regression check.
+
+Stages: cleanResume, extract_text_from_pdf / _docx / _txt, tfidf.transform,
+the fused vectorizer, svc_model.predict (the original dense path) and the
+compiled engine. Every stage runs on a small, a median and a large input:
+
+- text stages: the resumes of UpdatedResumeDataSet.csv at the 10th and 50th
+  length percentiles and the longest one;
+- PDF: the two bundled resumes (smaller and larger) and a 20-page PDF made of
+  their pages;
+- DOCX / TXT: the same three dataset resumes written as a document / UTF-8 file.
+
+Each case is called until --min-time has elapsed (at least MIN_RUNS calls),
+timing every call, and reports ops/sec and p50 / p95 / p99 latency. A second,
+short pass under tracemalloc records the peak memory allocated by one call and
+what it leaves allocated (Python objects and numpy arrays; libsvm's own
+buffers are not traced). PDF extraction runs on the calling thread
+(PDF_PAGE_WORKERS=1).
+
+Results are written as JSON (--output). Every case's p50 is compared with the
+baseline's and the run exits with status 1 if one is more than --threshold
+slower. The default baseline, scripts/bench_stages_baseline.json, is committed
+and was recorded with --save-baseline on the reference machine described in its
+"meta" (printed next to this machine's before the comparison); re-record it when
+the reference machine changes. A missing baseline is an error too, checked
+before anything is timed, so a run without one fails instead of passing without
+a comparison.
+
+Usage:
+    python scripts/bench_stages.py [--stages clean_resume,extract_pdf,...] [--min-time S]
+                                   [--output FILE] [--baseline FILE] [--save-baseline] [--threshold 0.25]
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Time extraction on the calling thread and load the models before timing anything
+os.environ.setdefault('PDF_PAGE_WORKERS', '1')
+os.environ.setdefault('STARTUP_MODE', 'eager')
+
+import numpy as np
+
+SIZES = ('small', 'median', 'large')
+SAMPLE_PDFS = ['NetworkSecurityEng_Resume.pdf', 'health_fitness_resume.pdf']
+LARGE_PDF_PAGES = 20
+MIN_RUNS = 5
+MAX_RUNS = 20000
+ALLOC_RUNS = 3
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'scripts', 'bench_stages_baseline.json')
+
+
+def dataset_texts():
+    """Dataset resumes at the 10th / 50th length percentile and the longest, by size"""
+    with open(os.path.join(ROOT_DIR, 'UpdatedResumeDataSet.csv'), newline='', encoding='utf-8') as f:
+        texts = sorted({row['Resume'] for row in csv.DictReader(f)}, key=len)
+    return {'small': texts[len(texts) // 10], 'median': texts[len(texts) // 2], 'large': texts[-1]}
+
+
+def pdf_documents():
+    import PyPDF2
+
+    samples = sorted((open(os.path.join(ROOT_DIR, name), 'rb').read() for name in SAMPLE_PDFS), key=len)
+    pages = [page for data in samples for page in PyPDF2.PdfReader(io.BytesIO(data)).pages]
+    writer = PyPDF2.PdfWriter()
+    for i in range(LARGE_PDF_PAGES):
+        writer.add_page(pages[i % len(pages)])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return {'small': samples[0], 'median': samples[-1], 'large': buffer.getvalue()}
+
+
+def docx_bytes(text):
+    import docx
+
+    document = docx.Document()
+    for line in text.splitlines() or ['']:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def build_cases(app, stages):
+    """{stage: {size: (description, zero-argument callable)}}"""
+    texts = dataset_texts()
+    cleaned = {size: app.cleanResume(text) for size, text in texts.items()}
+    rows = {size: app.tfidf.transform([text]) for size, text in cleaned.items()}
+    describe = lambda text: f"{len(text)} chars"
+    cases = {}
+    if 'clean_resume' in stages:
+        cases['clean_resume'] = {size: (describe(text), lambda text=text: app.cleanResume(text)) for size, text in texts.items()}
+    if 'extract_pdf' in stages:
+        pdfs = pdf_documents()
+        cases['extract_pdf'] = {
+            size: (f"{len(data) / 1024:.0f} KiB", lambda data=data: app.extract_text_from_pdf(io.BytesIO(data)))
+            for size, data in pdfs.items()
+        }
+    if 'extract_docx' in stages:
+        documents = {size: docx_bytes(text) for size, text in texts.items()}
+        cases['extract_docx'] = {
+            size: (f"{len(data) / 1024:.0f} KiB", lambda data=data: app.extract_text_from_docx(io.BytesIO(data)))
+            for size, data in documents.items()
+        }
+    if 'extract_txt' in stages:
+        encoded = {size: text.encode('utf-8') for size, text in texts.items()}
+        cases['extract_txt'] = {
+            size: (f"{len(data) / 1024:.1f} KiB", lambda data=data: app.extract_text_from_txt(io.BytesIO(data)))
+            for size, data in encoded.items()
+        }
+    if 'tfidf_transform' in stages:
+        cases['tfidf_transform'] = {
+            size: (describe(text), lambda text=text: app.tfidf.transform([text])) for size, text in cleaned.items()
+        }
+    if 'fused_vectorize' in stages and app.fused_vectorizer is not None:
+        cases['fused_vectorize'] = {
+            size: (describe(text), lambda text=text: app.fused_vectorizer.transform([text])) for size, text in texts.items()
+        }
+    if 'svc_predict' in stages and app.svc_model is not None:
+        cases['svc_predict'] = {
+            size: (f"{row.nnz} terms", lambda row=row: app.svc_model.predict(row.toarray())) for size, row in rows.items()
+        }
+    if 'engine_predict' in stages and app.engine is not None:
+        cases['engine_predict'] = {
+            size: (f"{row.nnz} terms", lambda row=row: app.engine.predict(row)) for size, row in rows.items()
+        }
+    return cases
+
+
+STAGES = ('clean_resume', 'extract_pdf', 'extract_docx', 'extract_txt', 'tfidf_transform', 'fused_vectorize',
+          'svc_predict', 'engine_predict')
+
+
+def measure(fn, min_time):
+    fn()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while (len(times) < MIN_RUNS or time.perf_counter() < deadline) and len(times) < MAX_RUNS:
+        start_time = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start_time)
+    times = np.asarray(times) * 1e6
+
+    tracemalloc.start()
+    peaks, retained = [], []
+    for _ in range(ALLOC_RUNS):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+        del result
+    tracemalloc.stop()
+
+    return {
+        "runs": len(times),
+        "ops_per_sec": round(1e6 / float(times.mean()), 2),
+        "mean_us": round(float(times.mean()), 2),
+        "p50_us": round(float(np.percentile(times, 50)), 2),
+        "p95_us": round(float(np.percentile(times, 95)), 2),
+        "p99_us": round(float(np.percentile(times, 99)), 2),
+        "alloc_peak_kib": round(min(peaks) / 1024, 1),
+        "alloc_retained_kib": round(min(retained) / 1024, 1),
+    }
+
+
+def cpu_model():
+    """Processor model name (platform.processor() is empty on most Linux systems)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def describe_machine(meta):
+    return (f"{meta.get('cpu', '?')}, {meta.get('cpus', '?')} CPU(s), {meta.get('platform', '?')}, "
+            f"Python {meta.get('python', '?')}")
+
+
+def compare(results, meta, baseline, threshold):
+    """Print p50 against the baseline; returns the cases more than threshold slower"""
+    regressions = []
+    print(f"\nAgainst the baseline of {baseline['meta'].get('created_at', '?')} (threshold +{threshold:.0%} on p50)")
+    print(f"  baseline machine: {describe_machine(baseline['meta'])}")
+    print(f"  this machine:     {describe_machine(meta)}")
+    for stage, sizes in results.items():
+        for size, result in sizes.items():
+            reference = baseline['results'].get(stage, {}).get(size)
+            if reference is None:
+                print(f"  {stage:<16} {size:<7} not in the baseline")
+                continue
+            change = result['p50_us'] / reference['p50_us'] - 1
+            flag = 'REGRESSION' if change > threshold else ''
+            print(f"  {stage:<16} {size:<7} {reference['p50_us']:>10.1f} -> {result['p50_us']:>10.1f} us  {change:>+7.1%}  {flag}")
+            if change > threshold:
+                regressions.append(f"{stage}/{size}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the serving stages with a baseline comparison")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--min-time', type=float, default=0.5, help="Seconds spent timing each case (default: 0.5)")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare with (default: scripts/bench_stages_baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results to --baseline instead of comparing")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Fail when a p50 is this much slower than the baseline (default: 0.25)")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        sys.exit(f"Unknown stages: {', '.join(unknown)} (expected among {', '.join(STAGES)})")
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; record one on the reference machine with --save-baseline")
+
+    os.chdir(ROOT_DIR)
+    import app
+    import sklearn
+
+    if app.model_load_error:
+        sys.exit(f"Models failed to load: {app.model_load_error}")
+    cases = build_cases(app, stages)
+
+    results = {}
+    print(f"{'stage':<16} {'size':<7} {'input':>10} {'ops/s':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'peak alloc':>11}")
+    for stage, sizes in cases.items():
+        results[stage] = {}
+        for size in SIZES:
+            description, fn = sizes[size]
+            result = dict(measure(fn, args.min_time), input=description)
+            results[stage][size] = result
+            print(f"{stage:<16} {size:<7} {description:>10} {result['ops_per_sec']:>10.1f} {result['p50_us']:>8.1f}us "
+                  f"{result['p95_us']:>8.1f}us {result['p99_us']:>8.1f}us {result['alloc_peak_kib']:>7.1f} KiB")
+
+    report = {
+        "meta": {
+            "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scikit_learn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu": cpu_model(),
+            "cpus": len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+            "model_version": app.model_version,
+            "inference_mode": app.INFERENCE_MODE,
+            "min_time_s": args.min_time,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, report['meta'], json.load(f), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
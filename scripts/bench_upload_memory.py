@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Report the peak RSS each /predict upload adds to the API process.
+
+The API is started with uvicorn (one worker, caches off) from the repository
+root or from the directory given as the second argument, e.g. a `git worktree`
+of an older commit, to compare ingestion strategies. Before every request the
+process's peak RSS counter is reset through /proc/<pid>/clear_refs; afterwards
+VmHWM minus the RSS before the request is the memory that request needed.
+Uploads: a large TXT resume, a PDF padded with an 8 MiB attachment (as
+scanned portfolios are) and the same PDF sent by several clients at once.
+Linux only, and clear_refs needs permission to write to the process.
+"""
+
+import io
+import os
+import sys
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import PyPDF2
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_status(pid):
+    status = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                status[key] = int(value.split()[0]) / 1024
+    return status
+
+
+def reset_peak(pid):
+    with open(f"/proc/{pid}/clear_refs", 'w') as f:
+        f.write('5')
+
+
+def padded_pdf(pad_bytes):
+    """A sample resume with a random attachment, so the file is large but the text is not"""
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(os.path.join(ROOT_DIR, 'NetworkSecurityEng_Resume.pdf')).pages:
+        writer.add_page(page)
+    writer.add_attachment('portfolio.bin', os.urandom(pad_bytes))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def measure(pid, base_url, filename, data, clients):
+    reset_peak(pid)
+    time.sleep(0.2)
+    before = read_status(pid)['VmRSS']
+    start_time = time.perf_counter()
+
+    def post(_):
+        return requests.post(f"{base_url}/predict", files={'file': (filename, data)}, timeout=300).status_code
+
+    with ThreadPoolExecutor(clients) as pool:
+        codes = list(pool.map(post, range(clients)))
+    elapsed = time.perf_counter() - start_time
+    return read_status(pid)['VmHWM'] - before, elapsed, codes
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8790
+    app_dir = os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else ROOT_DIR
+
+    env = dict(os.environ, CACHE_ENABLED='0', PYTHONPATH=app_dir)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(port)],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{base_url}/health", timeout=5).json().get('status') == 'healthy':
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(1)
+        else:
+            raise RuntimeError("API did not become healthy")
+
+        resume = open(os.path.join(ROOT_DIR, 'NetworkSecurityEng_Resume.pdf'), 'rb').read()
+        text = PyPDF2.PdfReader(io.BytesIO(resume)).pages[0].extract_text().encode('utf-8')
+        uploads = [
+            ('resume.pdf (sample)', 'resume.pdf', resume, 1),
+            ('resume.txt (8 MiB)', 'resume.txt', (text * (8 * 1024 * 1024 // len(text) + 1))[:8 * 1024 * 1024], 1),
+            ('portfolio.pdf (8 MiB)', 'portfolio.pdf', padded_pdf(8 * 1024 * 1024), 1),
+            ('portfolio.pdf x 8 clients', 'portfolio.pdf', padded_pdf(8 * 1024 * 1024), 8),
+            ('portfolio.pdf (24 MiB)', 'portfolio.pdf', padded_pdf(24 * 1024 * 1024), 1),
+        ]
+        # Warm up parsers and inference so their one-off allocations are not attributed to a request
+        measure(server.pid, base_url, 'resume.pdf', resume, 1)
+
+        print(f"App: {app_dir}")
+        print(f"{'upload':<28} {'size MiB':>9} {'peak +RSS MiB':>14} {'seconds':>8}  status")
+        for label, filename, data, clients in uploads:
+            peak, elapsed, codes = measure(server.pid, base_url, filename, data, clients)
+            print(f"{label:<28} {len(data) / 1024 / 1024:>9.1f} {peak:>14.1f} {elapsed:>8.2f}  {sorted(set(codes))}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Check that the single-pass normalizer reproduces the original cleanResume.
+
+Every resume in UpdatedResumeDataSet.csv is cleaned with textnorm.clean_resume
+and with the original seven re.sub calls (textnorm.legacy_clean_resume), then
+random strings built from the characters the patterns care about (URLs, RT,
+cc, hashtags, mentions, punctuation, Unicode whitespace and non-ASCII text)
+are compared the same way. Any difference fails the run.
+"""
+
+import os
+import sys
+import csv
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textnorm import clean_resume, legacy_clean_resume
+
+FUZZ_PIECES = [
+    'h', 't', 'p', 's', 'R', 'T', 'c', 'C', 'x', '#', '@', '?', '/', ':', '.', '-',
+    ' ', '\t', '\n', '\r', '\x0b', '\x1c', '\x85', '\xa0', ' ', '　', 'é', '•', '\U0001f600',
+    'http', 'https://x.io/a ', 'RT', 'cc', '#tag', '@user',
+]
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def compare(texts, label):
+    """Number of texts whose normalized forms differ (the first few are printed)"""
+    mismatches = 0
+    for i, text in enumerate(texts):
+        expected, actual = legacy_clean_resume(text), clean_resume(text)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  {label} {i}: {text[:80]!r}\n    expected {expected[:80]!r}\n    got      {actual[:80]!r}")
+    print(f"{label}: {len(texts)} texts, {mismatches} mismatches")
+    return mismatches
+
+
+def fuzz_texts(count, seed=0, max_pieces=16):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(FUZZ_PIECES) for _ in range(rng.randint(0, max_pieces))) for _ in range(count)]
+
+
+def main():
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else 'UpdatedResumeDataSet.csv'
+    fuzz_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    mismatches = compare(load_resumes(dataset_path), 'dataset')
+    mismatches += compare(fuzz_texts(fuzz_count), 'fuzz')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Check that the fused vectorizer reproduces tfidf.transform(cleanResume(x)).
+
+Every resume in UpdatedResumeDataSet.csv is vectorized by the original
+pipeline (the seven-pass cleanResume, then the pickled TfidfVectorizer), by
+model_store.FusedTfidfVectorizer straight from raw text and by the flat-array
+ArrayTfidfVectorizer on cleaned text, one document at a time and as one batch.
+Rows must match exactly (same indices, bit-identical values); any difference
+fails the run. Timings for each pipeline are printed at the end.
+"""
+
+import os
+import sys
+import csv
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import app
+from model_store import ArrayTfidfVectorizer, FusedTfidfVectorizer
+from textnorm import clean_resume, legacy_clean_resume
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def count_mismatches(expected, actual):
+    """Rows of two CSR matrices that differ in structure or in any value bit"""
+    expected.sort_indices()
+    actual.sort_indices()
+    mismatches = 0
+    for i in range(expected.shape[0]):
+        a, b = slice(expected.indptr[i], expected.indptr[i + 1]), slice(actual.indptr[i], actual.indptr[i + 1])
+        if not (np.array_equal(expected.indices[a], actual.indices[b]) and np.array_equal(expected.data[a], actual.data[b])):
+            mismatches += 1
+    return mismatches
+
+
+def timed(fn, *args):
+    start_time = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else 'UpdatedResumeDataSet.csv'
+    if app.model_load_error or app.svc_model is None:
+        raise RuntimeError(f"Pickled models not loaded (MODEL_FORMAT=pickle required): {app.model_load_error}")
+    tfidf = app.tfidf
+    resumes = load_resumes(dataset_path)
+    print(f"Checking {len(resumes)} resumes from {dataset_path}")
+
+    fused = FusedTfidfVectorizer.from_vectorizer(tfidf)
+    terms = sorted(tfidf.vocabulary_)
+    arrays = ArrayTfidfVectorizer(np.array(terms), np.array([tfidf.vocabulary_[t] for t in terms]), tfidf.idf_)
+    pipelines = {
+        'seven re.sub + sklearn': lambda docs: tfidf.transform([legacy_clean_resume(doc) for doc in docs]),
+        'single pass + sklearn': lambda docs: tfidf.transform([clean_resume(doc) for doc in docs]),
+        'single pass + arrays': lambda docs: arrays.transform([clean_resume(doc) for doc in docs]),
+        'fused': fused.transform,
+    }
+
+    expected = None
+    mismatches = 0
+    timings = {}
+    for name, transform in pipelines.items():
+        batch, batch_seconds = timed(transform, resumes)
+        single_seconds = 0.0
+        single_rows = []
+        for doc in resumes:
+            row, seconds = timed(transform, [doc])
+            single_rows.append(row)
+            single_seconds += seconds
+        timings[name] = (batch_seconds, single_seconds)
+
+        if expected is None:
+            expected = batch
+            continue
+        batch_mismatches = count_mismatches(expected, batch)
+        single_mismatches = sum(count_mismatches(expected[i], row) for i, row in enumerate(single_rows))
+        print(f"{name:>24}: {batch_mismatches} batch / {single_mismatches} per-document mismatches")
+        mismatches += batch_mismatches + single_mismatches
+
+    print(f"\nMismatches: {mismatches}")
+    baseline_batch, baseline_single = timings['seven re.sub + sklearn']
+    for name, (batch_seconds, single_seconds) in timings.items():
+        print(f"{name:>24}: batch {batch_seconds * 1000:7.1f}ms ({baseline_batch / batch_seconds:4.1f}x)  "
+              f"per document {single_seconds / len(resumes) * 1e6:7.1f}us ({baseline_single / single_seconds:4.1f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
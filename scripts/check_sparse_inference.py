@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Check that the sparse inference engines reproduce the original dense predictions.
+
+Every resume in UpdatedResumeDataSet.csv is classified through the original
+tfidf.transform(...).toarray() + svc_model.predict path and through each
+engine in engine.py (per-estimator sparse and compiled one-vs-rest). Any
+mismatch fails the run.
+"""
+
+import os
+import sys
+import csv
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from engine import CompiledOvRSVC, SparseOvRSVC
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def check_sparse_inference(dataset_path):
+    """
+    Compare dense and sparse predictions over a dataset.
+
+    Args:
+        dataset_path: CSV file with a Resume column
+
+    Returns:
+        Number of mismatching predictions across all engines
+    """
+    if app.model_load_error:
+        raise RuntimeError(f"Models not loaded: {app.model_load_error}")
+    svc_model, tfidf = app.svc_model, app.tfidf
+
+    build_start = time.perf_counter()
+    compiled_model = CompiledOvRSVC(svc_model)
+    n_total = sum(e.support_vectors_.shape[0] for e in svc_model.estimators_ if hasattr(e, 'support_vectors_'))
+    print(f"Compiled engine: {compiled_model.n_support} distinct support vectors (from {n_total}) "
+          f"in {(time.perf_counter() - build_start) * 1000:.0f}ms")
+    predictors = {
+        'dense': lambda vector: svc_model.predict(vector.toarray()),
+        'sparse': SparseOvRSVC(svc_model).predict,
+        'compiled': compiled_model.predict,
+    }
+
+    resumes = [app.cleanResume(text) for text in load_resumes(dataset_path)]
+    print(f"Checking {len(resumes)} resumes from {dataset_path}")
+
+    times = {name: [] for name in predictors}
+    mismatches = 0
+    for i, text in enumerate(resumes):
+        vector = tfidf.transform([text])
+        labels = {}
+        for name, predict in predictors.items():
+            start_time = time.perf_counter()
+            labels[name] = predict(vector)[0]
+            times[name].append(time.perf_counter() - start_time)
+
+        for name in ('sparse', 'compiled'):
+            if labels[name] != labels['dense']:
+                mismatches += 1
+                print(f"  Row {i}: dense={labels['dense']} {name}={labels[name]}")
+
+    print(f"\nMismatches: {mismatches}")
+    for name, samples in times.items():
+        print(f"{name:>8} predict: {sum(samples) / len(samples) * 1000:.3f}ms avg")
+    return mismatches
+
+
+def main():
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else 'UpdatedResumeDataSet.csv'
+    mismatches = check_sparse_inference(dataset_path)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
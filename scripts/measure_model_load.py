@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure local cold-start cost and model size for each MODEL_FORMAT and STARTUP_MODE.
+
+Every run starts a fresh Python interpreter that imports app.py, as on a Lambda
+cold start, and reports the time until the import returns (when the ASGI app
+can answer /ping), the time until the models are ready, the model load time
+recorded by app.py and whether scikit-learn ended up imported. With
+STARTUP_MODE=eager both times are the same; with STARTUP_MODE=lazy the models
+load on a background thread. Sizes compare the three pickle files with the bundle.
+"""
+
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - start) * 1000
+app.models_ready.wait()
+print(json.dumps({
+    "import_ms": import_ms,
+    "ready_ms": (time.perf_counter() - start) * 1000,
+    "model_load_ms": app.model_load_ms,
+    "error": app.model_load_error,
+    "sklearn_imported": "sklearn" in sys.modules,
+}))
+"""
+
+
+def measure(model_format, startup_mode, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=ROOT_DIR, capture_output=True, text=True,
+            env=dict(os.environ, MODEL_FORMAT=model_format, STARTUP_MODE=startup_mode), check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if result['error']:
+            raise RuntimeError(f"MODEL_FORMAT={model_format} failed to load: {result['error']}")
+        samples.append(result)
+    return samples
+
+
+def file_size_mib(*paths):
+    return sum(os.path.getsize(os.path.join(ROOT_DIR, path)) for path in paths) / 1024 / 1024
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    formats = sys.argv[2].split(',') if len(sys.argv) > 2 else ['pickle', 'bundle']
+    startup_modes = sys.argv[3].split(',') if len(sys.argv) > 3 else ['eager', 'lazy']
+
+    print(f"Model size: pickles {file_size_mib('clf.pkl', 'tfidf.pkl', 'encoder.pkl'):.2f} MiB", end='')
+    if os.path.exists(os.path.join(ROOT_DIR, 'model.rsb')):
+        print(f", bundle {file_size_mib('model.rsb'):.2f} MiB")
+    else:
+        print(" (no model.rsb, run `python model_store.py bundle` first)")
+
+    for model_format in formats:
+        for startup_mode in startup_modes:
+            samples = measure(model_format, startup_mode, runs)
+            print(f"\nMODEL_FORMAT={model_format} STARTUP_MODE={startup_mode} ({runs} cold imports)")
+            for key, label in (('import_ms', 'import app'), ('ready_ms', 'models ready'), ('model_load_ms', 'model load')):
+                print(f"  {label + ':':<14}median {statistics.median(s[key] for s in samples):.1f}ms  "
+                      f"max {max(s[key] for s in samples):.1f}ms")
+            print(f"  scikit-learn imported: {samples[0]['sklearn_imported']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Agreement and latency of the fast tier (fast_tier.py) against the SVC in clf.pkl.
+
+Agreement is measured on resumes the tier never saw: the distinct resumes of
+UpdatedResumeDataSet.csv are split 80/20, a tier is distilled from the 80% (plus
+their augmented variants), and its labels are compared with the SVC's on the
+held-out 20% and on augmented variants of them (partial and noisy resumes). For
+"auto", the share of resumes escalated to the SVC is shown for several
+FAST_TIER_MARGIN values. Latency is the in-process time to vectorize and score
+one resume (like /predict/text) and a batch of BATCH resumes, with the SVC
+engine and with the tier built by `python fast_tier.py build` (or, if there is
+none, one distilled from the whole dataset).
+
+Usage: python scripts/report_fast_tier.py
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from fast_tier import LinearTier, augment, distill
+from progressive import top_two_margin
+
+MARGINS = [0.0, 0.25, 0.5, 1.0, 1.5]
+SINGLE_RUNS = 500
+BATCH = 256
+
+
+def per_call_ms(fn, runs):
+    fn()
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start_time) / runs * 1000
+
+
+def main():
+    os.chdir(ROOT_DIR)
+    import app
+    from engine import last_argmax
+
+    with open('UpdatedResumeDataSet.csv', newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+    teacher = app.engine
+    distinct = sorted(set(texts))
+    random.Random(0).shuffle(distinct)
+    split = int(len(distinct) * 0.8)
+    train_texts, held_out = distinct[:split], distinct[split:]
+
+    X_train = app.vectorize(train_texts + augment(train_texts))
+    tier = distill(X_train, teacher.decision_function(X_train), teacher.classes_)
+    print(f"Distilled from {len(train_texts)} distinct resumes + augmented variants ({X_train.shape[0]} rows)")
+
+    print(f"\nAgreement with the SVC on {len(held_out)} held-out distinct resumes")
+    for label, evaluation in [('held-out resumes', held_out), ('held-out augmented', augment(held_out, rounds=2, seed=1))]:
+        X = app.vectorize(evaluation)
+        expected = teacher.predict(X)
+        scores = tier.decision_function(X)
+        fast = tier.classes_[last_argmax(scores)]
+        print(f"  {label:<20} {len(evaluation):>5} resumes   fast {np.mean(fast == expected):.4f}")
+        margins = top_two_margin(scores)
+        for margin in MARGINS:
+            escalated = margins < margin
+            auto = np.where(escalated, expected, fast)
+            print(f"    auto, margin {margin:<4}  agreement {np.mean(auto == expected):.4f}   escalated {np.mean(escalated):6.1%}")
+
+    full_tier = LinearTier.load(app.FAST_TIER_PATH) if os.path.exists(app.FAST_TIER_PATH) else None
+    if full_tier is None:
+        X_all = app.vectorize(distinct + augment(distinct))
+        full_tier = distill(X_all, teacher.decision_function(X_all), teacher.classes_)
+    X_dataset = app.vectorize(texts)
+    print(f"\nFull tier on the {len(texts)} dataset resumes (seen in training): "
+          f"agreement {np.mean(full_tier.predict(X_dataset) == teacher.predict(X_dataset)):.4f}")
+
+    sample = texts[:BATCH]
+    X_one, X_batch = app.vectorize(sample[:1]), app.vectorize(sample)
+    rows = [
+        ('vectorize', lambda: app.vectorize(sample[:1]), lambda: app.vectorize(sample)),
+        ('SVC score', lambda: teacher.predict(X_one), lambda: teacher.predict(X_batch)),
+        ('fast score', lambda: full_tier.predict(X_one), lambda: full_tier.predict(X_batch)),
+        ('SVC total', lambda: teacher.predict(app.vectorize(sample[:1])), lambda: teacher.predict(app.vectorize(sample))),
+        ('fast total', lambda: full_tier.predict(app.vectorize(sample[:1])), lambda: full_tier.predict(app.vectorize(sample))),
+    ]
+    print(f"\nLatency ({teacher.n_support} support vectors, {full_tier.n_features} features)")
+    print(f"  {'':<12} {'1 resume':>12} {f'batch of {BATCH}':>16}")
+    for label, single, batch in rows:
+        print(f"  {label:<12} {per_call_ms(single, SINGLE_RUNS):>9.3f} ms {per_call_ms(batch, 20):>13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
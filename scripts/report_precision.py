@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Agreement, memory and latency of the compiled engine per support vector precision.
+
+For each of engine.PRECISIONS, the float64 engine built from clf.pkl is
+converted (CompiledOvRSVC.with_precision) and compared with it on the resumes
+of UpdatedResumeDataSet.csv: label agreement (the check ENGINE_PRECISION and
+`python model_store.py export ... PRECISION` apply) and the largest absolute
+decision value difference. Memory is the bytes held by the engine's arrays and
+the size of a `model_store.py export` at that precision; latency is the
+in-process time to score one pre-vectorized resume and a batch of BATCH.
+
+Usage: python scripts/report_precision.py
+"""
+
+import os
+import sys
+import csv
+import time
+import tempfile
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from engine import PRECISIONS, label_agreement
+
+SINGLE_RUNS = 1000
+BATCH = 256
+
+
+def per_call_ms(fn, runs):
+    fn()
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start_time) / runs * 1000
+
+
+def export_mib(precision):
+    import app
+    import model_store
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        model_store.export_model_arrays(app.svc_model, app.tfidf, app.le, out_dir, precision)
+        return sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)) / 1024 / 1024
+
+
+def main():
+    os.chdir(ROOT_DIR)
+    import app
+
+    if app.engine is None or getattr(app.engine, 'precision', None) != 'float64':
+        sys.exit("Needs the pickled model with INFERENCE_MODE=compiled and ENGINE_PRECISION=float64")
+    with open('UpdatedResumeDataSet.csv', newline='', encoding='utf-8') as f:
+        texts = [row['Resume'] for row in csv.DictReader(f)]
+    X = app.vectorize(texts)
+    reference = app.engine
+    reference_scores = reference.decision_function(X)
+    X_one, X_batch = X[:1], X[:BATCH]
+
+    print(f"{reference.n_support} support vectors, {X.shape[1]} features, {len(texts)} resumes")
+    print(f"\n{'precision':<10} {'agreement':>9} {'max |diff|':>11} {'engine':>10} {'export':>10} "
+          f"{'1 resume':>10} {f'batch of {BATCH}':>14}")
+    for precision in PRECISIONS:
+        engine = reference.with_precision(precision)
+        agreement = label_agreement(reference, engine, X)
+        max_diff = float(np.max(np.abs(engine.decision_function(X) - reference_scores)))
+        single_ms = per_call_ms(lambda: engine.predict(X_one), SINGLE_RUNS)
+        batch_ms = per_call_ms(lambda: engine.predict(X_batch), 20)
+        print(f"{precision:<10} {agreement:>9.4f} {max_diff:>11.2e} {engine.nbytes / 1024:>7.0f} KiB "
+              f"{export_mib(precision):>6.2f} MiB {single_ms:>7.3f} ms {batch_ms:>11.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
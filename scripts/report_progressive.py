@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Report what progressive classification saves and what it changes.
+
+For every (initial word budget, margin) setting, each resume in
+UpdatedResumeDataSet.csv is classified progressively line by line (the way a
+TXT upload is read) and each PDF page by page: the two sample resumes plus
+synthetic 10, 30 and 60 page PDFs that repeat their pages. Reported against
+full-document prediction (extract everything, then pred()): the agreement with
+its category, the early-exit rate, the share of words read and the mean latency
+(best of REPEATS runs per document).
+
+The models are loaded the way the API loads them (MODEL_FORMAT,
+INFERENCE_MODE, ...); the margins depend on the model, so rerun this after
+retraining to pick PROGRESSIVE_INITIAL_WORDS / PROGRESSIVE_MARGIN.
+"""
+
+import os
+import sys
+import csv
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+
+import app
+from bench_pdf_extraction import SAMPLE_PDFS, synthetic_pdf
+
+INITIAL_WORDS = [100, 200, 400]
+MARGINS = [0.5, 1.0, 1.5]
+SYNTHETIC_PAGES = [10, 30, 60]
+REPEATS = 3
+
+
+def load_resumes(dataset_path):
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        return [row['Resume'] for row in csv.DictReader(f)]
+
+
+def best_time(fn, *args):
+    best, result = float('inf'), None
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start_time)
+    return result, best
+
+
+def full_prediction(document):
+    """Category index of extract-everything-then-predict"""
+    text = document if isinstance(document, str) else app.extract_text(document)
+    return app.predict_vectors(app.vectorize([text]))[0]
+
+
+def progressive_prediction(document, initial_words, margin):
+    chunks = iter(document.splitlines(keepends=True)) if isinstance(document, str) else app.iter_text_chunks(document)
+    return app.classify_chunks(chunks, initial_words, margin)
+
+
+def report(title, documents):
+    baseline = [best_time(full_prediction, document) for document in documents]
+    full_ms = sum(seconds for _, seconds in baseline) / len(documents) * 1000
+    full_words = sum(len((d if isinstance(d, str) else app.extract_text(d)).split()) for d in documents)
+
+    print(f"\n{title}: {len(documents)} documents, full-document prediction {full_ms:.2f} ms mean")
+    print(f"{'words':>6} {'margin':>7} {'agree %':>8} {'early %':>8} {'read %':>7} {'mean ms':>8} {'saved %':>8}")
+    for initial_words in INITIAL_WORDS:
+        for margin in MARGINS:
+            agree = early = words_read = 0
+            seconds = 0.0
+            for document, (full_label, _) in zip(documents, baseline):
+                result, elapsed = best_time(progressive_prediction, document, initial_words, margin)
+                agree += result['label'] == full_label
+                early += result['early_exit']
+                words_read += result['words_read']
+                seconds += elapsed
+            mean_ms = seconds / len(documents) * 1000
+            print(f"{initial_words:>6} {margin:>7.2f} {agree / len(documents) * 100:>8.1f} "
+                  f"{early / len(documents) * 100:>8.1f} {words_read / full_words * 100:>7.1f} "
+                  f"{mean_ms:>8.2f} {(1 - mean_ms / full_ms) * 100:>8.1f}")
+
+
+def main():
+    # Warm up the parsers and the lazy imports
+    app.extract_text(open(os.path.join(ROOT_DIR, SAMPLE_PDFS[0]), 'rb').read())
+
+    resumes = load_resumes(os.path.join(ROOT_DIR, 'UpdatedResumeDataSet.csv'))
+    report("UpdatedResumeDataSet.csv (TXT, line by line)", resumes)
+    report(f"UpdatedResumeDataSet.csv, resumes over {INITIAL_WORDS[-1]} words",
+           [text for text in resumes if len(text.split()) > INITIAL_WORDS[-1]])
+
+    pdfs = [open(os.path.join(ROOT_DIR, name), 'rb').read() for name in SAMPLE_PDFS]
+    report("Sample PDFs (page by page)", pdfs)
+    for n_pages in SYNTHETIC_PAGES:
+        report(f"Synthetic {n_pages}-page PDF", [synthetic_pdf(n_pages)])
+
+
+if __name__ == "__main__":
+    main()
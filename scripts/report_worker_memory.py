@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Report per-worker memory of a multi-worker API for each model format.
+
+For every MODEL_FORMAT the API is started with `uvicorn app:app --workers N`,
+warmed up with /predict/text calls, and the RSS and PSS (proportional set size,
+which splits shared pages between the processes mapping them) of every worker
+are read from /proc/<pid>/smaps_rollup. Shared memory-mapped model arrays show
+up as RSS in each worker but are only counted once in the PSS total.
+Linux only.
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_memory(pid):
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                memory[key] = int(value.split()[0]) / 1024
+    return memory
+
+
+def child_pids(parent_pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return children
+
+
+def measure_format(model_format, workers, port, warmup_requests=200):
+    env = dict(os.environ, MODEL_FORMAT=model_format)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(port), '--workers', str(workers)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{base_url}/health", timeout=5).json().get('status') == 'healthy':
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(1)
+        else:
+            raise RuntimeError(f"API did not become healthy with MODEL_FORMAT={model_format}")
+
+        # Spread requests over all workers so each has served predictions
+        for _ in range(warmup_requests):
+            requests.post(f"{base_url}/predict/text",
+                          json={"resume_text": "Python developer Django Flask AWS"}, timeout=60)
+        time.sleep(2)
+
+        # uvicorn's master spawns the workers; ignore the multiprocessing resource tracker
+        worker_pids = [pid for pid in child_pids(server.pid)
+                       if b'resource_tracker' not in open(f"/proc/{pid}/cmdline", 'rb').read()]
+        return {pid: read_memory(pid) for pid in worker_pids}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    formats = sys.argv[2].split(',') if len(sys.argv) > 2 else ['pickle', 'arrays']
+    port = 8765
+
+    for model_format in formats:
+        memory = measure_format(model_format, workers, port)
+        print(f"\nMODEL_FORMAT={model_format} ({len(memory)} workers)")
+        print(f"  {'pid':>8} {'RSS MiB':>10} {'PSS MiB':>10}")
+        for pid, values in sorted(memory.items()):
+            print(f"  {pid:>8} {values['Rss']:>10.1f} {values['Pss']:>10.1f}")
+        print(f"  {'total':>8} {sum(v['Rss'] for v in memory.values()):>10.1f} "
+              f"{sum(v['Pss'] for v in memory.values()):>10.1f}")
+        port += 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Similar-resume search over the TF-IDF space.
+
+SimilarityIndex is an inverted index: every segment keeps a term-major CSR
+matrix (row = term, columns = documents), so scoring a query is one sparse
+product that touches only the postings of the query's terms and yields only
+the documents sharing at least one term with it. Scores are cosine
+similarities, using the document norms computed when a document is added, and
+the k best candidates are picked with argpartition instead of a full sort.
+
+Documents are added to an in-memory pending buffer that is sealed into an
+immutable segment every segment_docs documents (and on save). Once more than
+max_small_segments segments are smaller than segment_docs, they are merged into
+one. Removing a document only marks it deleted; compact() rewrites all
+segments into one without the deleted documents. save() writes every segment as .npy files plus
+a manifest, and load() memory-maps them read-only, like model_store, so
+workers on one host share the postings through the page cache.
+
+Several processes (API workers) can update one index directory. Each keeps its
+own copy in memory and a journal of the documents it added or removed since
+its last save. Saves hold an exclusive lock on the directory: if another
+process saved since this one last loaded or saved (the manifest's generation
+changed), the index is reloaded from disk and the journal replayed on it before
+it is written back. A save only deletes the files of segments that the previous
+manifest listed and the new one does not. refresh() picks up other processes'
+saves while a process has nothing to save.
+
+Usage:
+    python similarity.py build [dataset_csv] [index_dir] [model_dir]
+"""
+
+import os
+import sys
+import json
+import uuid
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking on Windows; run one writer there
+    fcntl = None
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_NAME = 'resume-similarity-index'
+FORMAT_VERSION = 1
+
+_ARRAYS = ('data', 'indices', 'indptr', 'norms', 'ids')
+LOCK_FILE = '.lock'
+
+
+@contextmanager
+def _locked(index_dir, exclusive):
+    """Cross-process lock on an index directory: shared to read it, exclusive to write it"""
+    try:
+        lock_file = open(os.path.join(index_dir, LOCK_FILE), 'a')
+    except OSError:
+        # Missing or read-only directory: nothing can be writing to it
+        lock_file = None
+    try:
+        if lock_file is not None and fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        if lock_file is not None:
+            lock_file.close()
+
+
+def _read_manifest(index_dir):
+    """The index manifest in index_dir, or None if there is none"""
+    try:
+        with open(os.path.join(index_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get('format') != FORMAT_NAME or manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported similarity index format in {index_dir}")
+    return manifest
+
+
+class _Segment:
+    """Term-major postings, norms and ids of a fixed set of documents, plus their deleted flags"""
+
+    def __init__(self, postings, norms, ids, deleted=None, name=None):
+        self.postings = postings
+        self.norms = norms
+        self.ids = ids
+        self.deleted = np.zeros(len(ids), dtype=bool) if deleted is None else deleted
+        self.name = name or uuid.uuid4().hex[:12]
+        self.saved = False
+
+    @classmethod
+    def from_rows(cls, X, ids):
+        """Segment from document-major CSR rows"""
+        X = sp.csr_matrix(X, dtype=np.float32)
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1), dtype=np.float32).ravel())
+        # The CSC arrays of the document matrix are the CSR arrays of its transpose
+        postings = X.T.tocsr()
+        postings.sort_indices()
+        return cls(postings, norms, np.asarray(ids, dtype=str))
+
+    @property
+    def live(self):
+        return len(self.ids) - int(self.deleted.sum())
+
+    def search(self, query, k):
+        """(scores, rows) of this segment's k best live documents for a 1-row float32 query"""
+        hits = (query @ self.postings).tocsr()
+        rows, dots = hits.indices, hits.data
+        norms = self.norms[rows]
+        keep = (~self.deleted[rows]) & (norms > 0)
+        rows, scores = rows[keep], dots[keep] / norms[keep]
+        if len(rows) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[best], scores[best]
+        return scores, rows
+
+
+class SimilarityIndex:
+    """
+    Incremental cosine-similarity index over TF-IDF rows.
+
+    Args:
+        n_features: Vocabulary size of the vectorizer the rows come from
+        segment_docs: Pending documents sealed into a new segment at once
+        model_version: Version of the vectorizer, recorded in the manifest
+        max_small_segments: Segments smaller than segment_docs allowed before they are merged
+    """
+
+    def __init__(self, n_features, segment_docs=50000, model_version=None, max_small_segments=8):
+        self.n_features = int(n_features)
+        self.segment_docs = max(1, int(segment_docs))
+        self.model_version = model_version
+        self.max_small_segments = max(1, int(max_small_segments))
+        self._segments = []
+        self._pending_rows = []
+        self._pending_ids = []
+        self._pending = None
+        self._lock = threading.Lock()
+        # Directory this index was loaded from / saved to, and the manifest generation it reflects
+        self.index_dir = None
+        self.generation = None
+        # ('add', ids, rows) / ('remove', ids) since the last save, replayed if another process saved meanwhile
+        self._journal = []
+
+    def __len__(self):
+        with self._lock:
+            return self._live()
+
+    def _live(self):
+        return sum(segment.live for segment in self._all_segments())
+
+    def _all_segments(self):
+        if self._pending is None and self._pending_ids:
+            self._pending = _Segment.from_rows(sp.vstack(self._pending_rows), self._pending_ids)
+        return self._segments + ([self._pending] if self._pending is not None else [])
+
+    def _seal(self):
+        segments = self._all_segments()
+        if self._pending is not None:
+            self._segments = segments
+        self._pending_rows, self._pending_ids, self._pending = [], [], None
+
+        small = [segment for segment in self._segments if len(segment.ids) < self.segment_docs]
+        if len(small) > self.max_small_segments:
+            large = [segment for segment in self._segments if len(segment.ids) >= self.segment_docs]
+            self._segments = large + self._merge(small)
+
+    @staticmethod
+    def _merge(segments):
+        """One segment holding the live documents of segments (none if they have none)"""
+        rows, ids = [], []
+        for segment in segments:
+            live = ~segment.deleted
+            rows.append(segment.postings.T.tocsr()[live])
+            ids.append(segment.ids[live])
+        if not sum(map(len, ids)):
+            return []
+        return [_Segment.from_rows(sp.vstack(rows), np.concatenate(ids))]
+
+    def _delete(self, doc_ids):
+        """Mark live documents with these ids deleted; returns how many were"""
+        removed = 0
+        for segment in self._all_segments():
+            hits = np.isin(segment.ids, doc_ids) & ~segment.deleted
+            if hits.any():
+                segment.deleted[hits] = True
+                removed += int(hits.sum())
+        return removed
+
+    def add(self, doc_ids, X):
+        """
+        Add documents (CSR rows of X, one per id). An id that is already indexed
+        is replaced. Returns the number of replaced documents.
+        """
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        if X.shape != (len(doc_ids), self.n_features):
+            raise ValueError(f"Expected {len(doc_ids)} rows of {self.n_features} features, got {X.shape}")
+        if len(set(doc_ids)) != len(doc_ids):
+            raise ValueError("Duplicate document ids in one add")
+        rows = sp.csr_matrix(X, dtype=np.float32)
+        with self._lock:
+            if self.index_dir is not None:
+                self._journal.append(('add', doc_ids, rows))
+            return self._add(doc_ids, rows)
+
+    def _add(self, doc_ids, rows):
+        replaced = self._delete(doc_ids)
+        # Deleted flags of the pending segment live on the pending rows themselves
+        if self._pending is not None and self._pending.deleted.any():
+            self._seal()
+        self._pending_rows.append(rows)
+        self._pending_ids.extend(doc_ids)
+        self._pending = None
+        if len(self._pending_ids) >= self.segment_docs:
+            self._seal()
+        return replaced
+
+    def remove(self, doc_ids):
+        """Remove documents by id; returns how many were indexed"""
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        with self._lock:
+            if self.index_dir is not None:
+                self._journal.append(('remove', doc_ids))
+            return self._delete(doc_ids)
+
+    @property
+    def unsaved(self):
+        """Number of adds / removes not saved yet"""
+        return len(self._journal)
+
+    def attach(self, index_dir):
+        """
+        Save into index_dir as one of its writers: from now on changes are journaled, and a
+        save merges them with the index other processes saved there (see save())
+        """
+        with self._lock:
+            self.index_dir = index_dir
+
+    def search(self, query, k=10):
+        """[(id, cosine similarity)] of the k documents most similar to one TF-IDF row, best first"""
+        query = sp.csr_matrix(query, dtype=np.float32)
+        query_norm = float(np.sqrt(query.multiply(query).sum()))
+        if query_norm == 0 or k < 1:
+            return []
+        found = []
+        with self._lock:
+            for segment in self._all_segments():
+                scores, rows = segment.search(query, k)
+                found.extend(zip(scores, segment.ids[rows]))
+        found.sort(key=lambda hit: -hit[0])
+        return [(str(doc_id), float(score) / query_norm) for score, doc_id in found[:k]]
+
+    def compact(self):
+        """Rewrite every segment into one without the deleted documents"""
+        with self._lock:
+            self._seal()
+            self._segments = self._merge(self._segments)
+
+    def stats(self):
+        with self._lock:
+            segments = self._all_segments()
+            return {
+                "documents": self._live(),
+                "deleted": sum(int(segment.deleted.sum()) for segment in segments),
+                "segments": len(self._segments),
+                "pending": len(self._pending_ids),
+                "unsaved_changes": len(self._journal),
+                "generation": self.generation,
+                "postings": sum(segment.postings.nnz for segment in segments),
+                "n_features": self.n_features,
+                "model_version": self.model_version,
+            }
+
+    def save(self, index_dir):
+        """
+        Seal pending documents and write new segments, deleted flags and the manifest.
+
+        If this index was loaded from or attached to index_dir and another process
+        saved there since, the saved index is loaded and this index's unsaved adds
+        and removes are replayed on it first; only an index with a different number
+        of features is replaced. If the saved index cannot be read, the error is
+        raised and nothing is written, so another writer's documents are never
+        dropped. An index not attached to index_dir replaces the one there.
+
+        Raises:
+            OSError, ValueError, KeyError: The index in index_dir is missing files or unreadable
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        with self._lock, _locked(index_dir, exclusive=True):
+            attached = self.index_dir == index_dir
+            try:
+                previous = _read_manifest(index_dir)
+            except ValueError:
+                if attached:
+                    raise
+                # Replacing it anyway: write ours over its manifest, but keep its files
+                previous = None
+            generation = previous.get('generation', 0) if previous is not None else None
+            if attached and previous is not None and generation != self.generation \
+                    and previous['n_features'] == self.n_features:
+                self._adopt(self._load(index_dir, previous, self.segment_docs, True, self.max_small_segments))
+                for operation in self._journal:
+                    if operation[0] == 'add':
+                        self._add(operation[1], operation[2])
+                    else:
+                        self._delete(operation[1])
+
+            self._seal()
+            for segment in self._segments:
+                if not segment.saved:
+                    arrays = {'data': segment.postings.data, 'indices': segment.postings.indices,
+                              'indptr': segment.postings.indptr, 'norms': segment.norms, 'ids': segment.ids}
+                    for key in _ARRAYS:
+                        np.save(os.path.join(index_dir, f"{segment.name}.{key}.npy"), arrays[key])
+                    segment.saved = True
+                np.save(os.path.join(index_dir, f"{segment.name}.deleted.npy"), segment.deleted)
+
+            manifest = {
+                "format": FORMAT_NAME,
+                "format_version": FORMAT_VERSION,
+                "generation": (generation or 0) + 1,
+                "n_features": self.n_features,
+                "model_version": self.model_version,
+                "segments": [{"name": segment.name, "documents": len(segment.ids)} for segment in self._segments],
+            }
+            tmp_path = os.path.join(index_dir, 'manifest.json.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, os.path.join(index_dir, 'manifest.json'))
+
+            # Files of the segments the previous manifest listed and this one no longer does (merged away)
+            names = {segment.name for segment in self._segments}
+            for entry in (previous or {}).get('segments', []):
+                if entry['name'] not in names:
+                    for key in _ARRAYS + ('deleted',):
+                        try:
+                            os.remove(os.path.join(index_dir, f"{entry['name']}.{key}.npy"))
+                        except FileNotFoundError:
+                            pass
+
+            self.index_dir = index_dir
+            self.generation = manifest['generation']
+            self._journal = []
+        return manifest
+
+    def refresh(self):
+        """Reload the index if another process saved it since and this one has nothing unsaved; returns whether it did"""
+        if self.index_dir is None or self._journal:
+            return False
+        with _locked(self.index_dir, exclusive=False):
+            manifest = _read_manifest(self.index_dir)
+            if manifest is None or manifest.get('generation', 0) == self.generation \
+                    or manifest['n_features'] != self.n_features:
+                return False
+            fresh = self._load(self.index_dir, manifest, self.segment_docs, True, self.max_small_segments)
+        with self._lock:
+            if self._journal:
+                # Changed while reloading: the next save merges instead
+                return False
+            self._adopt(fresh)
+        return True
+
+    def _adopt(self, other):
+        """Take over the segments and generation of an index loaded from disk"""
+        self._segments = other._segments
+        self._pending_rows, self._pending_ids, self._pending = [], [], None
+        self.generation = other.generation
+        self.model_version = other.model_version
+
+    @classmethod
+    def load(cls, index_dir, segment_docs=50000, mmap=True, max_small_segments=8):
+        """Open a saved index; the postings are memory-mapped read-only unless mmap is False"""
+        with _locked(index_dir, exclusive=False):
+            manifest = _read_manifest(index_dir)
+            if manifest is None:
+                raise FileNotFoundError(f"No similarity index in {index_dir}")
+            index = cls._load(index_dir, manifest, segment_docs, mmap, max_small_segments)
+        index.index_dir = index_dir
+        return index
+
+    @classmethod
+    def _load(cls, index_dir, manifest, segment_docs, mmap, max_small_segments):
+        index = cls(manifest['n_features'], segment_docs, manifest.get('model_version'), max_small_segments)
+        index.generation = manifest.get('generation', 0)
+        mmap_mode = 'r' if mmap else None
+        for entry in manifest['segments']:
+            name = entry['name']
+            arrays = {key: np.load(os.path.join(index_dir, f"{name}.{key}.npy"), mmap_mode=mmap_mode) for key in _ARRAYS}
+            postings = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                     shape=(manifest['n_features'], entry['documents']))
+            deleted = np.load(os.path.join(index_dir, f"{name}.deleted.npy"))
+            segment = _Segment(postings, arrays['norms'], arrays['ids'], deleted, name)
+            segment.saved = True
+            index._segments.append(segment)
+        return index
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        print("Usage: python similarity.py build [dataset_csv] [index_dir] [model_dir]")
+        print("  dataset_csv: CSV with a Resume column and optional ID column (default: UpdatedResumeDataSet.csv)")
+        print("  index_dir: Output directory (default: similarity_index)")
+        print("  model_dir: Directory holding tfidf.pkl (default: .)")
+        sys.exit(1)
+
+    import csv
+    import time
+    import pickle
+
+    from cache import files_version
+    from model_store import FusedTfidfVectorizer
+    from textnorm import clean_resume
+
+    dataset = sys.argv[2] if len(sys.argv) > 2 else 'UpdatedResumeDataSet.csv'
+    index_dir = sys.argv[3] if len(sys.argv) > 3 else 'similarity_index'
+    model_dir = sys.argv[4] if len(sys.argv) > 4 else '.'
+    with open(os.path.join(model_dir, 'tfidf.pkl'), 'rb') as f:
+        tfidf = pickle.load(f)
+    try:
+        transform = FusedTfidfVectorizer.from_vectorizer(tfidf).transform
+    except ValueError:
+        transform = lambda texts: tfidf.transform([clean_resume(text) for text in texts])
+
+    start_time = time.perf_counter()
+    index = SimilarityIndex(len(tfidf.vocabulary_), model_version=files_version(
+        [os.path.join(model_dir, name) for name in ('clf.pkl', 'tfidf.pkl', 'encoder.pkl')]))
+    with open(dataset, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for start in range(0, len(rows), 10000):
+        chunk = rows[start:start + 10000]
+        ids = [row.get('ID') or str(start + i) for i, row in enumerate(chunk)]
+        index.add(ids, transform([row['Resume'] for row in chunk]))
+    index.save(index_dir)
+    stats = index.stats()
+    print(f"Indexed {stats['documents']} resumes ({stats['postings']} postings) into {index_dir} "
+          f"in {time.perf_counter() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,23 @@ apt-get install -y python3-pip python3-venv git unzip wget curl awscli
 mkdir -p /opt/ml-api
 cd /opt/ml-api
 
-echo "[*] Downloading app.py and requirements.txt"
+echo "[*] Downloading API modules and requirements.txt"
 wget -O app.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/app.py"
+wget -O engine.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/engine.py"
+wget -O batching.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/batching.py"
+wget -O executors.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/executors.py"
+wget -O cache.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/cache.py"
+wget -O model_store.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/model_store.py"
+wget -O pdf_extract.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/pdf_extract.py"
+wget -O uploads.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/uploads.py"
+wget -O progressive.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/progressive.py"
+wget -O ranking.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/ranking.py"
+wget -O similarity.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/similarity.py"
+wget -O dedup.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/dedup.py"
+wget -O fast_tier.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/fast_tier.py"
+wget -O metrics.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/metrics.py"
+wget -O diagnostics.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/diagnostics.py"
+wget -O textnorm.py "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/textnorm.py"
 wget -O requirements.txt "https://raw.githubusercontent.com/ThevinduKevin/resume-screening-nlp-model/main/requirements.txt"
 
 echo "[*] Downloading models from S3 (public bucket)"
@@ -0,0 +1,91 @@
+"""
+Single-pass resume text normalization.
+
+clean_resume() returns exactly the same string as the original cleanResume,
+which chained seven re.sub calls (kept below as legacy_clean_resume for the
+equivalence check and the benchmark), but makes three passes over the text
+instead of seven:
+
+1. One combined pattern removes URLs, "RT" / "cc", hashtags and mentions.
+   The original removed them one after another, so by the time hashtags and
+   mentions were matched every URL, "RT" and "cc" had already become a space;
+   hashtags and mentions therefore stop where one of those begins.
+2. Encoding to ASCII turns every non-ASCII character into "?", and one
+   bytes.translate call maps punctuation (including that "?") and ASCII
+   whitespace to a space.
+3. Runs of spaces collapse to one space. Because every run of whitespace ends
+   up as a single space, the extra spaces left by step 1 do not change the output.
+
+resume_tokens() goes one step further for the TF-IDF vectorizer: the same
+translate call also lowercases, and everything that is not an ASCII letter or
+digit becomes a separator, so a single split() yields the words that
+TfidfVectorizer's default token pattern finds in the cleaned text.
+"""
+
+import re
+
+import numpy as np
+
+_URL = r'http\S+\s'
+_ENDS_TOKEN = r'RT|cc|' + _URL
+_SKIP_PATTERN = re.compile(
+    rf'{_URL}|RT|cc'
+    rf'|#(?:(?!{_ENDS_TOKEN})\S)+(?:\s|RT|cc|(?={_URL}))'
+    rf'|@(?:(?!{_ENDS_TOKEN})\S)+'
+)
+
+_PUNCTUATION = b"""!"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"""
+# ASCII characters matched by \s; non-ASCII whitespace is already "?" after encoding
+_ASCII_WHITESPACE = b'\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f'
+_SPACE_TABLE = bytes.maketrans(
+    _PUNCTUATION + _ASCII_WHITESPACE, b' ' * (len(_PUNCTUATION) + len(_ASCII_WHITESPACE))
+)
+_SPACE = ord(' ')
+
+# After clean_resume the text is ASCII without "_", so \w is [A-Za-z0-9] and the
+# default token pattern (?u)\b\w\w+\b matches maximal runs of letters and digits
+_WORD_BYTES = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_TOKEN_TABLES = {
+    lowercase: bytes(
+        (byte if not lowercase else ord(chr(byte).lower())) if byte in _WORD_BYTES else _SPACE
+        for byte in range(256)
+    )
+    for lowercase in (False, True)
+}
+
+
+def _collapse_spaces(data):
+    """Replace every run of spaces in an ASCII byte string with a single space"""
+    chars = np.frombuffer(data, dtype=np.uint8)
+    is_space = chars == _SPACE
+    keep = np.ones(len(chars), dtype=bool)
+    keep[1:] = ~(is_space[1:] & is_space[:-1])
+    return chars[keep].tobytes()
+
+
+def clean_resume(txt):
+    """Strip URLs, RT/cc, hashtags, mentions, punctuation and non-ASCII characters and collapse whitespace"""
+    data = _SKIP_PATTERN.sub(' ', txt).encode('ascii', 'replace').translate(_SPACE_TABLE)
+    return _collapse_spaces(data).decode('ascii')
+
+
+def resume_tokens(txt, lowercase=True):
+    """
+    Words of clean_resume(txt) as byte strings, in order, in one pass.
+
+    Single-character words are kept; they never match a vocabulary built with
+    the default token pattern, which requires two characters.
+    """
+    return _SKIP_PATTERN.sub(' ', txt).encode('ascii', 'replace').translate(_TOKEN_TABLES[lowercase]).split()
+
+
+def legacy_clean_resume(txt):
+    """The original seven-pass cleanResume, the reference clean_resume must match"""
+    cleanText = re.sub(r'http\S+\s', ' ', txt)
+    cleanText = re.sub('RT|cc', ' ', cleanText)
+    cleanText = re.sub(r'#\S+\s', ' ', cleanText)
+    cleanText = re.sub(r'@\S+', '  ', cleanText)
+    cleanText = re.sub('[%s]' % re.escape(r"""!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~"""), ' ', cleanText)
+    cleanText = re.sub(r'[^\x00-\x7f]', ' ', cleanText)
+    cleanText = re.sub(r'\s+', ' ', cleanText)
+    return cleanText
@@ -0,0 +1,125 @@
+"""
+Bounded, streaming upload ingestion.
+
+UploadLimitMiddleware rejects request bodies above a per-path size limit with a
+413 before they are parsed: from the Content-Length header when there is one,
+otherwise as soon as the streamed body crosses the limit. Starlette spools
+multipart files to a SpooledTemporaryFile (on disk above the spool threshold);
+the helpers below work on that file object directly, so an upload is never
+read into memory just to be hashed or to have its format detected.
+
+The format is sniffed from magic bytes rather than taken from the filename.
+"""
+
+import io
+import hashlib
+import zipfile
+
+from fastapi import HTTPException
+
+SNIFF_BYTES = 8192
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Leading bytes of binary formats that are never resumes we can read
+_BINARY_MAGIC = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'\xd0\xcf\x11\xe0',  # PNG, JPEG, GIF, legacy Office (OLE)
+    b'\x1f\x8b', b'7z\xbc\xaf', b'Rar!', b'%!PS',                # gzip, 7z, RAR, PostScript
+)
+
+
+class UnsupportedFileType(ValueError):
+    """Raised when an upload's content is not a PDF, DOCX or text file"""
+
+
+def upload_too_large(limit):
+    return HTTPException(status_code=413, detail=f"Upload too large (max {limit} bytes)")
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware enforcing a maximum request body size per path.
+
+    Args:
+        app: ASGI application
+        limits: {path: max body bytes}; other paths are not limited
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope['path']) if scope['type'] == 'http' else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    # Raised inside body parsing, so FastAPI returns it as the response
+                    raise upload_too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, limit):
+        body = f'{{"detail":"Upload too large (max {limit} bytes)"}}'.encode()
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                                (b'connection', b'close')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def as_stream(source):
+    """Binary stream over upload bytes or an already open binary file, positioned at the start"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def sniff_format(stream):
+    """'pdf', 'docx' or 'txt' from the content of a seekable binary stream, or None if unsupported"""
+    stream.seek(0)
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+
+    # The PDF header may follow a little leading junk
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                is_docx = 'word/document.xml' in archive.namelist()
+        except zipfile.BadZipFile:
+            return None
+        finally:
+            stream.seek(0)
+        return 'docx' if is_docx else None
+    if head.startswith(_BINARY_MAGIC) or b'\x00' in head:
+        return None
+    return 'txt'
+
+
+def upload_digest(source):
+    """SHA-256 hex digest of upload bytes or of a binary file, read in chunks"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(HASH_CHUNK_BYTES), b''):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()